@@ -47,6 +47,8 @@ setup(
     packages=["delphyne"],
     extras_require={
         "TEST": ["pytest", "pytest-cov", "SQLAlchemy-Utils", "docker", "nox", "flake8"],
+        "ARROW": ["pyarrow"],
+        "ZSTD": ["zstandard"],
     },
     url="https://github.com/thehyve/delphyne",
     version=version['__version__'],
@@ -37,6 +37,13 @@ class _RunOptions(BaseModel):
     write_reports: bool
 
 
+class _PostLoadOptimization(BaseModel):
+    analyze: bool = True
+    vacuum: bool = False
+    cluster_on: Optional[str]
+    max_workers: int = 4
+
+
 class MainConfig(BaseModel):
     """Data schema and validator of the main config properties."""
 
@@ -45,6 +52,7 @@ class MainConfig(BaseModel):
     schema_translate_map: Dict[str, str]
     run_options: _RunOptions
     sql_parameters: Optional[Dict[str, str]]
+    post_load_optimization: Optional[_PostLoadOptimization]
 
     @validator('schema_translate_map')
     def check_required_schemas(cls, schema_map: Dict[str, str]) -> Dict[str, str]:
@@ -4,7 +4,7 @@ import logging
 from pathlib import Path
 from typing import Optional, Dict, Any
 
-from pydantic import BaseModel, validator, DirectoryPath
+from pydantic import BaseModel, validator, DirectoryPath, ByteSize, PositiveInt
 from ...util.io import is_hidden
 
 logger = logging.getLogger(__name__)
@@ -15,8 +15,14 @@ class SourceConfig(BaseModel):
 
     source_data_folder: DirectoryPath
     count_source_rows: bool
+    count_source_rows_in_background: bool = False
+    row_count_workers: PositiveInt = 4
+    cache_dir: Optional[Path]
+    cache_memory_limit: Optional[ByteSize]
     file_defaults: Optional[Dict[str, Any]]
     source_files: Optional[Dict[str, Dict]]
+    source_tables: Optional[Dict[str, Optional[Dict]]]
+    source_datasets: Optional[Dict[str, Dict]]
 
     @validator('source_files')
     def check_source_files_present(cls,
@@ -50,3 +56,26 @@ class SourceConfig(BaseModel):
             if f not in actual_source_files:
                 logger.warning(f'Source file "{f}" not found in source folder: {source_dir}')
         return config_source_files
+
+    @validator('source_datasets')
+    def check_source_dataset_patterns(cls,
+                                      config_source_datasets: Optional[Dict[str, Dict]],
+                                      ) -> Optional[Dict[str, Dict]]:
+        """
+        Check all provided source datasets have a glob pattern.
+
+        Parameters
+        ----------
+        config_source_datasets : dict, optional
+            Source dataset properties dictionary.
+
+        Returns
+        -------
+        dict or None
+            The validated source dataset properties dictionary if
+            provided.
+        """
+        for name, params in (config_source_datasets or {}).items():
+            if not (params or {}).get('pattern'):
+                raise ValueError(f'No pattern was provided for source dataset "{name}"')
+        return config_source_datasets
@@ -11,28 +11,43 @@ while drop-methods use the reflected metadata.
 
 from __future__ import annotations
 
+import datetime
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from copy import copy
 from functools import lru_cache, wraps
-from typing import TYPE_CHECKING, Union, Dict, Callable, List, Tuple, NamedTuple
+from typing import (TYPE_CHECKING, Union, Dict, Callable, List, Tuple, NamedTuple,
+                    Iterable, Optional, ContextManager, Any, Set)
 
 from itertools import chain
-from sqlalchemy import Index, Table, PrimaryKeyConstraint, Constraint, MetaData, CheckConstraint
+from sqlalchemy import (Index, Table, PrimaryKeyConstraint, Constraint, MetaData,
+                        CheckConstraint, ForeignKeyConstraint)
 from sqlalchemy.engine.reflection import Inspector
 from sqlalchemy.exc import NoSuchTableError, SQLAlchemyError
 from sqlalchemy.schema import DropConstraint, AddConstraint, DropIndex, CreateIndex
 
 from .conventions import VOCAB_TABLES
+from ..ddl import AddConstraintNotValid, ValidateConstraint
 
 if TYPE_CHECKING:
     from ..database import Database
 
 _VALID_ERRORS_OPTIONS = {'raise', 'ignore'}
 
+# Dialects that support adding FKs as NOT VALID and validating them
+# afterwards
+_DEFERRED_VALIDATION_DIALECTS = {'postgresql'}
+
+_DEFAULT_MAX_WORKERS = 4
+
 logger = logging.getLogger(__name__)
 
 ConstraintOrIndex = Union[Constraint, Index]
 
+# Table name, Table instance or declarative table class
+TableLike = Union[str, Table, Any]
+
 
 def _is_non_pk_constraint(constraint: ConstraintOrIndex) -> bool:
     # Return True if constraint is not an index or a PK
@@ -52,6 +67,21 @@ def _invalidate_db_cache(func: Callable) -> Callable:
     return wrapper_invalidate_db_cache
 
 
+def _get_table_name(table: TableLike) -> str:
+    if isinstance(table, str):
+        return table
+    if isinstance(table, Table):
+        return table.name
+    return table.__table__.name
+
+
+def _get_referred_table_name(fk: ForeignKeyConstraint) -> str:
+    # FKs in reflected metadata are not resolved, so the referred table
+    # name is taken from the target column specification
+    # ('schema.table.column').
+    return fk.elements[0].target_fullname.split('.')[-2]
+
+
 def _create_constraint_lookup(metadata: MetaData) -> Dict[str, ConstraintOrIndex]:
     lookup = {}
     for table in metadata.tables.values():
@@ -173,12 +203,19 @@ class ConstraintManager:
     ----------
     database : Database
         Database instance to interact with.
+
+    Attributes
+    ----------
+    fk_validation_durations : dict of {str : datetime.timedelta}
+        Time it took to validate FKs that were added with deferred
+        validation, by constraint name.
     """
 
     def __init__(self, database: Database):
         self._db = database
         self._model = _TargetModel(metadata=database.base.metadata)
         self._chk_constraints = _DbCheckConstraints(database=database)
+        self.fk_validation_durations: Dict[str, datetime.timedelta] = {}
 
     @property
     def _reflected_metadata(self) -> MetaData:
@@ -271,6 +308,8 @@ class ConstraintManager:
                             add_pk: bool = True,
                             add_index: bool = True,
                             errors: str = 'raise',
+                            defer_fk_validation: bool = False,
+                            max_workers: int = _DEFAULT_MAX_WORKERS,
                             ) -> None:
         """
         Add constraints/indexes of all tables (including vocabulary).
@@ -298,6 +337,15 @@ class ConstraintManager:
             encountering an object that cannot be added.
             If 'ignore', raise no exception and try to add the remaining
             constraints (if any).
+        defer_fk_validation : bool, default False
+            If True, FKs are first added without checking the existing
+            rows (NOT VALID), after which all of them are validated in
+            parallel. Validation takes a weaker lock than adding a
+            regular FK. Only supported for PostgreSQL, for other
+            dialects this option is ignored.
+        max_workers : int, default 4
+            Maximum number of FKs that are validated concurrently when
+            defer_fk_validation is True.
 
         Returns
         -------
@@ -312,8 +360,8 @@ class ConstraintManager:
         if add_constraint:
             constraints = self._model.constraints
 
-        for constraint in chain(indexes, pks, constraints):
-            self._add_constraint_in_db(constraint, errors)
+        self._add_constraints_in_db(chain(indexes, pks, constraints), errors,
+                                    defer_fk_validation, max_workers)
 
     def drop_cdm_constraints(self,
                              drop_constraint: bool = True,
@@ -367,6 +415,8 @@ class ConstraintManager:
                             add_pk: bool = True,
                             add_index: bool = True,
                             errors: str = 'raise',
+                            defer_fk_validation: bool = False,
+                            max_workers: int = _DEFAULT_MAX_WORKERS,
                             ) -> None:
         """
         Add constraints/indexes of all non-vocabulary tables.
@@ -395,6 +445,15 @@ class ConstraintManager:
             encountering an object that cannot be added.
             If 'ignore', raise no exception and try to add the remaining
             constraints (if any).
+        defer_fk_validation : bool, default False
+            If True, FKs are first added without checking the existing
+            rows (NOT VALID), after which all of them are validated in
+            parallel. Validation takes a weaker lock than adding a
+            regular FK. Only supported for PostgreSQL, for other
+            dialects this option is ignored.
+        max_workers : int, default 4
+            Maximum number of FKs that are validated concurrently when
+            defer_fk_validation is True.
 
         Returns
         -------
@@ -409,9 +468,9 @@ class ConstraintManager:
         if add_constraint:
             constraints = self._model.constraints
 
-        for constraint in chain(indexes, pks, constraints):
-            if constraint.table.name not in VOCAB_TABLES:
-                self._add_constraint_in_db(constraint, errors)
+        cdm_objects = [c for c in chain(indexes, pks, constraints)
+                       if c.table.name not in VOCAB_TABLES]
+        self._add_constraints_in_db(cdm_objects, errors, defer_fk_validation, max_workers)
 
     @_invalidate_db_cache
     def drop_table_constraints(self,
@@ -464,6 +523,8 @@ class ConstraintManager:
                               add_pk: bool = True,
                               add_index: bool = True,
                               errors: str = 'raise',
+                              defer_fk_validation: bool = False,
+                              max_workers: int = _DEFAULT_MAX_WORKERS,
                               ) -> None:
         """
         Add constraints/indexes on a CDM table.
@@ -492,6 +553,15 @@ class ConstraintManager:
             encountering an object that cannot be added.
             If 'ignore', raise no exception and try to add the remaining
             constraints for this table (if any).
+        defer_fk_validation : bool, default False
+            If True, FKs are first added without checking the existing
+            rows (NOT VALID), after which all of them are validated in
+            parallel. Validation takes a weaker lock than adding a
+            regular FK. Only supported for PostgreSQL, for other
+            dialects this option is ignored.
+        max_workers : int, default 4
+            Maximum number of FKs that are validated concurrently when
+            defer_fk_validation is True.
 
         Returns
         -------
@@ -505,8 +575,8 @@ class ConstraintManager:
         constraints, pks, indexes = self._get_table_objects([table], add_constraint,
                                                             add_pk, add_index)
 
-        for constraint in chain(indexes, pks, constraints):
-            self._add_constraint_in_db(constraint, errors)
+        self._add_constraints_in_db(chain(indexes, pks, constraints), errors,
+                                    defer_fk_validation, max_workers)
 
     @_invalidate_db_cache
     def drop_constraint_or_index(self, name: str, errors: str = 'raise') -> None:
@@ -563,6 +633,126 @@ class ConstraintManager:
         constraint = self._get_constraint_from_model(name)
         self._add_constraint_in_db(constraint, errors)
 
+    @contextmanager
+    def suspended(self,
+                  tables: Optional[Iterable[TableLike]] = None,
+                  keep_pk: bool = True,
+                  errors: str = 'raise',
+                  defer_fk_validation: bool = False,
+                  max_workers: int = _DEFAULT_MAX_WORKERS,
+                  ) -> ContextManager[None]:
+        """
+        Provide a scope in which table constraints/indexes are dropped.
+
+        On entering, the constraints/indexes that are active on the
+        tables are collected and dropped. On exit, exactly that set is
+        added again, also when an exception was raised inside the scope.
+        Only objects that are part of your CDM model are affected.
+
+        Parameters
+        ----------
+        tables : iterable of str, Table or table class, optional
+            The tables to suspend constraints/indexes for, e.g. the
+            output tables of a transformation. If not provided, all
+            non-vocabulary tables are affected.
+        keep_pk : bool, default True
+            If True, PKs remain active. If False, PKs are dropped as
+            well, together with FKs on other tables referring to them.
+        errors : {'ignore', 'raise'}, default 'raise'
+            Behavior in case a constraint cannot be dropped or added.
+            If 'raise', an exception will be raised upon first
+            encountering an object that cannot be dropped or added.
+            If 'ignore', raise no exception and try to drop/add the
+            remaining constraints (if any).
+        defer_fk_validation : bool, default False
+            If True, restored FKs are added without checking the
+            existing rows, after which they are validated in parallel.
+            Only supported for PostgreSQL.
+        max_workers : int, default 4
+            Maximum number of indexes that are created concurrently
+            on exit, and of FKs that are validated concurrently.
+
+        Yields
+        ------
+        None
+        """
+        if tables is None:
+            table_names = set(self._model.table_lookup) - VOCAB_TABLES
+        else:
+            table_names = {_get_table_name(t) for t in tables}
+        for table_name in table_names:
+            if not self._model.is_model_table(table_name):
+                raise KeyError(f'No table found in model with name "{table_name}"')
+
+        self.invalidate_current_db_cache()
+        constraints, pks, indexes = self._get_suspendable_objects(table_names, keep_pk)
+        names = [c.name for c in chain(constraints, indexes, pks)]
+        logger.info(f'Suspending {len(names)} constraints/indexes on '
+                    f'{len(table_names)} tables')
+        try:
+            for constraint in chain(constraints, indexes, pks):
+                self._drop_constraint_in_db(constraint, errors)
+            yield
+        finally:
+            self.invalidate_current_db_cache()
+            logger.info(f'Restoring {len(names)} suspended constraints/indexes')
+            self._restore_suspended_objects(names, errors, defer_fk_validation, max_workers)
+            self.invalidate_current_db_cache()
+
+    def _get_suspendable_objects(self,
+                                 table_names: Set[str],
+                                 keep_pk: bool,
+                                 ) -> Tuple[List[Constraint], List[PrimaryKeyConstraint],
+                                            List[Index]]:
+        # Collect the active objects of the tables that can be restored
+        # from the model afterwards.
+        tables = [t for name, t in self._reflected_table_lookup.items() if name in table_names]
+        constraints, pks, indexes = self._get_table_objects(tables, True, not keep_pk, True)
+        if not keep_pk:
+            # FKs of other tables depend on the PKs that will be dropped
+            for table in self._reflected_table_lookup.values():
+                if table.name in table_names:
+                    continue
+                constraints.extend(
+                    c for c in table.constraints if isinstance(c, ForeignKeyConstraint)
+                    and _get_referred_table_name(c) in table_names)
+
+        def is_restorable(constraint: ConstraintOrIndex) -> bool:
+            if constraint.name is None:
+                return False
+            if constraint.name not in self._model.constraint_lookup:
+                logger.info(f'{constraint.name} is not part of the model and will '
+                            f'remain active')
+                return False
+            return True
+
+        return ([c for c in constraints if is_restorable(c)],
+                [c for c in pks if is_restorable(c)],
+                [c for c in indexes if is_restorable(c)])
+
+    def _restore_suspended_objects(self,
+                                   names: List[str],
+                                   errors: str,
+                                   defer_fk_validation: bool,
+                                   max_workers: int,
+                                   ) -> None:
+        model_objects = [self._get_constraint_from_model(name) for name in names]
+        pks = [c for c in model_objects if isinstance(c, PrimaryKeyConstraint)]
+        indexes = [c for c in model_objects if isinstance(c, Index)]
+        constraints = [c for c in model_objects if _is_non_pk_constraint(c)]
+
+        # PKs need to be present before the FKs referring to them can be
+        # added. Indexes don't depend on each other, so they can be
+        # created concurrently.
+        for pk in pks:
+            self._add_constraint_in_db(pk, errors)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(self._add_constraint_in_db, index, errors)
+                       for index in indexes]
+        for future in futures:
+            future.result()
+        self._add_constraints_in_db(constraints, errors, defer_fk_validation, max_workers)
+
     @staticmethod
     def _get_table_objects(tables: List[Table],
                            get_constraints: bool,
@@ -595,19 +785,49 @@ class ConstraintManager:
             raise KeyError(f'"{constraint_name}" not found')
         return constraint
 
+    def _add_constraints_in_db(self,
+                               constraints: Iterable[ConstraintOrIndex],
+                               errors: str,
+                               defer_fk_validation: bool,
+                               max_workers: int,
+                               ) -> None:
+        # Add the constraints in the provided order. If FK validation is
+        # deferred, FKs are added as NOT VALID and validated in parallel
+        # once all other objects have been added.
+        if defer_fk_validation and not self._supports_deferred_validation():
+            logger.warning(f'Deferred FK validation is not supported for the '
+                           f'{self._db.engine.name} dialect, FKs will be validated '
+                           f'immediately')
+            defer_fk_validation = False
+
+        unvalidated_fks = []
+        for constraint in constraints:
+            not_valid = defer_fk_validation and isinstance(constraint, ForeignKeyConstraint)
+            added = self._add_constraint_in_db(constraint, errors, not_valid=not_valid)
+            if added and not_valid:
+                unvalidated_fks.append(constraint)
+
+        if unvalidated_fks:
+            self._validate_constraints_in_db(unvalidated_fks, errors, max_workers)
+
+    def _supports_deferred_validation(self) -> bool:
+        return self._db.engine.name in _DEFERRED_VALIDATION_DIALECTS
+
     def _add_constraint_in_db(self,
                               constraint: ConstraintOrIndex,
                               errors: str = 'raise',
-                              ) -> None:
+                              not_valid: bool = False,
+                              ) -> bool:
+        # Return True if the constraint was added
         assert errors in _VALID_ERRORS_OPTIONS
         if self._constraint_already_active(constraint):
-            return
+            return False
         if constraint.table.name not in self._reflected_table_lookup:
             logger.warning(f'Cannot add {constraint.name}, '
                            f'table {constraint.table.name} does not exist')
-            return
+            return False
         with self._db.engine.connect() as conn:
-            logger.info(f'Adding {constraint.name}')
+            logger.info(f'Adding {constraint.name}{" (not valid)" if not_valid else ""}')
             try:
                 if isinstance(constraint, Index):
                     conn.execute(CreateIndex(constraint))
@@ -618,12 +838,49 @@ class ConstraintManager:
                     # constraints have already been created and skips
                     # them.
                     c = copy(constraint)
-                    conn.execute(AddConstraint(c))
+                    if not_valid:
+                        conn.execute(AddConstraintNotValid(c))
+                    else:
+                        conn.execute(AddConstraint(c))
             except SQLAlchemyError:
                 if errors == 'raise':
                     raise
                 elif errors == 'ignore':
                     logger.info(f'Unable to add {constraint.name}')
+                return False
+        return True
+
+    def _validate_constraints_in_db(self,
+                                    constraints: List[Constraint],
+                                    errors: str,
+                                    max_workers: int,
+                                    ) -> None:
+        logger.info(f'Validating {len(constraints)} constraints '
+                    f'using {max_workers} workers')
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(self._validate_constraint_in_db, c, errors)
+                       for c in constraints]
+        # Exiting the executor waits for all validations to finish, so
+        # a failure doesn't leave other validations running unnoticed.
+        for future in futures:
+            future.result()
+
+    def _validate_constraint_in_db(self, constraint: Constraint, errors: str) -> None:
+        start = datetime.datetime.now()
+        with self._db.engine.connect() as conn:
+            logger.info(f'Validating {constraint.name}')
+            try:
+                conn.execute(ValidateConstraint(constraint))
+            except SQLAlchemyError:
+                if errors == 'raise':
+                    raise
+                elif errors == 'ignore':
+                    logger.info(f'Unable to validate {constraint.name}, '
+                                f'it remains active as NOT VALID')
+                    return
+        duration = datetime.datetime.now() - start
+        self.fk_validation_durations[constraint.name] = duration
+        logger.info(f'Validated {constraint.name} ({duration})')
 
     def _constraint_already_active(self, new_constraint: ConstraintOrIndex) -> bool:
         base_message = f'Cannot add {type(new_constraint).__name__} "{new_constraint.name}"'
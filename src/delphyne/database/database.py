@@ -201,9 +201,8 @@ class Database:
             Container storing metadata about the session.
         """
         session = self.get_new_session()
-        session_id = id(session)
         with open_transformation(name=name) as metadata:
-            SessionTracker.sessions[session_id] = metadata
+            SessionTracker.track_session(session, metadata)
             try:
                 yield session, metadata
                 session.commit()
@@ -214,7 +213,7 @@ class Database:
                 if raise_on_error:
                     raise
             finally:
-                SessionTracker.remove_session(session_id)
+                SessionTracker.remove_session(session)
                 session.close()
                 logger.info(f'{name} completed with success status: {metadata.query_success}')
 
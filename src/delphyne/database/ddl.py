@@ -0,0 +1,128 @@
+"""
+Custom DDL constructs module.
+
+SQLAlchemy does not provide constructs for some of the (dialect
+specific) DDL statements used by delphyne. They are defined here, and
+compiled via the SQLAlchemy compiler extension, which ensures that
+identifiers are quoted and schema placeholders are translated like for
+any regular SQLAlchemy statement.
+"""
+
+from typing import List
+
+from sqlalchemy import Table, Index
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.schema import AddConstraint, DDLElement, Constraint
+
+
+class AddConstraintNotValid(AddConstraint):
+    """
+    Represent an ALTER TABLE ADD CONSTRAINT ... NOT VALID statement.
+
+    The constraint is added without checking the existing rows. Only
+    supported for FK and check constraints on PostgreSQL.
+    """
+
+
+class ValidateConstraint(DDLElement):
+    """
+    Represent an ALTER TABLE VALIDATE CONSTRAINT statement.
+
+    Parameters
+    ----------
+    element : sqlalchemy.Constraint
+        The constraint to validate.
+    """
+
+    def __init__(self, element: Constraint):
+        self.element = element
+
+
+class TruncateTables(DDLElement):
+    """
+    Represent a TRUNCATE statement on one or more tables.
+
+    Only supported for PostgreSQL.
+
+    Parameters
+    ----------
+    tables : list of sqlalchemy.Table
+        The tables to truncate in a single statement.
+    restart_identity : bool, default True
+        If True, reset the sequences owned by the tables' columns.
+    """
+
+    def __init__(self, tables: List[Table], restart_identity: bool = True):
+        self.tables = tables
+        self.restart_identity = restart_identity
+
+
+class Analyze(DDLElement):
+    """
+    Represent an ANALYZE statement, optionally combined with VACUUM.
+
+    Only supported for PostgreSQL. A VACUUM cannot be executed inside
+    a transaction block.
+
+    Parameters
+    ----------
+    table : sqlalchemy.Table
+        The table to collect planner statistics for.
+    vacuum : bool, default False
+        If True, also reclaim storage occupied by dead rows.
+    """
+
+    def __init__(self, table: Table, vacuum: bool = False):
+        self.table = table
+        self.vacuum = vacuum
+
+
+class Cluster(DDLElement):
+    """
+    Represent a CLUSTER statement.
+
+    Only supported for PostgreSQL.
+
+    Parameters
+    ----------
+    table : sqlalchemy.Table
+        The table to physically reorder.
+    index : sqlalchemy.Index
+        The index to order the table by.
+    """
+
+    def __init__(self, table: Table, index: Index):
+        self.table = table
+        self.index = index
+
+
+@compiles(AddConstraintNotValid, 'postgresql')
+def _compile_add_constraint_not_valid(element, compiler, **kw):
+    return compiler.visit_add_constraint(element, **kw) + ' NOT VALID'
+
+
+@compiles(ValidateConstraint, 'postgresql')
+def _compile_validate_constraint(element, compiler, **kw):
+    table = compiler.preparer.format_table(element.element.table)
+    constraint = compiler.preparer.format_constraint(element.element)
+    return f'ALTER TABLE {table} VALIDATE CONSTRAINT {constraint}'
+
+
+@compiles(TruncateTables, 'postgresql')
+def _compile_truncate_tables_postgresql(element, compiler, **kw):
+    tables = ', '.join(compiler.preparer.format_table(t) for t in element.tables)
+    restart_identity = ' RESTART IDENTITY' if element.restart_identity else ''
+    return f'TRUNCATE {tables}{restart_identity}'
+
+
+@compiles(Analyze, 'postgresql')
+def _compile_analyze(element, compiler, **kw):
+    statement = 'VACUUM ANALYZE' if element.vacuum else 'ANALYZE'
+    return f'{statement} {compiler.preparer.format_table(element.table)}'
+
+
+@compiles(Cluster, 'postgresql')
+def _compile_cluster(element, compiler, **kw):
+    table = compiler.preparer.format_table(element.table)
+    index = compiler.preparer.quote(element.index.name)
+    return f'CLUSTER {table} USING {index}'
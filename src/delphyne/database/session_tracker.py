@@ -1,40 +1,77 @@
 """Storage module for tracked sessions."""
 
-from typing import Dict
+from typing import Optional
+
+from sqlalchemy.orm.session import Session
 
 from ..model.etl_stats import EtlTransformation
 
+# Key under which the EtlTransformation is stored in Session.info
+_TRANSFORMATION_INFO_KEY = 'delphyne_etl_transformation'
+
 
 class SessionTracker:
     """
-    Storage for tracked SQLAlchemy sessions.
+    Registry for tracked SQLAlchemy sessions.
 
-    Sessions marked for tracking by their id value, will be stored in
-    here. Session event functions from the events module will check if a
-    session is stored in here, and if so, will capture table change
-    information.
+    Sessions marked for tracking hold their EtlTransformation in the
+    session's own info dictionary. Session event functions from the
+    events module will check if a session is tracked, and if so, will
+    capture table change information.
 
-    Attributes
-    ----------
-    sessions : dict
-        Session id to session mapping.
+    Because the transformation is bound to the session object itself,
+    sessions used concurrently in different threads are tracked
+    independently, and tracking cannot be mixed up when object ids are
+    reused after garbage collection.
     """
 
-    sessions: Dict[int, EtlTransformation] = {}
+    @staticmethod
+    def track_session(session: Session, transformation: EtlTransformation) -> None:
+        """
+        Mark a session for tracking.
+
+        Parameters
+        ----------
+        session : Session
+            SQLAlchemy session to track.
+        transformation : EtlTransformation
+            Container in which the table changes will be captured.
+
+        Returns
+        -------
+        None
+        """
+        session.info[_TRANSFORMATION_INFO_KEY] = transformation
+
+    @staticmethod
+    def get_transformation(session: Session) -> Optional[EtlTransformation]:
+        """
+        Get the EtlTransformation of a tracked session.
+
+        Parameters
+        ----------
+        session : Session
+            SQLAlchemy session.
+
+        Returns
+        -------
+        EtlTransformation or None
+            None if the session is not tracked.
+        """
+        return session.info.get(_TRANSFORMATION_INFO_KEY)
 
     @staticmethod
-    def remove_session(session_id) -> None:
+    def remove_session(session: Session) -> None:
         """
-        Remove item from sessions, so it will no longer be tracked.
+        Remove session from tracking.
 
         Parameters
         ----------
-        session_id : int
-            Id value of the session via `id` builtin.
+        session : Session
+            SQLAlchemy session that should no longer be tracked.
 
         Returns
         -------
         None
         """
-        if session_id in SessionTracker.sessions:
-            del SessionTracker.sessions[session_id]
+        session.info.pop(_TRANSFORMATION_INFO_KEY, None)
@@ -3,6 +3,7 @@
 import copy
 import datetime
 import logging
+import threading
 from abc import ABC, abstractmethod
 from collections import Counter
 from contextlib import contextmanager
@@ -77,10 +78,56 @@ class EtlTransformation(_AbstractEtlBase):
     df_column_order: ClassVar = ['name', 'query_success', 'insertion_counts', 'update_counts',
                                  'deletion_counts', 'duration', 'start', 'end']
 
+    def __post_init__(self):
+        """Create the lock guarding the counts."""
+        # Needed when a transformation is shared by multiple threads
+        self._counts_lock = threading.Lock()
+
+    def __getstate__(self):
+        """Return the picklable state, which excludes the lock."""
+        with self._counts_lock:
+            state = self.__dict__.copy()
+        del state['_counts_lock']
+        return state
+
+    def __setstate__(self, state):
+        """Restore state and create a new lock."""
+        self.__dict__.update(state)
+        self._counts_lock = threading.Lock()
+
     def __str__(self):
         """Return name and duration."""
         return f'{self.name} ({self.duration})'
 
+    def add_counts(self,
+                   insertions: Optional[Counter] = None,
+                   updates: Optional[Counter] = None,
+                   deletions: Optional[Counter] = None,
+                   ) -> None:
+        """
+        Add table record counts to the current counts.
+
+        Parameters
+        ----------
+        insertions : Counter, optional
+            Number of inserted records by table name.
+        updates : Counter, optional
+            Number of updated records by table name.
+        deletions : Counter, optional
+            Number of deleted records by table name.
+
+        Returns
+        -------
+        None
+        """
+        with self._counts_lock:
+            if insertions:
+                self.insertion_counts += insertions
+            if updates:
+                self.update_counts += updates
+            if deletions:
+                self.deletion_counts += deletions
+
     @property
     def is_empty(self) -> bool:
         """Return True if there are no insertions/updates/deletions."""
@@ -99,7 +146,8 @@ class EtlTransformation(_AbstractEtlBase):
 
     def to_dict(self) -> Dict:
         """Return dict with empty Counters as None, otherwise string."""
-        d = copy.deepcopy(super().to_dict())
+        d = super().to_dict()
+        d = copy.deepcopy({key: value for key, value in d.items() if key != '_counts_lock'})
         for key, value in d.items():
             if isinstance(value, Counter):
                 if not value:
@@ -121,6 +169,10 @@ class EtlStats:
        rows (**EtlTransformation**).
      - list of source tables with file/table name and raw input row
        counts (**EtlSource**).
+     - hit, miss and eviction counts of the source data cache.
+
+    Objects can be added concurrently from multiple threads. Statistics
+    gathered in other processes can be combined via **merge**.
 
     Attributes
     ----------
@@ -130,12 +182,28 @@ class EtlStats:
         Stores all ETL transformation metadata.
     sources : list of EtlSource
         Stores all source file metadata.
+    cache_counts : Counter
+        Number of source data cache hits, misses and evictions.
     """
 
     def __init__(self):
+        self._lock = threading.RLock()
         self.start_time = datetime.datetime.now()
         self.transformations: List[EtlTransformation] = []
         self.sources: List[EtlSource] = []
+        self.cache_counts: Counter = Counter()
+
+    def __getstate__(self):
+        """Return the picklable state, which excludes the lock."""
+        with self._lock:
+            state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        """Restore state and create a new lock."""
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
 
     @property
     def n_queries_executed(self) -> int:
@@ -145,7 +213,8 @@ class EtlStats:
     @property
     def successful_transformations(self) -> List[EtlTransformation]:
         """Total number of successful transformations."""
-        return [t for t in self.transformations if t.query_success]
+        with self._lock:
+            return [t for t in self.transformations if t.query_success]
 
     @property
     def total_insertions(self) -> Counter:
@@ -174,9 +243,38 @@ class EtlStats:
         -------
         None
         """
-        self.start_time = datetime.datetime.now()
-        self.transformations = []
-        self.sources = []
+        with self._lock:
+            self.start_time = datetime.datetime.now()
+            self.transformations = []
+            self.sources = []
+            self.cache_counts = Counter()
+
+    def merge(self, other: 'EtlStats') -> None:
+        """
+        Add all Etl objects of another instance to this instance.
+
+        Use this to combine statistics gathered in worker processes,
+        e.g. by returning the worker's etl_stats (which can be pickled)
+        to the main process. Make sure to reset the worker's etl_stats
+        before use, to avoid adding objects twice.
+
+        Parameters
+        ----------
+        other : EtlStats
+            Instance to take the transformations and sources from.
+
+        Returns
+        -------
+        None
+        """
+        with other._lock:
+            transformations = list(other.transformations)
+            sources = list(other.sources)
+            cache_counts = Counter(other.cache_counts)
+        with self._lock:
+            self.transformations.extend(transformations)
+            self.sources.extend(sources)
+            self.cache_counts += cache_counts
 
     @staticmethod
     def get_total_duration(etl_objects: Union[List[EtlTransformation], List[EtlSource]]
@@ -209,7 +307,8 @@ class EtlStats:
         -------
         None
         """
-        self.transformations.append(transformation)
+        with self._lock:
+            self.transformations.append(transformation)
 
     def add_source(self, source: EtlSource) -> None:
         """
@@ -223,7 +322,28 @@ class EtlStats:
         -------
         None
         """
-        self.sources.append(source)
+        with self._lock:
+            self.sources.append(source)
+
+    def add_cache_counts(self, hits: int = 0, misses: int = 0, evictions: int = 0) -> None:
+        """
+        Add source data cache access counts.
+
+        Parameters
+        ----------
+        hits : int, default 0
+            Number of objects retrieved from the cache.
+        misses : int, default 0
+            Number of objects that were not found in the cache.
+        evictions : int, default 0
+            Number of objects removed to stay within the memory budget.
+
+        Returns
+        -------
+        None
+        """
+        with self._lock:
+            self.cache_counts.update(hits=hits, misses=misses, evictions=evictions)
 
 
 etl_stats = EtlStats()
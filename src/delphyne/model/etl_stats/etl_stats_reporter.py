@@ -42,6 +42,7 @@ class EtlStatsReporter:
             logger.info('')
 
             self._log_sources()
+            self._log_cache_counts()
 
             vocab_transformations = [t for t in self.stats.transformations if t.is_vocab_only]
             if vocab_transformations:
@@ -69,6 +70,13 @@ class EtlStatsReporter:
                 logger.info(f'\t{source}')
             logger.info('')
 
+    def _log_cache_counts(self) -> None:
+        counts = self.stats.cache_counts
+        if any(counts.values()):
+            logger.info(f'Source data cache: {counts["hits"]} hits, {counts["misses"]} misses, '
+                        f'{counts["evictions"]} evictions')
+            logger.info('')
+
     def _log_transformations(self, transformations: List[EtlTransformation]) -> None:
         successful_transformations = [t for t in transformations if t.query_success]
         if successful_transformations:
@@ -1,4 +1,7 @@
 """Source data package."""
 
+from .columnar_records import ColumnarRecords
+from .multi_part_source_file import MultiPartSourceFile
 from .source_data import SourceData
 from .source_file import SourceFile
+from .source_table import SourceTable
@@ -0,0 +1,140 @@
+"""Multithreaded parsing of delimited text files with pyarrow."""
+
+import logging
+from pathlib import Path
+from typing import Dict, Union, IO, Optional, Iterable, List
+
+import numpy as np
+import pandas as pd
+from pandas._libs.parsers import STR_NA_VALUES
+
+try:
+    import pyarrow
+    from pyarrow import csv as pa_csv
+    from pyarrow import ArrowInvalid
+except ImportError:
+    pyarrow = None
+
+    class ArrowInvalid(ValueError):
+        """Placeholder for the pyarrow parse error."""
+
+logger = logging.getLogger(__name__)
+
+
+# pandas.read_csv parameters with an equivalent in the pyarrow reader
+READ_CSV_PARAMS = {'sep', 'delimiter', 'quotechar', 'escapechar', 'doublequote', 'encoding',
+                   'usecols', 'na_values', 'keep_default_na'}
+
+
+def is_available() -> bool:
+    """Return whether pyarrow is installed."""
+    return pyarrow is not None
+
+
+def read_csv(source: Union[Path, IO],
+             dtype: Dict[str, str],
+             delimiter: str = ',',
+             quotechar: Optional[str] = '"',
+             escapechar: Optional[str] = None,
+             doublequote: bool = True,
+             encoding: str = 'utf-8',
+             na_values: Optional[Union[str, Iterable[str]]] = None,
+             keep_default_na: bool = True,
+             ) -> pd.DataFrame:
+    """
+    Parse a delimited text file with the multithreaded pyarrow reader.
+
+    Integer, float, boolean and categorical columns are converted by
+    pyarrow, into their nullable pandas dtype. All other columns are
+    returned as strings, with NaN for missing values, like the result
+    of pandas.read_csv with dtype 'object'. Missing values and the
+    order of categories also match pandas.read_csv. Any remaining cast
+    to the exact dtypes is left to the caller.
+
+    Parameters
+    ----------
+    source : pathlib.Path or file-like object
+        The (decompressed) file to parse, with a header row.
+    dtype : dict of {str : str}
+        pandas dtype by column name. Only these columns are read.
+    delimiter : str, default ','
+    quotechar : str, optional
+    escapechar : str, optional
+    doublequote : bool, default True
+    encoding : str, default 'utf-8'
+    na_values : str or list of str, optional
+        Additional strings to recognize as missing values.
+    keep_default_na : bool, default True
+        Whether to also recognize the default missing values of
+        pandas.read_csv.
+
+    Returns
+    -------
+    pandas.DataFrame
+
+    Raises
+    ------
+    ArrowInvalid
+        If the file cannot be parsed, e.g. if a row has fewer values
+        than the header or a value doesn't fit the column type.
+    """
+    if pyarrow is None:
+        raise ImportError('pyarrow is required for the pyarrow engine. '
+                          'Install it with: pip install delphyne[ARROW]')
+    read_options = pa_csv.ReadOptions(encoding=encoding)
+    parse_options = pa_csv.ParseOptions(
+        delimiter=delimiter,
+        quote_char=quotechar or False,
+        double_quote=doublequote,
+        escape_char=escapechar or False,
+    )
+    convert_options = pa_csv.ConvertOptions(
+        column_types={col: _get_arrow_type(col_dtype) for col, col_dtype in dtype.items()},
+        include_columns=list(dtype),
+        null_values=_get_null_values(na_values, keep_default_na),
+        strings_can_be_null=True,
+    )
+    table = pa_csv.read_csv(str(source) if isinstance(source, Path) else source,
+                            read_options=read_options,
+                            parse_options=parse_options,
+                            convert_options=convert_options)
+    df = table.to_pandas(types_mapper=_PANDAS_DTYPES.get)
+    # Missing strings are None, where read_csv would give NaN
+    str_cols = [col for col in df.columns if df[col].dtype == object]
+    df[str_cols] = df[str_cols].where(df[str_cols].notna(), np.nan)
+    # Categories are in order of appearance, read_csv sorts them
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].cat.reorder_categories(sorted(df[col].cat.categories))
+    return df
+
+
+def _get_null_values(na_values: Optional[Union[str, Iterable[str]]], keep_default_na: bool
+                     ) -> List[str]:
+    # The strings read_csv would recognize as missing values
+    if isinstance(na_values, str):
+        na_values = [na_values]
+    null_values = set(STR_NA_VALUES) if keep_default_na else set()
+    null_values.update(str(value) for value in na_values or [])
+    return sorted(null_values)
+
+
+def _get_arrow_type(dtype: str) -> 'pyarrow.DataType':
+    dtype = str(dtype)
+    if dtype.lower().startswith(('int', 'uint')):
+        return pyarrow.int64()
+    if dtype.startswith('float'):
+        return pyarrow.float64()
+    if dtype in ('bool', 'boolean'):
+        return pyarrow.bool_()
+    if dtype == 'category':
+        return pyarrow.dictionary(pyarrow.int32(), pyarrow.string())
+    return pyarrow.string()
+
+
+# Arrow types converted to nullable pandas dtypes, so missing values
+# don't turn integers into floats
+_PANDAS_DTYPES = {} if pyarrow is None else {
+    pyarrow.int64(): pd.Int64Dtype(),
+    pyarrow.bool_(): pd.BooleanDtype(),
+}
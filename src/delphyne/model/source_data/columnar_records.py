@@ -0,0 +1,202 @@
+"""Compact in-memory storage of csv records."""
+
+import sys
+from collections.abc import Mapping, Sequence
+from typing import Dict, List, Iterable, Iterator, Union, Optional, Any
+
+
+class ColumnarRecords(Sequence):
+    """
+    Read-only records stored per column.
+
+    A list of dictionaries repeats the keys for every row and holds a
+    separate string object for every value. Here the values are kept
+    in one list per column, and equal strings are stored only once, so
+    large lookup files take a fraction of the memory. Rows are exposed
+    as read-only mappings (RecordView), so code that indexes records
+    by column name works unchanged.
+
+    Parameters
+    ----------
+    columns : list of str
+        Names of the columns.
+    values : list of list
+        Values of each column, in the order of the columns.
+    """
+
+    def __init__(self, columns: List[str], values: List[List[Any]]):
+        if len(columns) != len(values):
+            raise ValueError(f'Got values for {len(values)} columns, expected {len(columns)}')
+        if len({len(column_values) for column_values in values}) > 1:
+            raise ValueError('All columns must have the same number of values')
+        self._columns = list(columns)
+        self._positions = {col: i for i, col in enumerate(self._columns)}
+        self._values = values
+        self._n_rows = len(values[0]) if values else 0
+        self._nbytes: Optional[int] = None
+
+    @classmethod
+    def from_records(cls, records: Iterable[Mapping]) -> 'ColumnarRecords':
+        """
+        Store records in columns.
+
+        The records are consumed one by one, so a generator of records
+        is never fully materialized as dictionaries.
+
+        Parameters
+        ----------
+        records : iterable of mappings
+            Records that all have the same keys, e.g. the rows of a
+            csv.DictReader.
+
+        Returns
+        -------
+        ColumnarRecords
+
+        Raises
+        ------
+        ValueError
+            If a record has different keys than the first record.
+        """
+        records = iter(records)
+        first = next(records, None)
+        if first is None:
+            return cls([], [])
+        columns = list(first.keys())
+        values = [[] for _ in columns]
+        appends = [column_values.append for column_values in values]
+        # Equal strings share a single object. A local pool is used
+        # instead of sys.intern, so it is released after loading.
+        pool: Dict[str, str] = {}
+        cls._append(first, columns, appends, pool, 0)
+        for row_nr, row in enumerate(records, start=1):
+            cls._append(row, columns, appends, pool, row_nr)
+        return cls(columns, values)
+
+    @staticmethod
+    def _append(row: Mapping, columns: List[str], appends: List, pool: Dict[str, str],
+                row_nr: int) -> None:
+        if len(row) != len(columns):
+            raise ValueError(f'Record {row_nr} has {len(row)} values, expected {len(columns)}')
+        try:
+            for col, append in zip(columns, appends):
+                value = row[col]
+                if isinstance(value, str):
+                    value = pool.setdefault(value, value)
+                append(value)
+        except KeyError as e:
+            raise ValueError(f'Record {row_nr} has no column {e}') from None
+
+    @property
+    def columns(self) -> List[str]:
+        """Read-only list of the column names."""
+        return list(self._columns)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory usage in bytes, counting shared values once."""
+        if self._nbytes is None:
+            seen = set()
+            n_bytes = sys.getsizeof(self) + sys.getsizeof(self._values)
+            for column_values in self._values:
+                n_bytes += sys.getsizeof(column_values)
+                for value in column_values:
+                    if id(value) not in seen:
+                        seen.add(id(value))
+                        n_bytes += sys.getsizeof(value)
+            self._nbytes = n_bytes
+        return self._nbytes
+
+    def __len__(self):
+        """Return the number of records."""
+        return self._n_rows
+
+    def __getitem__(self, index: Union[int, slice]) -> Union['RecordView', List['RecordView']]:
+        """Return a view of the record(s) at the index or slice."""
+        if isinstance(index, slice):
+            return [RecordView(self, i) for i in range(*index.indices(self._n_rows))]
+        if index < 0:
+            index += self._n_rows
+        if not 0 <= index < self._n_rows:
+            raise IndexError('record index out of range')
+        return RecordView(self, index)
+
+    def __iter__(self) -> Iterator['RecordView']:
+        """Iterate over views of the records."""
+        return (RecordView(self, i) for i in range(self._n_rows))
+
+    def __repr__(self):
+        """Return the number of records and the columns."""
+        return f'ColumnarRecords({self._n_rows} records, columns={self._columns})'
+
+    def get_value(self, index: int, column: str) -> Any:
+        """
+        Get a single value.
+
+        Parameters
+        ----------
+        index : int
+            Position of the record.
+        column : str
+            Name of the column.
+
+        Returns
+        -------
+        object
+        """
+        return self._values[self._positions[column]][index]
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """
+        Return the records as a list of dictionaries.
+
+        Returns
+        -------
+        list of dict
+        """
+        return [dict(zip(self._columns, row)) for row in zip(*self._values)]
+
+
+class RecordView(Mapping):
+    """
+    Read-only mapping of the values of a single record.
+
+    Parameters
+    ----------
+    records : ColumnarRecords
+        The records the record belongs to.
+    index : int
+        Position of the record.
+    """
+
+    __slots__ = ('_records', '_index')
+
+    def __init__(self, records: ColumnarRecords, index: int):
+        self._records = records
+        self._index = index
+
+    def __getitem__(self, column: str) -> Any:
+        """Return the value of a column."""
+        return self._records.get_value(self._index, column)
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the column names."""
+        return iter(self._records._columns)
+
+    def __len__(self):
+        """Return the number of columns."""
+        return len(self._records._columns)
+
+    def __repr__(self):
+        """Values by column name."""
+        return f'RecordView({dict(self)})'
+
+    def copy(self) -> Dict[str, Any]:
+        """
+        Return the values as a modifiable dictionary.
+
+        Returns
+        -------
+        dict
+        """
+        return dict(self)
@@ -0,0 +1,270 @@
+"""Incremental reading of append-only source files."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional, List, Generator, OrderedDict, Tuple, TYPE_CHECKING
+
+import pandas as pd
+
+from ...util.io import iter_records, find_last_line_end, get_range_line_count
+
+if TYPE_CHECKING:
+    from .source_file import SourceFile, DfFilter, RecordFilter
+
+logger = logging.getLogger(__name__)
+
+
+# Serializes the updates of the state files
+_STATE_LOCK = threading.Lock()
+
+
+class DeltaReader:
+    """
+    Reader of the rows appended to a source file since the last run.
+
+    For every name (e.g. a transformation), the byte offset and number
+    of rows processed are stored in a JSON state file. Used as a
+    context manager, the reader covers the complete rows between the
+    stored offset and the end of the file at the start of the block.
+    Only when the block exits without an exception, the new offset is
+    stored, so a failed run is repeated in full by the next run.
+
+    If the file was truncated or its header changed since the last
+    run, it is considered replaced and is read from the start.
+
+    Parameters
+    ----------
+    source_file : SourceFile
+        The (uncompressed) append-only delimited text file.
+    name : str
+        Name under which the progress is stored.
+    state_path : pathlib.Path
+        JSON file to store the progress in. Can be shared by multiple
+        names.
+    """
+
+    def __init__(self, source_file: SourceFile, name: str, state_path: Path):
+        self._source_file = source_file
+        self._name = name
+        self._state_path = state_path
+        self._start_offset: Optional[int] = None
+        self._end_offset: Optional[int] = None
+        self._start_line = 0
+        self._n_rows: Optional[int] = None
+        self._header_checksum: Optional[str] = None
+
+    def __enter__(self):
+        """Determine the appended rows."""
+        self._open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Store the progress if no exception occurred."""
+        if exc_type is None:
+            self.commit()
+        else:
+            logger.warning(f'Not storing the progress of {self._name} in '
+                           f'{self._source_file.path.name}, as an error occurred')
+        self._end_offset = None
+
+    @property
+    def name(self) -> str:
+        """Read-only name under which the progress is stored."""
+        return self._name
+
+    @property
+    def state_path(self) -> Path:
+        """Read-only state file path."""
+        return self._state_path
+
+    @property
+    def start_offset(self) -> int:
+        """Byte offset of the first appended row."""
+        self._check_open()
+        return self._start_offset
+
+    @property
+    def end_offset(self) -> int:
+        """Byte offset directly after the last appended row."""
+        self._check_open()
+        return self._end_offset
+
+    @property
+    def start_line(self) -> int:
+        """Number of rows processed in previous runs."""
+        self._check_open()
+        return self._start_line
+
+    @property
+    def n_rows(self) -> int:
+        """Number of appended rows."""
+        self._check_open()
+        if self._n_rows is None:
+            params = self._source_file.config
+            self._n_rows = get_range_line_count(
+                self._source_file.path, self._start_offset, self._end_offset,
+                quoted_newlines=params.get('quoted_newlines', False),
+                quotechar=params.get('quotechar') or '"',
+            )
+        return self._n_rows
+
+    def _check_open(self) -> None:
+        if self._end_offset is None:
+            raise ValueError('DeltaReader can only be used as a context manager')
+
+    def _open(self) -> None:
+        path = self._source_file.path
+        if self._source_file.compression is not None:
+            raise ValueError(f'Cannot read appended rows of compressed file {path.name}')
+        data_offset, self._header_checksum = self._read_header()
+        state = self._read_state().get(self._name)
+        size = path.stat().st_size
+        if state is None:
+            self._start_offset, self._start_line = data_offset, 0
+        elif (state['offset'] > size or state['offset'] < data_offset
+              or state.get('header_checksum') != self._header_checksum):
+            logger.warning(f'{path.name} was replaced since the last run of {self._name}, '
+                           f'reading it from the start')
+            self._start_offset, self._start_line = data_offset, 0
+        else:
+            self._start_offset, self._start_line = state['offset'], state['line_count']
+        # A row that is still being written is left for the next run
+        self._end_offset = find_last_line_end(path, self._start_offset, size)
+        self._n_rows = None
+        logger.info(f'Reading {self._end_offset - self._start_offset} appended bytes of '
+                    f'{path.name} for {self._name}')
+
+    def _read_header(self) -> Tuple[int, Optional[str]]:
+        # Offset of the first row and checksum of the header row
+        params = self._source_file.config
+        if params.get('fieldnames'):
+            return 0, None
+        with self._source_file.path.open('rb') as f:
+            header = next(iter_records(f, params.get('quotechar') or '"'), None)
+        if header is None:
+            return 0, None
+        _, header_record = header
+        return len(header_record), hashlib.md5(header_record).hexdigest()
+
+    def _read_state(self) -> Dict[str, Dict]:
+        if not self._state_path.exists():
+            return {}
+        with self._state_path.open('r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def commit(self) -> None:
+        """
+        Store the end of the appended rows as processed.
+
+        Called automatically when the with block exits without an
+        exception.
+
+        Returns
+        -------
+        None
+        """
+        self._check_open()
+        state = {
+            'offset': self._end_offset,
+            'line_count': self._start_line + self.n_rows,
+            'header_checksum': self._header_checksum,
+        }
+        with _STATE_LOCK:
+            states = self._read_state()
+            states[self._name] = state
+            tmp_path = self._state_path.with_name(self._state_path.name + '.tmp')
+            with tmp_path.open('w', encoding='utf-8') as f:
+                json.dump(states, f, indent=2, sort_keys=True)
+            os.replace(str(tmp_path), str(self._state_path))
+        logger.info(f'Processed {state["line_count"]} rows of {self._source_file.path.name} '
+                    f'for {self._name}')
+
+    def iter_csv_as_df(self,
+                       apply_dtypes: bool,
+                       chunksize: Optional[int] = None,
+                       columns: Optional[List[str]] = None,
+                       row_filter: Optional[DfFilter] = None,
+                       **kwargs
+                       ) -> Generator[pd.DataFrame, None, None]:
+        """
+        Return the appended rows as a generator of DataFrames.
+
+        The index continues the row numbers of previous runs. See
+        SourceFile.iter_csv_as_df for the parameters.
+
+        Yields
+        ------
+        pandas.DataFrame
+        """
+        self._check_open()
+        yield from self._source_file._iter_csv_byte_range(
+            self._start_offset, self._end_offset, self._start_line, apply_dtypes,
+            chunksize, columns, row_filter, **kwargs)
+
+    def get_csv_as_df(self,
+                      apply_dtypes: bool,
+                      columns: Optional[List[str]] = None,
+                      row_filter: Optional[DfFilter] = None,
+                      **kwargs
+                      ) -> pd.DataFrame:
+        """
+        Return the appended rows as a DataFrame.
+
+        The index continues the row numbers of previous runs. See
+        SourceFile.get_csv_as_df for the parameters.
+
+        Returns
+        -------
+        pandas.DataFrame
+        """
+        # Imported here, as source_file imports this module
+        from .source_file import concat_chunks
+        chunks = list(self.iter_csv_as_df(apply_dtypes, columns=columns,
+                                          row_filter=row_filter, **kwargs))
+        df = concat_chunks(chunks)
+        df.index = chunks[0].index.append([chunk.index for chunk in chunks[1:]])
+        return df
+
+    def get_csv_as_generator_of_dicts(self,
+                                      columns: Optional[List[str]] = None,
+                                      row_filter: Optional[RecordFilter] = None,
+                                      **kwargs
+                                      ) -> Generator[OrderedDict, None, None]:
+        """
+        Return the appended rows as a generator of dictionaries.
+
+        See SourceFile.get_csv_as_generator_of_dicts for the
+        parameters.
+
+        Returns
+        -------
+        OrderedDict generator
+        """
+        self._check_open()
+        yield from self._source_file._read_csv_records(
+            columns, row_filter, byte_range=(self._start_offset, self._end_offset), **kwargs)
+
+
+def get_delta_state_path(directory: Path, source_path: Path) -> Path:
+    """
+    Get the default delta state file path of a source file.
+
+    Parameters
+    ----------
+    directory : pathlib.Path
+        Directory to store the state file in.
+    source_path : pathlib.Path
+        The append-only source file.
+
+    Returns
+    -------
+    pathlib.Path
+        Hidden file, so it is not picked up as a source file itself.
+    """
+    return directory / f'.{source_path.name}.delta.json'
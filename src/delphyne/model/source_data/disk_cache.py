@@ -0,0 +1,169 @@
+"""On-disk DataFrame cache module."""
+
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Optional, Dict, Any
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow
+    from pyarrow import feather
+except ImportError:
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+
+class DiskCache:
+    """
+    Columnar on-disk storage of DataFrames parsed from source files.
+
+    DataFrames are stored in the Arrow IPC (Feather v2) format, which
+    is read memory-mapped, so repeat runs can skip parsing the original
+    source files. Requires pyarrow to be installed.
+
+    Parameters
+    ----------
+    cache_dir : pathlib.Path
+        Directory to store the cached DataFrames in. Will be created if
+        not present.
+    """
+
+    def __init__(self, cache_dir: Path):
+        if pyarrow is None:
+            raise ImportError('pyarrow is required for caching source data on disk. '
+                              'Install it with: pip install delphyne[ARROW]')
+        self._cache_dir = cache_dir
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def cache_dir(self) -> Path:
+        """Read-only cache dir property."""
+        return self._cache_dir
+
+    @staticmethod
+    def make_key(read_params: Dict[str, Any]) -> str:
+        """
+        Create a cache key for the parameters used to read a file.
+
+        Parameters
+        ----------
+        read_params : dict
+            All parameters that affect the resulting DataFrame, e.g.
+            the read function kwargs and dtypes.
+
+        Returns
+        -------
+        str
+            Hexadecimal cache key.
+        """
+        serialized = json.dumps(read_params, sort_keys=True, default=repr)
+        return _hash_str(serialized)
+
+    @staticmethod
+    def _get_file_version(source_path: Path) -> str:
+        # Changes whenever the source file is modified
+        stat = source_path.stat()
+        return _hash_str(f'{stat.st_size}_{stat.st_mtime_ns}')
+
+    def _get_cache_path(self, source_path: Path, key: str) -> Path:
+        version = self._get_file_version(source_path)
+        return self._cache_dir / f'{source_path.name}.{version}.{key}.arrow'
+
+    def get(self, source_path: Path, key: str) -> Optional[pd.DataFrame]:
+        """
+        Load a cached DataFrame.
+
+        Parameters
+        ----------
+        source_path : pathlib.Path
+            The source file the DataFrame was read from.
+        key : str
+            Cache key as created via make_key.
+
+        Returns
+        -------
+        pandas.DataFrame or None
+            None if no DataFrame was cached under this key.
+        """
+        cache_path = self._get_cache_path(source_path, key)
+        if not cache_path.exists():
+            return None
+        logger.info(f'Reading {source_path.name} DataFrame from disk cache')
+        table = feather.read_table(cache_path, memory_map=True)
+        df = table.to_pandas()
+        # Arrow converts missing values in object columns to None,
+        # restore them as NaN like pandas' own readers
+        object_cols = df.columns[df.dtypes == object]
+        if len(object_cols) > 0:
+            df[object_cols] = df[object_cols].where(df[object_cols].notna(), np.nan)
+        return df
+
+    def put(self, source_path: Path, key: str, df: pd.DataFrame) -> None:
+        """
+        Store a DataFrame in the cache.
+
+        Any cached DataFrames of previous versions of the source file
+        are removed.
+
+        Parameters
+        ----------
+        source_path : pathlib.Path
+            The source file the DataFrame was read from.
+        key : str
+            Cache key as created via make_key.
+        df : pandas.DataFrame
+            The DataFrame to store.
+
+        Returns
+        -------
+        None
+        """
+        logger.info(f'Writing {source_path.name} DataFrame to disk cache')
+        version = self._get_file_version(source_path)
+        self.remove(source_path, keep_version=version)
+        cache_path = self._get_cache_path(source_path, key)
+        # Write to a temporary file first, so an interrupted write
+        # never leaves a corrupt cache file behind
+        tmp_path = cache_path.with_name(cache_path.name + '.tmp')
+        try:
+            feather.write_feather(pyarrow.Table.from_pandas(df), str(tmp_path))
+        except (pyarrow.ArrowException, TypeError, ValueError) as e:
+            logger.warning(f'Could not write {source_path.name} DataFrame to disk cache: {e}')
+            if tmp_path.exists():
+                tmp_path.unlink()
+            return
+        os.replace(tmp_path, cache_path)
+
+    def remove(self, source_path: Path, keep_version: Optional[str] = None) -> None:
+        """
+        Remove cached DataFrames of a source file.
+
+        Parameters
+        ----------
+        source_path : pathlib.Path
+            The source file to remove the cached DataFrames of.
+        keep_version : str, optional
+            If provided, keep the cached DataFrames of this version of
+            the source file.
+
+        Returns
+        -------
+        None
+        """
+        name_regex = re.compile(re.escape(source_path.name) + r'\.([0-9a-f]{32})\.\w+\.arrow')
+        for cache_path in self._cache_dir.glob(f'{glob.escape(source_path.name)}.*.arrow'):
+            match = name_regex.fullmatch(cache_path.name)
+            if match and match.group(1) != keep_version:
+                cache_path.unlink()
+
+
+def _hash_str(value: str) -> str:
+    return hashlib.blake2b(value.encode('utf-8'), digest_size=16).hexdigest()
@@ -0,0 +1,129 @@
+"""Source data dtype profiling module."""
+
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_SAMPLE_ROWS = 100000
+
+# Strings are proposed as category if the number of distinct values is
+# at most this fraction of the non-missing values
+_MAX_CATEGORY_RATIO = 0.5
+
+_BOOL_VALUES = {'true', 'false'}
+
+# Nullable integer dtypes, from small to large
+_INT_DTYPES = ['Int8', 'Int16', 'Int32', 'Int64']
+
+# Numeric codes with leading zeros (e.g. '007') would lose them
+_LEADING_ZERO_REGEX = re.compile(r'^[+-]?0\d')
+
+
+@dataclass
+class DtypeProfile:
+    """Dtypes proposed for a source file and their memory usage."""
+
+    source_name: str
+    dtypes: Dict[str, str] = field(default_factory=dict)
+    n_sample_rows: int = 0
+    # Whether the sample holds all rows of the file
+    complete: bool = True
+    object_bytes: int = 0
+    profiled_bytes: int = 0
+
+    def __str__(self):
+        """Return name and memory usage of the sample."""
+        return (f'{self.source_name}: {self.object_bytes} -> {self.profiled_bytes} bytes '
+                f'for {self.n_sample_rows} rows ({self.savings:.0%} saved)')
+
+    @property
+    def savings(self) -> float:
+        """Fraction of memory saved by applying the proposed dtypes."""
+        if not self.object_bytes:
+            return 0.0
+        return 1 - self.profiled_bytes / self.object_bytes
+
+
+def propose_dtypes(df: pd.DataFrame, complete: bool = True) -> Dict[str, str]:
+    """
+    Propose compact dtypes for the columns of a DataFrame.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Sample of a source file, with all columns as 'object' dtype.
+    complete : bool, default True
+        Whether the sample holds all rows of the file, see
+        propose_dtype.
+
+    Returns
+    -------
+    dict of {str : str}
+        Proposed dtype by column name, see propose_dtype.
+    """
+    return {col: propose_dtype(df[col], complete) for col in df.columns}
+
+
+def propose_dtype(values: pd.Series, complete: bool = True) -> str:
+    """
+    Propose the most compact dtype that can hold all string values.
+
+    In order of preference: 'boolean', the smallest nullable integer
+    dtype, 'float64', 'datetime64[ns]' and 'category' (for strings
+    with few distinct values). Otherwise 'object'.
+
+    Parameters
+    ----------
+    values : pandas.Series
+        String values, missing values are ignored.
+    complete : bool, default True
+        Whether the values are all values of the column. If False,
+        integers are always proposed as 'Int64', as the values that
+        were not sampled may not fit a smaller integer dtype.
+
+    Returns
+    -------
+    str
+    """
+    values = values.dropna().astype(str).str.strip()
+    if values.empty:
+        return 'object'
+    if values.str.lower().isin(_BOOL_VALUES).all():
+        return 'boolean'
+
+    numbers = pd.to_numeric(values, errors='coerce')
+    if numbers.notna().all() and not values.str.match(_LEADING_ZERO_REGEX).any():
+        if (numbers == np.floor(numbers)).all():
+            int_dtype = _get_int_dtype(numbers.min(), numbers.max(), complete)
+            if int_dtype is not None:
+                return int_dtype
+        return 'float64'
+
+    if numbers.isna().all() and _are_dates(values):
+        return 'datetime64[ns]'
+    if values.nunique() <= _MAX_CATEGORY_RATIO * len(values):
+        return 'category'
+    return 'object'
+
+
+def _get_int_dtype(min_value: float, max_value: float, complete: bool) -> Optional[str]:
+    for dtype in _INT_DTYPES if complete else _INT_DTYPES[-1:]:
+        info = np.iinfo(dtype.lower())
+        if info.min <= min_value and max_value <= info.max:
+            return dtype
+    return None
+
+
+def _are_dates(values: pd.Series) -> bool:
+    try:
+        dates = pd.to_datetime(values, errors='coerce', infer_datetime_format=True)
+    except (ValueError, TypeError, OverflowError):
+        return False
+    return bool(dates.notna().all())
@@ -0,0 +1,303 @@
+"""Source file key index module."""
+
+import csv
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from itertools import islice
+from pathlib import Path
+from typing import Dict, List, Optional, Union, Tuple, Iterable, BinaryIO
+
+from ...util.io import iter_records
+
+logger = logging.getLogger(__name__)
+
+
+_INSERT_BATCH_SIZE = 100000
+
+# Separates the values of composite keys
+_KEY_SEPARATOR = '\x1f'
+
+Key = Union[str, Tuple[str, ...]]
+
+
+class FileIndex:
+    """
+    Persistent index of the records of a delimited text file by key.
+
+    The byte offsets of the records are stored per key in an SQLite
+    side file, so the rows matching a key can be read by seeking to
+    them, without loading the source file in memory. The index is
+    considered outdated as soon as the source file is modified. This
+    is checked on every lookup, so the index must be rebuilt after the
+    source file changes.
+
+    Parameters
+    ----------
+    source_path : pathlib.Path
+        The (uncompressed) delimited text file to index.
+    index_path : pathlib.Path
+        File to store the index in.
+    key_columns : list of str
+        Names of the columns that together form the key.
+    encoding : str
+        Encoding of the source file.
+    fieldnames : list of str, optional
+        Column names, if the file has no header row.
+    restkey : str, optional
+        Key of the list of values beyond the fieldnames, like in the
+        csv module's DictReader.
+    restval : str, optional
+        Value of the fieldnames missing in a record, like in the csv
+        module's DictReader.
+    **dialect_params
+        csv module dialect parameters, e.g. delimiter and quotechar.
+    """
+
+    def __init__(self,
+                 source_path: Path,
+                 index_path: Path,
+                 key_columns: List[str],
+                 encoding: str,
+                 fieldnames: Optional[List[str]] = None,
+                 restkey: Optional[str] = None,
+                 restval: Optional[str] = None,
+                 **dialect_params
+                 ):
+        self._source_path = source_path
+        self._index_path = index_path
+        self._key_columns = list(key_columns)
+        self._encoding = encoding
+        self._fieldnames = fieldnames
+        self._restkey = restkey
+        self._restval = restval
+        self._dialect_params = dialect_params
+        self._quotechar = dialect_params.get('quotechar') or '"'
+
+        self._conn: Optional[sqlite3.Connection] = None
+        self._file: Optional[BinaryIO] = None
+        self._version: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        """Return the index itself."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Close the index."""
+        self.close()
+
+    @property
+    def index_path(self) -> Path:
+        """Read-only index file path."""
+        return self._index_path
+
+    @property
+    def key_columns(self) -> List[str]:
+        """Read-only copy of the key columns."""
+        return list(self._key_columns)
+
+    def _get_file_version(self) -> str:
+        stat = self._source_path.stat()
+        return f'{stat.st_size}_{stat.st_mtime_ns}'
+
+    def _get_meta(self) -> Dict[str, str]:
+        return {
+            'version': self._get_file_version(),
+            'key_columns': json.dumps(self._key_columns),
+            'dialect': json.dumps(self._dialect_params, sort_keys=True, default=repr),
+        }
+
+    def is_current(self) -> bool:
+        """
+        Check whether the index is up to date with the source file.
+
+        Returns
+        -------
+        bool
+            True if the index exists and the source file was not
+            modified since it was built.
+        """
+        if not self._index_path.exists():
+            return False
+        try:
+            with sqlite3.connect(str(self._index_path)) as conn:
+                stored = dict(conn.execute('SELECT name, value FROM meta'))
+        except sqlite3.DatabaseError:
+            return False
+        meta = self._get_meta()
+        return all(stored.get(name) == value for name, value in meta.items())
+
+    def build(self) -> None:
+        """
+        Build the index by scanning the entire source file.
+
+        Returns
+        -------
+        None
+        """
+        logger.info(f'Building index on {", ".join(self._key_columns)} '
+                    f'of {self._source_path.name}')
+        self.close()
+        meta = self._get_meta()
+        # Write to a temporary file first, so an interrupted build
+        # never leaves an incomplete index behind
+        tmp_path = self._index_path.with_name(self._index_path.name + '.tmp')
+        if tmp_path.exists():
+            tmp_path.unlink()
+        conn = sqlite3.connect(str(tmp_path))
+        try:
+            conn.execute('CREATE TABLE meta (name TEXT PRIMARY KEY, value TEXT)')
+            conn.execute('CREATE TABLE record_offsets (key TEXT NOT NULL, '
+                         'offset INTEGER NOT NULL)')
+            with self._source_path.open('rb') as f:
+                fieldnames = self._read_fieldnames(f)
+                meta['fieldnames'] = json.dumps(fieldnames)
+                entries = self._iter_key_offsets(f, fieldnames)
+                batch = list(islice(entries, _INSERT_BATCH_SIZE))
+                while batch:
+                    conn.executemany('INSERT INTO record_offsets VALUES (?, ?)', batch)
+                    batch = list(islice(entries, _INSERT_BATCH_SIZE))
+            # Creating the index after inserting is much faster
+            conn.execute('CREATE INDEX idx_record_offsets_key ON record_offsets (key)')
+            conn.executemany('INSERT INTO meta VALUES (?, ?)', meta.items())
+            conn.commit()
+        finally:
+            conn.close()
+        os.replace(tmp_path, self._index_path)
+
+    def _read_fieldnames(self, f: BinaryIO) -> List[str]:
+        if self._fieldnames is not None:
+            return list(self._fieldnames)
+        for _, record in iter_records(f, self._quotechar):
+            header = self._parse_record(record)
+            if header:
+                return header
+        return []
+
+    def _iter_key_offsets(self, f: BinaryIO, fieldnames: List[str]
+                          ) -> Iterable[Tuple[str, int]]:
+        missing = set(self._key_columns).difference(fieldnames)
+        if missing:
+            raise ValueError(f'Columns not found in {self._source_path.name}: '
+                             f'{", ".join(sorted(missing))}')
+        key_indexes = [fieldnames.index(col) for col in self._key_columns]
+
+        # csv.reader consumes exactly one record per row it yields,
+        # so the last offset read belongs to the current row
+        current = {}
+
+        def decoded_records():
+            for offset, record in iter_records(f, self._quotechar):
+                current['offset'] = offset
+                yield record.decode(self._encoding)
+
+        for row in csv.reader(decoded_records(), **self._dialect_params):
+            if not row:  # Like DictReader, skip empty rows
+                continue
+            values = (row[i] if i < len(row) else '' for i in key_indexes)
+            yield _KEY_SEPARATOR.join(values), current['offset']
+
+    def _parse_record(self, record: bytes) -> List[str]:
+        return next(csv.reader([record.decode(self._encoding)], **self._dialect_params))
+
+    def _open(self) -> None:
+        if self._conn is not None:
+            # The offsets are only valid for the indexed file version
+            if self._get_file_version() == self._version:
+                return
+            self.close()
+        if not self.is_current():
+            raise ValueError(f'Index on {", ".join(self._key_columns)} of '
+                             f'{self._source_path.name} is missing or outdated')
+        self._conn = sqlite3.connect(str(self._index_path), check_same_thread=False)
+        stored = dict(self._conn.execute('SELECT name, value FROM meta'))
+        self._fieldnames = json.loads(stored['fieldnames'])
+        self._version = stored['version']
+        self._file = self._source_path.open('rb')
+
+    def lookup(self, key: Key) -> List[Dict[str, str]]:
+        """
+        Get all records matching a key.
+
+        Parameters
+        ----------
+        key : str or tuple of str
+            The key value, or a tuple of values in case of multiple key
+            columns. Values are compared as they appear in the file.
+
+        Returns
+        -------
+        list of dict
+            The matching records in file order, as returned by the
+            csv module's DictReader.
+
+        Raises
+        ------
+        ValueError
+            If the index is missing, or the source file was modified
+            since the index was built.
+        """
+        if isinstance(key, str):
+            key = (key,)
+        if len(key) != len(self._key_columns):
+            raise ValueError(f'Expected {len(self._key_columns)} key values, got {len(key)}')
+        with self._lock:
+            self._open()
+            offsets = [offset for offset, in self._conn.execute(
+                'SELECT offset FROM record_offsets WHERE key = ? ORDER BY offset',
+                (_KEY_SEPARATOR.join(key),))]
+            records = []
+            for offset in offsets:
+                self._file.seek(offset)
+                _, record = next(iter_records(self._file, self._quotechar))
+                records.append(record)
+        return [self._parse_dict_record(record) for record in records]
+
+    def _parse_dict_record(self, record: bytes) -> Dict[str, str]:
+        reader = csv.DictReader([record.decode(self._encoding)], fieldnames=self._fieldnames,
+                                restkey=self._restkey, restval=self._restval,
+                                **self._dialect_params)
+        return next(reader)
+
+    def close(self) -> None:
+        """
+        Close the index and the source file.
+
+        Returns
+        -------
+        None
+        """
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._version = None
+
+
+def get_index_path(directory: Path, source_path: Path, key_columns: List[str]) -> Path:
+    """
+    Get the default index file path of a source file.
+
+    Parameters
+    ----------
+    directory : pathlib.Path
+        Directory to store the index file in.
+    source_path : pathlib.Path
+        The indexed source file.
+    key_columns : list of str
+        Names of the key columns of the index.
+
+    Returns
+    -------
+    pathlib.Path
+        Hidden file, so it is not picked up as a source file itself.
+    """
+    key_hash = hashlib.blake2b(json.dumps(key_columns).encode('utf-8'),
+                               digest_size=8).hexdigest()
+    return directory / f'.{source_path.name}.{key_hash}.idx'
@@ -0,0 +1,195 @@
+"""In-memory source data cache module."""
+
+import logging
+import sys
+import threading
+from collections import OrderedDict
+from typing import Optional, Hashable, Any, Tuple
+
+import pandas as pd
+
+from .columnar_records import ColumnarRecords
+from ..etl_stats import etl_stats
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryCache:
+    """
+    In-memory cache of source data, shared by all source files.
+
+    When the total size of the cached objects exceeds the memory
+    budget, the least recently used objects are evicted. Hits, misses
+    and evictions are recorded in the etl_stats.
+
+    Parameters
+    ----------
+    max_bytes : int, optional
+        Memory budget of the cache in bytes. If not provided, the cache
+        size is unlimited.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        self._max_bytes = max_bytes
+        self._entries: 'OrderedDict[Hashable, Tuple[Any, int]]' = OrderedDict()
+        self._n_bytes = 0
+        self._lock = threading.RLock()
+
+    @property
+    def max_bytes(self) -> Optional[int]:
+        """Read-only memory budget property."""
+        return self._max_bytes
+
+    @property
+    def n_bytes(self) -> int:
+        """Total size of the currently cached objects in bytes."""
+        return self._n_bytes
+
+    def __len__(self):
+        """Return the number of cached objects."""
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable):
+        """Return True if an object is cached under this key."""
+        return key in self._entries
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """
+        Get a cached object, without counting it as a cache access.
+
+        Parameters
+        ----------
+        key : hashable
+            Key the object was cached under.
+
+        Returns
+        -------
+        object or None
+            None if no object is cached under this key.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry[0] if entry is not None else None
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Get a cached object and mark it as most recently used.
+
+        Parameters
+        ----------
+        key : hashable
+            Key the object was cached under.
+
+        Returns
+        -------
+        object or None
+            None if no object is cached under this key.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                etl_stats.add_cache_counts(misses=1)
+                return None
+            self._entries.move_to_end(key)
+        etl_stats.add_cache_counts(hits=1)
+        return entry[0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Cache an object, replacing any object cached under the same key.
+
+        Least recently used objects are evicted until the cache fits
+        within the memory budget. Objects larger than the entire budget
+        are not cached.
+
+        Parameters
+        ----------
+        key : hashable
+            Key to cache the object under.
+        value : pandas.DataFrame, list of dict or ColumnarRecords
+            The object to cache.
+
+        Returns
+        -------
+        None
+        """
+        size = get_size(value)
+        with self._lock:
+            self._remove(key)
+            if self._max_bytes is not None and size > self._max_bytes:
+                logger.warning(f'Not caching {key}: its size ({size} bytes) exceeds '
+                               f'the cache memory limit ({self._max_bytes} bytes)')
+                return
+            self._entries[key] = (value, size)
+            self._n_bytes += size
+            self._evict()
+
+    def remove(self, key: Hashable) -> None:
+        """
+        Remove the object cached under a key, if any.
+
+        Parameters
+        ----------
+        key : hashable
+            Key the object was cached under.
+
+        Returns
+        -------
+        None
+        """
+        with self._lock:
+            self._remove(key)
+
+    def clear(self) -> None:
+        """
+        Remove all cached objects.
+
+        Returns
+        -------
+        None
+        """
+        with self._lock:
+            self._entries.clear()
+            self._n_bytes = 0
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._n_bytes -= entry[1]
+
+    def _evict(self) -> None:
+        if self._max_bytes is None:
+            return
+        while self._n_bytes > self._max_bytes:
+            key, (_, size) = self._entries.popitem(last=False)
+            self._n_bytes -= size
+            logger.info(f'Evicted {key} from the source data cache ({size} bytes)')
+            etl_stats.add_cache_counts(evictions=1)
+
+
+def get_size(value: Any) -> int:
+    """
+    Get the memory usage of a cached object.
+
+    Parameters
+    ----------
+    value : pandas.DataFrame, list of dict or ColumnarRecords
+        The object to get the size of.
+
+    Returns
+    -------
+    int
+        Size in bytes, including the contents of object columns or
+        dictionary values.
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True, index=True).sum())
+    if isinstance(value, ColumnarRecords):
+        return value.nbytes
+    if isinstance(value, list):
+        # Dictionary keys are shared between all rows of a file, so
+        # only the values are counted
+        return sys.getsizeof(value) + sum(
+            sys.getsizeof(row) + sum(sys.getsizeof(v) for v in row.values())
+            for row in value)
+    return sys.getsizeof(value)
@@ -0,0 +1,148 @@
+"""Streaming sort and merge join module."""
+
+import heapq
+import logging
+import pickle
+import tempfile
+from contextlib import ExitStack
+from itertools import groupby, islice
+from pathlib import Path
+from typing import Iterable, Iterator, Callable, Tuple, List, Optional, Any, BinaryIO
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_MAX_ROWS_IN_MEMORY = 1000000
+
+# Number of rows pickled at once when spilling to disk
+_SPILL_BATCH_SIZE = 10000
+
+_JOIN_TYPES = {'inner', 'left', 'right', 'outer'}
+
+KeyFunc = Callable[[Tuple], Any]
+
+
+def external_sort(rows: Iterable[Tuple],
+                  key: KeyFunc,
+                  max_rows_in_memory: int = DEFAULT_MAX_ROWS_IN_MEMORY,
+                  tmp_dir: Optional[Path] = None,
+                  ) -> Iterator[Tuple]:
+    """
+    Sort rows in bounded memory.
+
+    The rows are sorted in runs of max_rows_in_memory rows. If there
+    is more than one run, the runs are spilled to temporary files and
+    lazily merged. The files are removed once the returned iterator is
+    exhausted or closed.
+
+    Parameters
+    ----------
+    rows : iterable of tuple
+        The rows to sort. Must be picklable.
+    key : callable
+        Function returning the sort key of a row.
+    max_rows_in_memory : int, default 1000000
+        Maximum number of rows per sorted run.
+    tmp_dir : pathlib.Path, optional
+        Directory to spill the sorted runs to. Defaults to the system
+        temp dir.
+
+    Yields
+    ------
+    tuple
+        The rows in key order. The sort is stable.
+    """
+    rows = iter(rows)
+    run = sorted(islice(rows, max_rows_in_memory), key=key)
+    if len(run) < max_rows_in_memory:
+        yield from run
+        return
+
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as spill_dir, ExitStack() as stack:
+        run_files = []
+        while run:
+            run_path = Path(spill_dir) / f'run_{len(run_files)}.pickle'
+            _write_run(run, run_path)
+            run_files.append(stack.enter_context(run_path.open('rb')))
+            run = sorted(islice(rows, max_rows_in_memory), key=key)
+        logger.info(f'Merging {len(run_files)} sorted runs')
+        yield from heapq.merge(*(_read_run(f) for f in run_files), key=key)
+
+
+def _write_run(run: List[Tuple], run_path: Path) -> None:
+    with run_path.open('wb') as f:
+        for i in range(0, len(run), _SPILL_BATCH_SIZE):
+            pickle.dump(run[i:i + _SPILL_BATCH_SIZE], f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _read_run(f: BinaryIO) -> Iterator[Tuple]:
+    while True:
+        try:
+            batch = pickle.load(f)
+        except EOFError:
+            return
+        yield from batch
+
+
+def merge_join(left: Iterable[Tuple],
+               right: Iterable[Tuple],
+               left_key: KeyFunc,
+               right_key: KeyFunc,
+               how: str = 'inner',
+               ) -> Iterator[Tuple[Optional[Tuple], Optional[Tuple]]]:
+    """
+    Join two iterables of rows that are sorted by key.
+
+    Only the rows of a single key are kept in memory at a time.
+
+    Parameters
+    ----------
+    left : iterable of tuple
+        Left rows, sorted by left_key.
+    right : iterable of tuple
+        Right rows, sorted by right_key.
+    left_key : callable
+        Function returning the join key of a left row.
+    right_key : callable
+        Function returning the join key of a right row.
+    how : {'inner', 'left', 'right', 'outer'}, default 'inner'
+        Type of join, as in pandas.merge.
+
+    Yields
+    ------
+    tuple of (tuple or None, tuple or None)
+        Pairs of matching left and right rows. For unmatched rows of
+        left, right or outer joins, the other side is None.
+    """
+    if how not in _JOIN_TYPES:
+        raise ValueError(f'Invalid join type: {how}')
+    keep_left = how in ('left', 'outer')
+    keep_right = how in ('right', 'outer')
+
+    left_groups = groupby(left, key=left_key)
+    right_groups = groupby(right, key=right_key)
+    left_group = next(left_groups, None)
+    right_group = next(right_groups, None)
+    while left_group is not None and right_group is not None:
+        (l_key, l_rows), (r_key, r_rows) = left_group, right_group
+        if l_key < r_key:
+            if keep_left:
+                yield from ((row, None) for row in l_rows)
+            left_group = next(left_groups, None)
+        elif r_key < l_key:
+            if keep_right:
+                yield from ((None, row) for row in r_rows)
+            right_group = next(right_groups, None)
+        else:
+            r_rows = list(r_rows)
+            for l_row in l_rows:
+                yield from ((l_row, r_row) for r_row in r_rows)
+            left_group = next(left_groups, None)
+            right_group = next(right_groups, None)
+
+    if keep_left and left_group is not None:
+        yield from ((row, None) for row in left_group[1])
+        yield from ((row, None) for _, rows in left_groups for row in rows)
+    if keep_right and right_group is not None:
+        yield from ((None, row) for row in right_group[1])
+        yield from ((None, row) for _, rows in right_groups for row in rows)
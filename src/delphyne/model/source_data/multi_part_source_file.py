@@ -0,0 +1,267 @@
+"""Multi-part source dataset module."""
+
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import (Dict, Optional, List, Generator, Callable, Union, Tuple, OrderedDict,
+                    Any)
+
+import pandas as pd
+
+from .delta_reader import DeltaReader
+from .disk_cache import DiskCache
+from .file_index import FileIndex, Key
+from .memory_cache import MemoryCache
+from .source_file import (SourceFile, DfFilter, RecordFilter, TupleFilter, concat_chunks,
+                          DEFAULT_CHUNKSIZE, PREFETCH_BATCH_SIZE)
+from ...util import helper
+
+logger = logging.getLogger(__name__)
+
+
+_DEFAULT_MAX_WORKERS = 4
+
+
+class MultiPartSourceFile(SourceFile):
+    """
+    Source dataset delivered as multiple partitioned files.
+
+    Offers the same ways of reading data as SourceFile, treating the
+    parts as a single file. DataFrames are read from the parts in
+    parallel, while the streaming readers read the parts one after
+    another, in order of their file names. The parts should all have
+    the same columns, and a header row if applicable.
+
+    Parameters
+    ----------
+    name : str
+        Name of the dataset.
+    part_paths : list of pathlib.Path
+        Paths of the files the dataset consists of.
+    params : dict
+        Config options describing the properties of the parts, e.g.
+        the glob pattern matching the parts, and max_workers, the
+        number of parts to read in parallel (default 4).
+    disk_cache : DiskCache, optional
+        If provided, DataFrames read from the parts are stored on disk
+        and reused in later runs.
+    memory_cache : MemoryCache, optional
+        Cache to keep data in memory for future use.
+    """
+
+    def __init__(self,
+                 name: str,
+                 part_paths: List[Path],
+                 params: Dict,
+                 disk_cache: Optional[DiskCache] = None,
+                 memory_cache: Optional[MemoryCache] = None,
+                 ):
+        if not part_paths:
+            raise ValueError(f'No parts were found for source dataset {name}')
+        part_paths = sorted(part_paths)
+        # The dataset path doesn't exist itself, but serves as the key
+        # of the cached data of the dataset as a whole
+        super().__init__(path=part_paths[0].parent / name, params=params,
+                         memory_cache=memory_cache)
+        self._parts = [SourceFile(path, params, disk_cache, self._memory_cache)
+                       for path in part_paths]
+
+    def __repr__(self):
+        """Name, parts and dataset parameters."""
+        return (f'name={self.name}\n' + f'parts={len(self._parts)}\n'
+                + 'parameters=' + str(self._params))
+
+    @property
+    def name(self) -> str:
+        """Read-only source dataset name."""
+        return self._path.name
+
+    @property
+    def parts(self) -> List[SourceFile]:
+        """Read-only list of the parts, ordered by file name."""
+        return list(self._parts)
+
+    @property
+    def max_workers(self) -> int:
+        """Maximum number of parts that are read in parallel."""
+        return self._params.get('max_workers') or _DEFAULT_MAX_WORKERS
+
+    def _map_parts(self, func: Callable[[SourceFile], Any]) -> List:
+        # Results are in the order of the parts
+        if len(self._parts) == 1:
+            return [func(self._parts[0])]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(func, self._parts))
+
+    def _read_csv_as_df(self,
+                        apply_dtypes: bool,
+                        columns: Optional[List[str]] = None,
+                        row_filter: Optional[DfFilter] = None,
+                        **kwargs
+                        ) -> pd.DataFrame:
+        logger.info(f'Reading {len(self._parts)} parts of {self.name}')
+        return concat_chunks(self._map_parts(lambda part: part.get_csv_as_df(
+            apply_dtypes, columns=columns, row_filter=row_filter, **kwargs)))
+
+    def _read_sas_as_df(self,
+                        apply_dtypes: bool,
+                        columns: Optional[List[str]] = None,
+                        row_filter: Optional[DfFilter] = None,
+                        **kwargs
+                        ) -> pd.DataFrame:
+        logger.info(f'Reading {len(self._parts)} parts of {self.name}')
+        return concat_chunks(self._map_parts(lambda part: part.get_sas_as_df(
+            apply_dtypes, columns=columns, row_filter=row_filter, **kwargs)))
+
+    def iter_csv_as_df(self,
+                       apply_dtypes: bool,
+                       chunksize: int = DEFAULT_CHUNKSIZE,
+                       columns: Optional[List[str]] = None,
+                       row_filter: Optional[DfFilter] = None,
+                       prefetch: int = 0,
+                       **kwargs
+                       ) -> Generator[pd.DataFrame, None, None]:
+        """
+        Return the parts as a generator of DataFrame chunks.
+
+        Chunks don't span multiple parts. See SourceFile.iter_csv_as_df
+        for the parameters.
+
+        Yields
+        ------
+        pandas.DataFrame
+        """
+        chunks = (chunk for part in self._parts
+                  for chunk in part.iter_csv_as_df(apply_dtypes, chunksize, columns,
+                                                   row_filter, **kwargs))
+        yield from helper.prefetch(chunks, prefetch)
+
+    def iter_sas_as_df(self,
+                       apply_dtypes: bool,
+                       chunksize: int = DEFAULT_CHUNKSIZE,
+                       columns: Optional[List[str]] = None,
+                       row_filter: Optional[DfFilter] = None,
+                       prefetch: int = 0,
+                       **kwargs
+                       ) -> Generator[pd.DataFrame, None, None]:
+        """
+        Return the SAS parts as a generator of DataFrame chunks.
+
+        Chunks don't span multiple parts. See SourceFile.iter_sas_as_df
+        for the parameters.
+
+        Yields
+        ------
+        pandas.DataFrame
+        """
+        chunks = (chunk for part in self._parts
+                  for chunk in part.iter_sas_as_df(apply_dtypes, chunksize, columns,
+                                                   row_filter, **kwargs))
+        yield from helper.prefetch(chunks, prefetch)
+
+    def _read_csv_records(self,
+                          columns: Optional[List[str]] = None,
+                          row_filter: Optional[RecordFilter] = None,
+                          **kwargs
+                          ) -> Generator[OrderedDict, None, None]:
+        for part in self._parts:
+            yield from part._read_csv_records(columns, row_filter, **kwargs)
+
+    def get_csv_as_generator_of_tuples(self,
+                                       named: bool = False,
+                                       batch_size: Optional[int] = None,
+                                       columns: Optional[List[str]] = None,
+                                       row_filter: Optional[TupleFilter] = None,
+                                       prefetch: int = 0,
+                                       **kwargs
+                                       ) -> Generator[Union[Tuple, List[Tuple]], None, None]:
+        """
+        Return the parts as a generator of tuples.
+
+        Batches don't span multiple parts. See
+        SourceFile.get_csv_as_generator_of_tuples for the parameters.
+
+        Returns
+        -------
+        tuple or list of tuples generator
+        """
+        rows = (row for part in self._parts
+                for row in part.get_csv_as_generator_of_tuples(named, batch_size, columns,
+                                                               row_filter, **kwargs))
+        yield from helper.prefetch(rows, prefetch,
+                                   PREFETCH_BATCH_SIZE if batch_size is None else 1)
+
+    def get_csv_fieldnames(self, **kwargs) -> List[str]:
+        """
+        Return the column names of the first part.
+
+        Parameters
+        ----------
+        **kwargs
+            Additional keyword arguments are passed on directly to the
+            csv module's reader.
+
+        Returns
+        -------
+        list of str
+        """
+        return self._parts[0].get_csv_fieldnames(**kwargs)
+
+    def _read_dtype_sample(self, sample_rows: int) -> Tuple[pd.DataFrame, bool]:
+        # The first rows of every part, so values that only occur in
+        # later parts are also seen
+        part_rows = max(1, sample_rows // len(self._parts))
+        logger.info(f'Sampling {part_rows} rows of each of the {len(self._parts)} parts '
+                    f'of {self.name}')
+        samples = self._map_parts(lambda part: part._read_dtype_sample(part_rows))
+        sample = pd.concat([part_sample for part_sample, _ in samples], ignore_index=True)
+        return sample, all(complete for _, complete in samples)
+
+    def get_line_count(self) -> Optional[int]:
+        """
+        Get the total line count of the parts (excluding headers).
+
+        The parts are counted in parallel.
+
+        Returns
+        -------
+        int or None
+            None if the line count of any of the parts is unavailable.
+        """
+        counts = self._map_parts(lambda part: part.get_line_count())
+        if any(n_rows is None for n_rows in counts):
+            return None
+        n_rows = sum(counts)
+        logger.info(f'{n_rows} data rows were counted in {len(counts)} parts of {self.name}')
+        return n_rows
+
+    def get_checksum(self, algorithm: str = 'md5') -> str:
+        """
+        Get a checksum of the contents of all parts combined.
+
+        Parameters
+        ----------
+        algorithm : str, default 'md5'
+            Any hashlib algorithm, e.g. the faster 'blake2b'.
+
+        Returns
+        -------
+        str
+            Checksum of the checksums of the parts.
+        """
+        checksums = self._map_parts(lambda part: part.get_checksum(algorithm))
+        return hashlib.new(algorithm, ''.join(checksums).encode('utf-8')).hexdigest()
+
+    def build_index(self, key_columns: Union[str, List[str]], rebuild: bool = False
+                    ) -> FileIndex:
+        """Indexing is not supported for multi-part datasets."""
+        raise ValueError(f'Cannot index multi-part source dataset {self.name}')
+
+    def lookup(self, key: Key) -> List[Dict[str, str]]:
+        """Indexing is not supported for multi-part datasets."""
+        raise ValueError(f'Cannot index multi-part source dataset {self.name}')
+
+    def delta_reader(self, name: str) -> DeltaReader:
+        """Raise an error, appended rows of datasets are not tracked."""
+        raise ValueError(f'Cannot read appended rows of multi-part source dataset {self.name}')
@@ -0,0 +1,93 @@
+"""Parallel parsing of delimited text files by byte range."""
+
+import io
+import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, Future
+from pathlib import Path
+from typing import Dict, List, Tuple, Generator, Deque
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def iter_csv_ranges(path: Path,
+                    ranges: List[Tuple[int, int]],
+                    read_kwargs: Dict,
+                    max_workers: int,
+                    ) -> Generator[pd.DataFrame, None, None]:
+    """
+    Parse byte ranges of a delimited text file in a process pool.
+
+    At most two ranges per worker are parsed ahead of the consumer, so
+    memory use stays bounded when the DataFrames are processed one at
+    a time.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        The (uncompressed) file to parse.
+    ranges : list of tuple of (int, int)
+        Start and end offsets of the ranges, each containing complete
+        records, see util.io.get_record_ranges.
+    read_kwargs : dict
+        Keyword arguments for pandas.read_csv. Must be picklable and
+        include the column names, as the ranges have no header.
+    max_workers : int
+        Number of worker processes.
+
+    Yields
+    ------
+    pandas.DataFrame
+        The parsed rows of each range, in file order.
+    """
+    logger.info(f'Parsing {path.name} in {len(ranges)} parts with {max_workers} processes')
+    remaining = iter(ranges)
+    pending: Deque[Future] = deque()
+    # Forking while other threads (row counts, prefetching) hold locks
+    # can deadlock the workers, so they are started fresh instead
+    mp_context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context) as executor:
+        try:
+            for start, end in remaining:
+                pending.append(executor.submit(read_csv_range, path, start, end, read_kwargs))
+                if len(pending) >= 2 * max_workers:
+                    break
+            while pending:
+                df = pending.popleft().result()
+                next_range = next(remaining, None)
+                if next_range is not None:
+                    pending.append(executor.submit(read_csv_range, path, *next_range,
+                                                   read_kwargs))
+                yield df
+        finally:
+            # E.g. when the consumer stops early
+            for future in pending:
+                future.cancel()
+
+
+def read_csv_range(path: Path, start: int, end: int, read_kwargs: Dict) -> pd.DataFrame:
+    """
+    Parse a byte range of a delimited text file.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        The (uncompressed) file to parse.
+    start : int
+        Offset of the first byte of the range.
+    end : int
+        Offset directly after the last byte of the range.
+    read_kwargs : dict
+        Keyword arguments for pandas.read_csv.
+
+    Returns
+    -------
+    pandas.DataFrame
+    """
+    with path.open('rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return pd.read_csv(io.BytesIO(data), **read_kwargs)
@@ -2,27 +2,58 @@
 
 from __future__ import annotations
 
+import hashlib
 import logging
+from concurrent.futures import ThreadPoolExecutor, Future
+from itertools import islice
+from operator import itemgetter
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional, List, Callable, Union, Generator, Tuple, Set
 
+import pandas as pd
+from sqlalchemy.engine import Engine
+
+from .disk_cache import DiskCache
+from .dtype_profiler import DtypeProfile, DEFAULT_SAMPLE_ROWS
+from .memory_cache import MemoryCache
+from .multi_part_source_file import MultiPartSourceFile
+from .merge_join import external_sort, merge_join, KeyFunc, DEFAULT_MAX_ROWS_IN_MEMORY
 from .source_file import SourceFile
+from .source_table import SourceTable
 from ..etl_stats import EtlSource, etl_stats
 from ...config.models import SourceConfig
 from ...util import io
+from ...util.fingerprint import FingerprintStore
 
 logger = logging.getLogger(__name__)
 
 
 class SourceData:
-    """Handle for all interactions related to source data files."""
+    """
+    Handle for all interactions related to source data.
+
+    Parameters
+    ----------
+    config : dict
+        Contents of the source data config file.
+    engine : sqlalchemy.engine.Engine, optional
+        Engine of the database containing the source tables. Required
+        if source_tables are present in the config.
+    """
 
-    def __init__(self, config: Dict):
+    def __init__(self, config: Dict, engine: Optional[Engine] = None):
         self.source_config: SourceConfig = SourceConfig(**config)
         self._source_dir = self.source_config.source_data_folder
         self._file_defaults: Dict = self.source_config.file_defaults
+        self._disk_cache: Optional[DiskCache] = None
+        if self.source_config.cache_dir is not None:
+            self._disk_cache = DiskCache(self.source_config.cache_dir)
+        self._memory_cache = MemoryCache(self.source_config.cache_memory_limit)
+        self._fingerprint_store: Optional[FingerprintStore] = None
         self._source_files: Dict[str, SourceFile] = self._collect_source_files()
+        self._source_tables: Dict[str, SourceTable] = self._collect_source_tables(engine)
 
+        self._line_count_futures: List[Future] = []
         if self.source_config.count_source_rows:
             self._calculate_file_line_counts()
 
@@ -31,18 +62,53 @@ class SourceData:
         """Read-only source dir property."""
         return self._source_dir
 
+    @property
+    def memory_cache(self) -> MemoryCache:
+        """Read-only in-memory cache shared by all source files."""
+        return self._memory_cache
+
     def _collect_source_files(self) -> Dict[str, SourceFile]:
         source_files = self._source_dir.glob('*')
         source_files = [f for f in source_files if f.is_file() and not io.is_hidden(f)]
 
-        source_file_dict = {}
+        # Files that are part of a dataset are only available as such
+        source_file_dict = self._collect_source_datasets(source_files)
+        dataset_parts = {part.path for dataset in source_file_dict.values()
+                         for part in dataset.parts}
         file_config = self.source_config.source_files or {}
         for f in source_files:
+            if f in dataset_parts:
+                continue
             # Merge the default params with the file specific params
             params = {**self._file_defaults, **file_config.get(f.name, {})}
-            source_file_dict[f.name] = SourceFile(path=f, params=params)
+            source_file_dict[f.name] = SourceFile(path=f, params=params,
+                                                  disk_cache=self._disk_cache,
+                                                  memory_cache=self._memory_cache)
         return source_file_dict
 
+    def _collect_source_datasets(self, source_files: List[Path]
+                                 ) -> Dict[str, MultiPartSourceFile]:
+        datasets = {}
+        for name, dataset_params in (self.source_config.source_datasets or {}).items():
+            pattern = dataset_params['pattern']
+            part_paths = [f for f in source_files if f.match(pattern)]
+            if not part_paths:
+                logger.warning(f'No parts of source dataset "{name}" matching {pattern} '
+                               f'were found in source folder: {self._source_dir}')
+                continue
+            params = {**self._file_defaults, **dataset_params}
+            datasets[name] = MultiPartSourceFile(name=name, part_paths=part_paths,
+                                                 params=params, disk_cache=self._disk_cache,
+                                                 memory_cache=self._memory_cache)
+        return datasets
+
+    def _collect_source_tables(self, engine: Optional[Engine]) -> Dict[str, SourceTable]:
+        table_config = self.source_config.source_tables or {}
+        if table_config and engine is None:
+            raise ValueError('A database engine is required for reading source tables')
+        return {name: SourceTable(name=name, engine=engine, params=params or {})
+                for name, params in table_config.items()}
+
     def get_source_file(self, file_name: str) -> SourceFile:
         """
         Get source file for the given file_name.
@@ -50,7 +116,8 @@ class SourceData:
         Parameters
         ----------
         file_name : str
-            Name of the source_data file.
+            Name of the source_data file, or of a source dataset.
+            Datasets are returned as MultiPartSourceFile.
 
         Returns
         -------
@@ -61,10 +128,300 @@ class SourceData:
             raise FileNotFoundError(f'Could not find source file {file_name} in source folder')
         return source_file
 
+    def get_source_table(self, table_name: str) -> SourceTable:
+        """
+        Get source table for the given table_name.
+
+        Parameters
+        ----------
+        table_name : str
+            Name of the source table, as provided in the source config.
+
+        Returns
+        -------
+        SourceTable
+        """
+        source_table = self._source_tables.get(table_name)
+        if source_table is None:
+            raise KeyError(f'Source table {table_name} is not present in the source config')
+        return source_table
+
+    def profile_dtypes(self,
+                       file_names: Optional[List[str]] = None,
+                       sample_rows: int = DEFAULT_SAMPLE_ROWS,
+                       config_path: Optional[Path] = None,
+                       overwrite: bool = False,
+                       ) -> List[DtypeProfile]:
+        """
+        Propose compact dtypes for delimited text source files.
+
+        Categoricals are proposed for strings with few distinct values,
+        nullable integer dtypes for integers, and dates are recognized.
+        Integers are only downcast below 'Int64' if all rows of a file
+        were sampled, as later rows may hold larger values. The memory
+        usage of the sampled rows with and without the proposed dtypes
+        is logged per file.
+
+        Parameters
+        ----------
+        file_names : list of str, optional
+            Names of the source files to profile. Defaults to all
+            files that are not binary according to the source config.
+        sample_rows : int, default 100000
+            Number of rows to read per file. For multi-part datasets,
+            these are spread evenly over the parts.
+        config_path : pathlib.Path, optional
+            If provided, the proposed dtypes are written to the
+            source_files section of this source config file, or to the
+            source_datasets section for multi-part datasets. Note that
+            comments in the file are not preserved.
+        overwrite : bool, default False
+            If True, also profile files that already have dtypes in
+            the source config.
+
+        Returns
+        -------
+        list of DtypeProfile
+        """
+        if file_names is None:
+            file_names = [name for name, f in self._source_files.items()
+                          if f.config.get('binary') is False]
+        source_files = [self.get_source_file(name) for name in file_names]
+        if not overwrite:
+            source_files = [f for f in source_files if not f.dtypes]
+
+        profiles = [f.profile_dtypes(sample_rows) for f in source_files]
+        if profiles:
+            logger.info('Memory usage of sampled rows without -> with proposed dtypes:')
+        for profile in profiles:
+            logger.info(f'\t{profile}')
+
+        if config_path is not None and profiles:
+            config = io.read_yaml_file(config_path)
+            for source_file, profile in zip(source_files, profiles):
+                section = ('source_datasets' if isinstance(source_file, MultiPartSourceFile)
+                           else 'source_files')
+                config_section = config.get(section) or {}
+                file_config = config_section.get(profile.source_name) or {}
+                if section == 'source_datasets':
+                    # A dataset config is invalid without its pattern
+                    file_config.setdefault('pattern', source_file.config['pattern'])
+                file_config['dtypes'] = profile.dtypes
+                config_section[profile.source_name] = file_config
+                config[section] = config_section
+            io.write_yaml_file(config, config_path)
+            logger.info(f'Proposed dtypes were written to {config_path}')
+        return profiles
+
+    def get_fingerprints(self,
+                         file_names: Optional[List[str]] = None,
+                         max_workers: int = 4,
+                         ) -> Dict[str, str]:
+        """
+        Get BLAKE2 checksums of the source files, e.g. for provenance.
+
+        Files are hashed in parallel. The checksums are memoized in a
+        hidden file in the cache_dir, or else in the source folder, so
+        files are only hashed again once their size or modification
+        time changes. The checksum of a multi-part dataset is derived
+        from the checksums of its parts.
+
+        Parameters
+        ----------
+        file_names : list of str, optional
+            Names of the source files and datasets to fingerprint.
+            Defaults to all of them.
+        max_workers : int, default 4
+            Maximum number of files to hash at the same time.
+
+        Returns
+        -------
+        dict of {str : str}
+            Checksum by source file name.
+        """
+        if file_names is None:
+            file_names = list(self._source_files)
+        paths_by_name = {}
+        for name in file_names:
+            source_file = self.get_source_file(name)
+            if isinstance(source_file, MultiPartSourceFile):
+                paths_by_name[name] = [part.path for part in source_file.parts]
+            else:
+                paths_by_name[name] = [source_file.path]
+
+        store = self._get_fingerprint_store()
+        checksums = store.get_fingerprints(
+            [path for paths in paths_by_name.values() for path in paths], max_workers)
+        fingerprints = {}
+        for name, paths in paths_by_name.items():
+            if isinstance(self._source_files[name], MultiPartSourceFile):
+                combined = ''.join(checksums[path] for path in paths)
+                fingerprints[name] = hashlib.new(store.algorithm,
+                                                 combined.encode('utf-8')).hexdigest()
+            else:
+                fingerprints[name] = checksums[paths[0]]
+        return fingerprints
+
+    def _get_fingerprint_store(self) -> FingerprintStore:
+        if self._fingerprint_store is None:
+            memo_dir = self.source_config.cache_dir or self._source_dir
+            self._fingerprint_store = FingerprintStore(memo_dir / '.fingerprints.json')
+        return self._fingerprint_store
+
+    def merge_join(self,
+                   left: str,
+                   right: str,
+                   on: Union[str, List[str]],
+                   how: str = 'inner',
+                   presorted: bool = False,
+                   chunksize: Optional[int] = None,
+                   suffixes: Tuple[str, str] = ('_x', '_y'),
+                   max_rows_in_memory: int = DEFAULT_MAX_ROWS_IN_MEMORY,
+                   tmp_dir: Optional[Path] = None,
+                   ) -> Generator[Union[Dict, pd.DataFrame], None, None]:
+        """
+        Join two delimited text source files by key in bounded memory.
+
+        Both files are streamed. Unless presorted, each file is sorted
+        by key with an external sort, which spills sorted runs of
+        max_rows_in_memory rows to temporary files. The sorted rows
+        are then merge joined, keeping only the rows of a single key
+        in memory.
+
+        Parameters
+        ----------
+        left : str
+            Name of the left source file.
+        right : str
+            Name of the right source file.
+        on : str or list of str
+            Name(s) of the key column(s), present in both files. Keys
+            are compared as they appear in the files (as strings).
+        how : {'inner', 'left', 'right', 'outer'}, default 'inner'
+            Type of join, as in pandas.merge.
+        presorted : bool, default False
+            If True, the files are already sorted by key (in string
+            order) and are not sorted again.
+        chunksize : int, optional
+            If provided, yield DataFrames of up to chunksize joined rows
+            instead of individual rows.
+        suffixes : tuple of (str, str), default ('_x', '_y')
+            Suffixes added to non-key columns present in both files.
+        max_rows_in_memory : int, default 1000000
+            Maximum number of rows per file to sort in memory.
+        tmp_dir : pathlib.Path, optional
+            Directory for the temporary files of the external sort.
+            Defaults to the system temp dir.
+
+        Yields
+        ------
+        dict or pandas.DataFrame
+            Joined rows with the key columns first, followed by the
+            other left and right columns. Columns of unmatched rows
+            are None.
+        """
+        if isinstance(on, str):
+            on = [on]
+        left_file = self.get_source_file(left)
+        right_file = self.get_source_file(right)
+        left_columns = left_file.get_csv_fieldnames()
+        right_columns = right_file.get_csv_fieldnames()
+        for file_name, columns in ((left, left_columns), (right, right_columns)):
+            missing = set(on).difference(columns)
+            if missing:
+                raise ValueError(f'Columns not found in {file_name}: '
+                                 f'{", ".join(sorted(missing))}')
+        left_key = _get_key_func(left_columns, on)
+        right_key = _get_key_func(right_columns, on)
+
+        logger.info(f'Joining {left} and {right} on {", ".join(on)}')
+        # Rows with fewer values than the header are padded to its
+        # width by the tuple reader, so the column indexes always fit
+        left_rows = left_file.get_csv_as_generator_of_tuples()
+        right_rows = right_file.get_csv_as_generator_of_tuples()
+        if not presorted:
+            left_rows = external_sort(left_rows, left_key, max_rows_in_memory, tmp_dir)
+            right_rows = external_sort(right_rows, right_key, max_rows_in_memory, tmp_dir)
+
+        left_other = [i for i, col in enumerate(left_columns) if col not in on]
+        right_other = [i for i, col in enumerate(right_columns) if col not in on]
+        shared = {left_columns[i] for i in left_other}.intersection(
+            right_columns[i] for i in right_other)
+        out_columns = (
+            on
+            + [_add_suffix(left_columns[i], shared, suffixes[0]) for i in left_other]
+            + [_add_suffix(right_columns[i], shared, suffixes[1]) for i in right_other]
+        )
+        left_none = (None,) * len(left_other)
+        right_none = (None,) * len(right_other)
+
+        def to_row(pair: Tuple[Optional[Tuple], Optional[Tuple]]) -> Tuple:
+            left_row, right_row = pair
+            key = left_key(left_row) if left_row is not None else right_key(right_row)
+            left_values = (left_none if left_row is None
+                           else tuple(left_row[i] for i in left_other))
+            right_values = (right_none if right_row is None
+                            else tuple(right_row[i] for i in right_other))
+            return key + left_values + right_values
+
+        rows = map(to_row, merge_join(left_rows, right_rows, left_key, right_key, how))
+        if chunksize is None:
+            for row in rows:
+                yield dict(zip(out_columns, row))
+            return
+        batch = list(islice(rows, chunksize))
+        while batch:
+            yield pd.DataFrame.from_records(batch, columns=out_columns)
+            batch = list(islice(rows, chunksize))
+
     def _calculate_file_line_counts(self) -> None:
-        logger.info('Collecting source file row counts')
-        for file_name, source_file in self._source_files.items():
-            etl_source = EtlSource(source_name=file_name)
-            etl_source.n_rows = source_file.get_line_count()
-            etl_source.end_now()
-            etl_stats.add_source(etl_source)
+        logger.info('Collecting source row counts')
+        in_background = self.source_config.count_source_rows_in_background
+        executor = ThreadPoolExecutor(max_workers=self.source_config.row_count_workers)
+        self._line_count_futures = [
+            executor.submit(self._count_source_rows, file_name, f.get_line_count)
+            for file_name, f in self._source_files.items()
+        ] + [
+            executor.submit(self._count_source_rows, table_name, t.get_row_count)
+            for table_name, t in self._source_tables.items()
+        ]
+        # In the background, the counts are added to the etl_stats
+        # while the transformations are already running
+        executor.shutdown(wait=not in_background)
+        if not in_background:
+            self.wait_for_line_counts()
+
+    @staticmethod
+    def _count_source_rows(source_name: str, count_func: Callable[[], Optional[int]]) -> None:
+        etl_source = EtlSource(source_name=source_name)
+        etl_source.n_rows = count_func()
+        etl_source.end_now()
+        etl_stats.add_source(etl_source)
+
+    def wait_for_line_counts(self) -> None:
+        """
+        Wait until all source row counts are collected.
+
+        Only needed if the row counts are collected in the background,
+        before the etl_stats are reported.
+
+        Returns
+        -------
+        None
+        """
+        for future in self._line_count_futures:
+            future.result()
+        self._line_count_futures = []
+
+
+def _get_key_func(columns: List[str], key_columns: List[str]) -> KeyFunc:
+    # Keys are always tuples, also for a single key column
+    indexes = [columns.index(col) for col in key_columns]
+    if len(indexes) == 1:
+        index = indexes[0]
+        return lambda row: (row[index],)
+    return itemgetter(*indexes)
+
+
+def _add_suffix(column: str, shared: Set[str], suffix: str) -> str:
+    return column + suffix if column in shared else column
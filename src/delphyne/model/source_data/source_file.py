@@ -1,15 +1,32 @@
 """Source file module."""
 
 import csv
+import io
 import logging
+from collections import namedtuple
+from contextlib import closing, contextmanager
 from copy import deepcopy
 from inspect import signature
+from itertools import islice
+from operator import itemgetter
 from pathlib import Path
-from typing import Dict, Optional, List, OrderedDict, Callable, Generator
+from typing import (Dict, Optional, List, OrderedDict, Callable, Generator, Iterable, Tuple,
+                    Union, IO, ContextManager)
 
 import pandas as pd
+from pandas.api.types import union_categoricals
 
-from ...util.io import get_file_line_count
+from . import arrow_csv
+from .columnar_records import ColumnarRecords
+from .delta_reader import DeltaReader, get_delta_state_path
+from .disk_cache import DiskCache
+from .dtype_profiler import DtypeProfile, propose_dtypes, DEFAULT_SAMPLE_ROWS
+from .file_index import FileIndex, Key, get_index_path
+from .memory_cache import MemoryCache, get_size
+from .parallel_csv import iter_csv_ranges
+from ...util import helper
+from ...util.io import (get_file_line_count, get_file_checksum, get_compression, open_file,
+                        get_record_ranges, iter_records, open_byte_range)
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +38,43 @@ _CSV_DIALECT_PARAMS = {kw for kw in dir(csv.Dialect)
                        if not kw.startswith('_')}
 _CSV_DICT_READER_PARAMS = {'fieldnames', 'restkey', 'restval', 'dialect'}
 _FULL_CSV_PARAMS = _CSV_DIALECT_PARAMS.union(_CSV_DICT_READER_PARAMS)
+_CSV_READER_PARAMS = _CSV_DIALECT_PARAMS.union({'dialect'})
+
+DEFAULT_CHUNKSIZE = 100000
+
+# Rows are prefetched in batches to limit the overhead per row
+PREFETCH_BATCH_SIZE = 1000
+
+# Approximate size of the byte ranges parsed in parallel
+_DEFAULT_PARSE_RANGE_SIZE = 1 << 26
+
+# read_csv parameters that depend on the position in the file, which
+# prevent parsing byte ranges independently
+_POSITIONAL_READ_CSV_PARAMS = {'names', 'header', 'index_col', 'nrows', 'skiprows',
+                               'skipfooter', 'iterator', 'chunksize'}
+
+# read_csv parameters that can move the header away from the first
+# line of the file
+_HEADER_MOVING_PARAMS = ('skiprows', 'comment')
+
+# pandas read_sas formats by file suffix
+_SAS_FORMATS = {'.sas7bdat': 'sas7bdat', '.xpt': 'xport'}
+
+# Disk cache key of DataFrames persisted via cache_df
+_PROCESSED_DF_KEY = 'processed'
+
+# Memory cache keys of the cached data, combined with the file path
+_DF_CACHE_KEY = 'df'
+_CSV_CACHE_KEY = 'csv'
+
+# Row predicates: DataFrame readers take a boolean mask per chunk,
+# record readers a bool per record
+DfFilter = Callable[[pd.DataFrame], pd.Series]
+RecordFilter = Callable[[Dict], bool]
+TupleFilter = Callable[[Tuple], bool]
+
+# Conversion of a DataFrame (chunk) after reading
+Cast = Optional[Callable[[pd.DataFrame], pd.DataFrame]]
 
 
 class SourceFile:
@@ -33,15 +87,27 @@ class SourceFile:
         Path of the source data file.
     params : dict
         Config options describing the source file properties.
+    disk_cache : DiskCache, optional
+        If provided, DataFrames read from the file are stored on disk
+        and reused in later runs, as long as the file and the read
+        parameters remain unchanged.
+    memory_cache : MemoryCache, optional
+        Cache to keep data in memory for future use. Typically shared
+        by all source files. If not provided, the source file uses its
+        own cache without a memory limit.
     """
 
-    def __init__(self, path: Path, params: Dict):
+    def __init__(self,
+                 path: Path,
+                 params: Dict,
+                 disk_cache: Optional[DiskCache] = None,
+                 memory_cache: Optional[MemoryCache] = None,
+                 ):
         self._path = path
         self._params = params
-
-        # Cached data
-        self._df: Optional[pd.DataFrame] = None
-        self._csv: List[OrderedDict] = []
+        self._disk_cache = disk_cache
+        self._index: Optional[FileIndex] = None
+        self._memory_cache = memory_cache if memory_cache is not None else MemoryCache()
 
     def __repr__(self):
         """Path and file parameters."""
@@ -57,41 +123,82 @@ class SourceFile:
         """Read-only copy of config parameters."""
         return deepcopy(self._params)
 
+    @property
+    def compression(self) -> Optional[str]:
+        """
+        Compression method of the file.
+
+        Derived from the file suffix, unless provided as compression
+        in the source_config. None if the file is not compressed.
+        """
+        return get_compression(self._path, self._params.get('compression', 'infer'))
+
     @property
     def dtypes(self) -> Dict:
         """Read-only copy of specified dtypes."""
         return deepcopy(self._params.get('dtypes', {}))
 
+    @property
+    def date_formats(self) -> Dict[str, str]:
+        """
+        Read-only copy of specified date formats.
+
+        strftime formats by column name, used to parse the columns with
+        a datetime dtype. Without a format, it is inferred per column.
+        """
+        return deepcopy(self._params.get('date_formats') or {})
+
+    @property
+    def _df(self) -> Optional[pd.DataFrame]:
+        return self._memory_cache.peek((self._path, _DF_CACHE_KEY))
+
+    @property
+    def _csv(self) -> Union[List[OrderedDict], ColumnarRecords]:
+        return self._memory_cache.peek((self._path, _CSV_CACHE_KEY)) or []
+
     def _remove_cached_df(self) -> None:
-        if self._df is not None:
+        if (self._path, _DF_CACHE_KEY) in self._memory_cache:
             logger.info(f'Removing cached df of {self.path.name}')
-            self._df = None
+            self._memory_cache.remove((self._path, _DF_CACHE_KEY))
 
-    def _retrieve_cached_df(self) -> pd.DataFrame:
-        logger.info(f'Retrieving {self._path.name} DataFrame from cache')
-        return self._df
+    def _retrieve_cached_df(self) -> Optional[pd.DataFrame]:
+        df = self._memory_cache.get((self._path, _DF_CACHE_KEY))
+        if df is not None:
+            logger.info(f'Retrieving {self._path.name} DataFrame from cache')
+        return df
 
-    def _cache_df_copy(self, df: pd.DataFrame) -> None:
-        logger.info('Caching deepcopy of DataFrame')
-        self._df = df.copy(deep=True)
+    def _store_cached_df(self, df: pd.DataFrame) -> None:
+        # A shallow copy shares the data with the original DataFrame,
+        # only structural changes (e.g. dropping columns) are isolated
+        logger.info('Caching DataFrame')
+        self._memory_cache.put((self._path, _DF_CACHE_KEY), df.copy(deep=False))
 
     def _remove_cached_csv(self) -> None:
-        if self._csv:
+        if (self._path, _CSV_CACHE_KEY) in self._memory_cache:
             logger.info(f'Removing cached csv records of {self.path.name}')
-            self._csv = []
+            self._memory_cache.remove((self._path, _CSV_CACHE_KEY))
 
-    def _retrieve_cached_csv(self) -> List[OrderedDict]:
-        logger.info(f'Retrieving {self._path.name} csv records from cache')
-        return self._csv
+    def _retrieve_cached_csv(self) -> Optional[Union[List[OrderedDict], ColumnarRecords]]:
+        csv_records = self._memory_cache.get((self._path, _CSV_CACHE_KEY))
+        if csv_records is not None:
+            logger.info(f'Retrieving {self._path.name} csv records from cache')
+        return csv_records
 
-    def _cache_csv_copy(self, csv_records: List[OrderedDict]) -> None:
-        logger.info('Caching deepcopy of csv records')
-        self._csv = deepcopy(csv_records)
+    def _store_cached_csv(self, csv_records: Union[List[OrderedDict], ColumnarRecords]
+                          ) -> None:
+        # The records themselves are shared, not copied
+        logger.info('Caching csv records')
+        if not isinstance(csv_records, ColumnarRecords):
+            csv_records = list(csv_records)
+        self._memory_cache.put((self._path, _CSV_CACHE_KEY), csv_records)
 
     def get_csv_as_df(self,
                       apply_dtypes: bool,
                       force_reload: bool = False,
                       cache: bool = False,
+                      columns: Optional[List[str]] = None,
+                      row_filter: Optional[DfFilter] = None,
+                      copy: bool = False,
                       **kwargs
                       ) -> pd.DataFrame:
         """
@@ -107,6 +214,19 @@ class SourceFile:
             from source file.
         cache : bool, default False
             If True, keep the returned df in memory for future use.
+            Cannot be combined with columns or row_filter.
+        columns : list of str, optional
+            Names of the columns to read, other columns are skipped.
+            The columns keep the order of the file.
+        row_filter : callable, optional
+            Function that takes a DataFrame and returns a boolean Series
+            of the rows to keep. The file is then read in chunks, which
+            are filtered (after applying dtypes) before they are
+            combined.
+        copy : bool, default False
+            If True, return a deep copy of the df. The cached df shares
+            its data with the returned df, so use this if you intend to
+            modify values in place while a df is cached.
         **kwargs
             Additional keyword arguments are passed on directly to
             pandas.read_csv method.
@@ -116,12 +236,16 @@ class SourceFile:
         pandas.DataFrame
         """
         return self._get_df(read_func=self._read_csv_as_df, apply_dtypes=apply_dtypes,
-                            force_reload=force_reload, cache=cache, **kwargs)
+                            force_reload=force_reload, cache=cache, columns=columns,
+                            row_filter=row_filter, copy=copy, **kwargs)
 
     def get_sas_as_df(self,
                       apply_dtypes: bool,
                       force_reload: bool = False,
                       cache: bool = False,
+                      columns: Optional[List[str]] = None,
+                      row_filter: Optional[DfFilter] = None,
+                      copy: bool = False,
                       **kwargs
                       ) -> pd.DataFrame:
         """
@@ -137,6 +261,19 @@ class SourceFile:
             from source file.
         cache : bool, default False
             If True, keep the returned df in memory for future use.
+            Cannot be combined with columns or row_filter.
+        columns : list of str, optional
+            Names of the columns to read, other columns are skipped.
+            The columns keep the order of the file.
+        row_filter : callable, optional
+            Function that takes a DataFrame and returns a boolean Series
+            of the rows to keep. The file is then read in chunks, which
+            are filtered (after applying dtypes) before they are
+            combined.
+        copy : bool, default False
+            If True, return a deep copy of the df. The cached df shares
+            its data with the returned df, so use this if you intend to
+            modify values in place while a df is cached.
         **kwargs
             Additional keyword arguments are passed on directly to
             pandas read_sas method.
@@ -146,9 +283,148 @@ class SourceFile:
         pandas.DataFrame
         """
         return self._get_df(read_func=self._read_sas_as_df, apply_dtypes=apply_dtypes,
-                            force_reload=force_reload, cache=cache, **kwargs)
+                            force_reload=force_reload, cache=cache, columns=columns,
+                            row_filter=row_filter, copy=copy, **kwargs)
+
+    def iter_csv_as_df(self,
+                       apply_dtypes: bool,
+                       chunksize: int = DEFAULT_CHUNKSIZE,
+                       columns: Optional[List[str]] = None,
+                       row_filter: Optional[DfFilter] = None,
+                       prefetch: int = 0,
+                       **kwargs
+                       ) -> Generator[pd.DataFrame, None, None]:
+        """
+        Return a delimited text file as a generator of DataFrame chunks.
+
+        Only one chunk is kept in memory at a time, which allows
+        vectorized processing of files that don't fit in memory.
+
+        Parameters
+        ----------
+        apply_dtypes : bool
+            Apply source_config dtypes to the columns of each chunk.
+            If False, all columns will be loaded as 'object' dtype.
+        chunksize : int, default 100000
+            Maximum number of rows per chunk.
+        columns : list of str, optional
+            Names of the columns to read, other columns are skipped.
+            The columns keep the order of the file.
+        row_filter : callable, optional
+            Function that takes a DataFrame chunk and returns a boolean
+            Series of the rows to keep. Applied after dtypes.
+        prefetch : int, default 0
+            Number of chunks to read ahead in a background thread,
+            while the current chunk is processed.
+        **kwargs
+            Additional keyword arguments are passed on directly to
+            pandas.read_csv method.
+
+        Yields
+        ------
+        pandas.DataFrame
+        """
+        logger.info(f'Reading {self._path.name} as DataFrame chunks')
+        full_kwargs = self._get_read_csv_kwargs(kwargs, columns)
+        parse_kwargs, cast = self._get_csv_parse_args(apply_dtypes, full_kwargs)
+        self._pop_arrow_engine(full_kwargs, supported=False)
+        parse_ranges = self._get_parse_ranges(full_kwargs)
+        if parse_ranges is not None:
+            chunks = self._iter_csv_ranges(*parse_ranges, full_kwargs, parse_kwargs, chunksize)
+        else:
+            chunks = self._iter_csv_chunks(full_kwargs, parse_kwargs, chunksize)
+        chunks = self._iter_chunks(chunks, cast, row_filter=row_filter)
+        yield from helper.prefetch(chunks, prefetch)
+
+    def iter_sas_as_df(self,
+                       apply_dtypes: bool,
+                       chunksize: int = DEFAULT_CHUNKSIZE,
+                       columns: Optional[List[str]] = None,
+                       row_filter: Optional[DfFilter] = None,
+                       prefetch: int = 0,
+                       **kwargs
+                       ) -> Generator[pd.DataFrame, None, None]:
+        """
+        Read a SAS source file and return as generator of DataFrames.
+
+        Only one chunk is kept in memory at a time, which allows
+        vectorized processing of files that don't fit in memory.
+
+        Parameters
+        ----------
+        apply_dtypes : bool
+            Apply source_config dtypes to the columns of each chunk.
+            If False, dtypes will stay as specified in the SAS file.
+        chunksize : int, default 100000
+            Maximum number of rows per chunk.
+        columns : list of str, optional
+            Names of the columns to read, other columns are skipped.
+            The columns keep the order of the file.
+        row_filter : callable, optional
+            Function that takes a DataFrame chunk and returns a boolean
+            Series of the rows to keep. Applied after dtypes.
+        prefetch : int, default 0
+            Number of chunks to read ahead in a background thread,
+            while the current chunk is processed.
+        **kwargs
+            Additional keyword arguments are passed on directly to
+            pandas read_sas method.
+
+        Yields
+        ------
+        pandas.DataFrame
+        """
+        logger.info(f'Reading {self._path.name} as DataFrame chunks')
+        full_kwargs = self._get_read_sas_kwargs(kwargs)
+        chunks = self._iter_chunks(self._iter_sas_chunks(full_kwargs, chunksize),
+                                   self._get_sas_cast(apply_dtypes), columns, row_filter)
+        yield from helper.prefetch(chunks, prefetch)
+
+    def _iter_sas_chunks(self, full_kwargs: Dict, chunksize: int
+                         ) -> Generator[pd.DataFrame, None, None]:
+        full_kwargs = dict(full_kwargs)
+        with self._open_source(full_kwargs) as source:
+            reader = pd.read_sas(source, chunksize=chunksize, **full_kwargs)
+            with closing(reader):
+                yield from reader
+
+    def _iter_chunks(self,
+                     reader,
+                     cast: Cast,
+                     columns: Optional[List[str]] = None,
+                     row_filter: Optional[DfFilter] = None,
+                     ) -> Generator[pd.DataFrame, None, None]:
+        # Only readers without column selection of their own (SAS)
+        # should provide the columns here
+        with closing(reader):
+            for chunk in reader:
+                chunk = self._select(chunk, columns, row_filter, cast)
+                yield chunk
+
+    def _select(self,
+                df: pd.DataFrame,
+                columns: Optional[List[str]],
+                row_filter: Optional[DfFilter],
+                cast: Cast = None,
+                ) -> pd.DataFrame:
+        if columns is not None:
+            df = df[self._get_column_selection(df.columns, columns)]
+        if cast is not None:
+            df = cast(df)
+        if row_filter is not None:
+            df = df[row_filter(df)]
+        return df
+
+    def _get_column_selection(self, available: Iterable[str], columns: List[str]
+                              ) -> List[str]:
+        missing = set(columns).difference(available)
+        if missing:
+            raise ValueError(f'Columns not found in {self._path.name}: '
+                             f'{", ".join(sorted(missing))}')
+        selected = set(columns)
+        return [col for col in available if col in selected]
 
-    def cache_df(self, df: pd.DataFrame) -> None:
+    def cache_df(self, df: pd.DataFrame, persist: bool = False) -> None:
         """
         Save a DataFrame in memory for future use.
 
@@ -163,55 +439,403 @@ class SourceFile:
         ----------
         df : pandas.DataFrame
             The DataFrame to save in memory.
+        persist : bool, default False
+            If True, also store the DataFrame in the disk cache, from
+            which it can be retrieved in later runs via
+            get_persisted_df. Requires a cache_dir in the source config.
 
         Returns
         -------
         None
         """
-        self._cache_df_copy(df)
+        if persist:
+            if self._disk_cache is None:
+                raise ValueError(f'Cannot persist DataFrame of {self._path.name}, '
+                                 f'no cache_dir was provided in the source config')
+            self._disk_cache.put(self._path, _PROCESSED_DF_KEY, df)
+        self._store_cached_df(df)
+
+    def get_persisted_df(self) -> Optional[pd.DataFrame]:
+        """
+        Get the DataFrame stored on disk via cache_df.
+
+        Returns
+        -------
+        pandas.DataFrame or None
+            None if no DataFrame was persisted, or the source file has
+            changed since.
+        """
+        if self._disk_cache is None:
+            return None
+        return self._disk_cache.get(self._path, _PROCESSED_DF_KEY)
 
     def _get_df(self,
                 read_func: Callable,
                 apply_dtypes: bool,
                 force_reload: bool,
                 cache: bool,
+                columns: Optional[List[str]],
+                row_filter: Optional[DfFilter],
+                copy: bool,
                 **kwargs
                 ) -> pd.DataFrame:
+        if cache and (columns is not None or row_filter is not None):
+            raise ValueError('Cannot cache a DataFrame that was read with columns or row_filter')
         if force_reload:
             self._remove_cached_df()
 
-        if self._df is not None:
-            df = self._retrieve_cached_df()
+        df = None if force_reload else self._retrieve_cached_df()
+        if df is not None:
+            df = self._select(df, columns, row_filter)
+        elif self._disk_cache is not None and row_filter is None:
+            # Functions cannot be part of the disk cache key
+            df = self._read_df_via_disk_cache(read_func, apply_dtypes, columns, **kwargs)
         else:
             logger.info(f'Reading {self._path.name} as DataFrame')
-            df = read_func(apply_dtypes, **kwargs)
+            df = read_func(apply_dtypes, columns, row_filter, **kwargs)
 
         if cache:
-            self._cache_df_copy(df)
+            self._store_cached_df(df)
         else:
             self._remove_cached_df()
 
+        return df.copy(deep=True) if copy else df
+
+    def _read_df_via_disk_cache(self,
+                                read_func: Callable,
+                                apply_dtypes: bool,
+                                columns: Optional[List[str]],
+                                **kwargs
+                                ) -> pd.DataFrame:
+        key = self._disk_cache.make_key({
+            'read_func': read_func.__name__,
+            'apply_dtypes': apply_dtypes,
+            'params': self._params,
+            'columns': columns,
+            'kwargs': kwargs,
+        })
+        df = self._disk_cache.get(self._path, key)
+        if df is None:
+            logger.info(f'Reading {self._path.name} as DataFrame')
+            df = read_func(apply_dtypes, columns, None, **kwargs)
+            self._disk_cache.put(self._path, key, df)
         return df
 
-    def _read_csv_as_df(self, apply_dtypes: bool, **kwargs) -> pd.DataFrame:
+    def _read_csv_as_df(self,
+                        apply_dtypes: bool,
+                        columns: Optional[List[str]] = None,
+                        row_filter: Optional[DfFilter] = None,
+                        **kwargs
+                        ) -> pd.DataFrame:
+        full_kwargs = self._get_read_csv_kwargs(kwargs, columns)
+        parse_kwargs, cast = self._get_csv_parse_args(apply_dtypes, full_kwargs)
+        try:
+            return self._read_csv(full_kwargs, parse_kwargs, cast, row_filter)
+        except (ValueError, TypeError) as e:
+            if parse_kwargs['dtype'] == 'object':
+                raise
+            # E.g. a decimal value in an Int64 column. Reading all
+            # values as strings first leaves the conversion to astype.
+            logger.warning(f'Could not parse {self._path.name} with dtypes, '
+                           f'applying them after reading instead: {e}')
+            full_kwargs = dict(full_kwargs)
+            if full_kwargs.get('engine') == 'pyarrow':
+                # The pyarrow engine already failed on this file
+                del full_kwargs['engine']
+            return self._read_csv(full_kwargs, {'dtype': 'object'}, self._cast_dtypes,
+                                  row_filter)
+
+    def _read_csv(self,
+                  full_kwargs: Dict,
+                  parse_kwargs: Dict,
+                  cast: Cast,
+                  row_filter: Optional[DfFilter],
+                  ) -> pd.DataFrame:
+        full_kwargs = dict(full_kwargs)
+        # pyarrow reads the whole file at once, which defeats reading
+        # in chunks to filter rows
+        use_arrow = self._pop_arrow_engine(full_kwargs, supported=row_filter is None)
+        parse_ranges = None if use_arrow else self._get_parse_ranges(full_kwargs)
+        if parse_ranges is not None:
+            chunks = self._iter_csv_ranges(*parse_ranges, full_kwargs, parse_kwargs)
+        elif row_filter is not None:
+            chunks = self._iter_csv_chunks(full_kwargs, parse_kwargs, DEFAULT_CHUNKSIZE)
+        else:
+            df = self._read_csv_arrow(full_kwargs, parse_kwargs) if use_arrow else None
+            if df is None:
+                with self._open_source(full_kwargs) as source:
+                    df = pd.read_csv(source, **parse_kwargs, **full_kwargs)
+            return cast(df) if cast is not None else df
+        return concat_chunks(self._iter_chunks(chunks, cast, row_filter=row_filter))
+
+    def _iter_csv_chunks(self, full_kwargs: Dict, parse_kwargs: Dict, chunksize: int
+                         ) -> Generator[pd.DataFrame, None, None]:
+        full_kwargs = dict(full_kwargs)
+        with self._open_source(full_kwargs) as source:
+            reader = pd.read_csv(source, chunksize=chunksize, **parse_kwargs, **full_kwargs)
+            with closing(reader):
+                yield from reader
+
+    def _iter_csv_byte_range(self,
+                             start: int,
+                             end: int,
+                             first_row: int,
+                             apply_dtypes: bool,
+                             chunksize: Optional[int] = None,
+                             columns: Optional[List[str]] = None,
+                             row_filter: Optional[DfFilter] = None,
+                             **kwargs
+                             ) -> Generator[pd.DataFrame, None, None]:
+        # Chunks of a byte range of complete rows, which has no header.
+        # The index counts the rows from first_row on.
+        full_kwargs = self._get_read_csv_kwargs(kwargs, columns)
+        parse_kwargs, cast = self._get_csv_parse_args(apply_dtypes, full_kwargs)
+        self._pop_arrow_engine(full_kwargs, supported=False)
+        full_kwargs.pop('compression', None)
+        header_kwargs = {kw: value for kw, value in full_kwargs.items()
+                         if kw in _CSV_READER_PARAMS or kw == 'encoding'}
+        read_kwargs = {**parse_kwargs, **full_kwargs, 'header': None,
+                       'names': self.get_csv_fieldnames(**header_kwargs)}
+        with open_byte_range(self._path, start, end) as f:
+            reader = pd.read_csv(f, chunksize=chunksize or DEFAULT_CHUNKSIZE, **read_kwargs)
+            for chunk in self._iter_chunks(reader, cast, row_filter=row_filter):
+                chunk.index += first_row
+                yield chunk
+
+    def _get_parse_ranges(self, full_kwargs: Dict
+                          ) -> Optional[Tuple[List[str], List[Tuple[int, int]]]]:
+        # Get the column names and the byte ranges to parse in
+        # parallel, or None if the file should be read sequentially
+        workers = self._params.get('parse_workers')
+        if not workers or workers < 2:
+            return None
+        compression = full_kwargs.get('compression', self._params.get('compression', 'infer'))
+        # Also header=None and names=None, which still affect whether
+        # the first line is read as the header
+        positional = _POSITIONAL_READ_CSV_PARAMS.union(_HEADER_MOVING_PARAMS).intersection(
+            kw for kw, value in full_kwargs.items()
+            if value is not None or kw in ('header', 'names'))
+        if (get_compression(self._path, compression) is not None or positional
+                or '\n'.encode(full_kwargs['encoding']) != b'\n'):
+            logger.info(f'Cannot split {self._path.name} into byte ranges, '
+                        f'parsing it in a single process')
+            return None
+
+        quotechar = full_kwargs.get('quotechar') or '"'
+        with self._path.open('rb') as f:
+            header = next(iter_records(f, quotechar), None)
+        if header is None:
+            return None
+        header_offset, header_record = header
+        header_kwargs = {kw: value for kw, value in full_kwargs.items()
+                         if kw in _CSV_READER_PARAMS or kw in ('sep', 'encoding')}
+        names = list(pd.read_csv(io.BytesIO(header_record), nrows=0, **header_kwargs).columns)
+        ranges = get_record_ranges(
+            self._path,
+            start=header_offset + len(header_record),
+            range_size=self._params.get('parse_range_size') or _DEFAULT_PARSE_RANGE_SIZE,
+            quoted_newlines=self._params.get('quoted_newlines', False),
+            quotechar=quotechar,
+        )
+        if len(ranges) < 2:
+            return None
+        return names, ranges
+
+    def _iter_csv_ranges(self,
+                         names: List[str],
+                         ranges: List[Tuple[int, int]],
+                         full_kwargs: Dict,
+                         parse_kwargs: Dict,
+                         chunksize: Optional[int] = None,
+                         ) -> Generator[pd.DataFrame, None, None]:
+        # Chunks of chunksize rows (if provided), indexed by row number
+        # like the chunks of read_csv
+        read_kwargs = {**parse_kwargs, **full_kwargs, 'header': None, 'names': names}
+        read_kwargs.pop('compression', None)
+        dfs = iter_csv_ranges(self._path, ranges, read_kwargs, self._params['parse_workers'])
+        if chunksize is not None:
+            dfs = self._rechunk(dfs, chunksize)
+        n_rows = 0
+        for df in dfs:
+            df.index = pd.RangeIndex(n_rows, n_rows + len(df))
+            n_rows += len(df)
+            yield df
+
+    def _rechunk(self, dfs: Iterable[pd.DataFrame], chunksize: int
+                 ) -> Generator[pd.DataFrame, None, None]:
+        rest = None
+        for df in dfs:
+            if rest is not None:
+                df = concat_chunks([rest, df])
+            n_full = len(df) - len(df) % chunksize
+            for i in range(0, n_full, chunksize):
+                yield df.iloc[i:i + chunksize]
+            rest = df.iloc[n_full:] if n_full < len(df) else None
+        if rest is not None:
+            yield rest
+
+    def _read_sas_as_df(self,
+                        apply_dtypes: bool,
+                        columns: Optional[List[str]] = None,
+                        row_filter: Optional[DfFilter] = None,
+                        **kwargs
+                        ) -> pd.DataFrame:
+        full_kwargs = self._get_read_sas_kwargs(kwargs)
+        with self._open_source(full_kwargs) as source:
+            if columns is not None or row_filter is not None:
+                # read_sas cannot skip columns, so select them per chunk
+                # to limit the memory use
+                reader = pd.read_sas(source, chunksize=DEFAULT_CHUNKSIZE, **full_kwargs)
+                return concat_chunks(self._iter_chunks(
+                    reader, self._get_sas_cast(apply_dtypes), columns, row_filter))
+            df = pd.read_sas(source, **full_kwargs)
+        if apply_dtypes:
+            df = self._apply_dtypes(df)
+        return df
+
+    def _get_csv_parse_args(self, apply_dtypes: bool, full_kwargs: Dict
+                            ) -> Tuple[Dict, Cast]:
+        # Translate the source_config dtypes into read_csv arguments,
+        # so columns are parsed directly into their final dtype instead
+        # of as strings first. Returns these arguments and the cast
+        # that remains to be done after reading.
+        if not apply_dtypes or not self._has_dtypes():
+            return {'dtype': 'object'}, None
+        usecols = full_kwargs.get('usecols')
+        if (full_kwargs.get('names') is not None or 'header' in full_kwargs
+                or any(full_kwargs.get(kw) is not None for kw in _HEADER_MOVING_PARAMS)
+                or (usecols is not None and (callable(usecols)
+                                             or not all(isinstance(col, str) for col in usecols)))):
+            # The column names are not known up front, as the header is
+            # not the first line or columns are not selected by name
+            return {'dtype': 'object'}, self._cast_dtypes
+
+        fieldnames = self._get_csv_columns(full_kwargs)
+        dtypes = self.dtypes
+        date_formats = self.date_formats
+        dtype, parse_dates = {}, []
+        for col in fieldnames:
+            col_dtype = dtypes.get(col, 'object')
+            if _is_datetime(col_dtype):
+                # Formatted dates are converted after reading, as
+                # parse_dates only infers the format
+                dtype[col] = 'object'
+                if col not in date_formats:
+                    parse_dates.append(col)
+            else:
+                dtype[col] = col_dtype
+
+        date_dtypes = {col: col_dtype for col, col_dtype in dtypes.items()
+                       if _is_datetime(col_dtype)}
+        if not date_dtypes:
+            return {'dtype': dtype}, None
+
+        # Values that parse_dates cannot parse leave the column as
+        # strings, which should then fail like an astype would
+        def cast_dates(df: pd.DataFrame) -> pd.DataFrame:
+            return cast_dtypes(df, date_dtypes, date_formats)
+
+        return {'dtype': dtype, 'parse_dates': parse_dates}, cast_dates
+
+    def _get_csv_columns(self, full_kwargs: Dict) -> List[str]:
+        # Names of the columns that read_csv will return
+        header_kwargs = {kw: value for kw, value in full_kwargs.items()
+                         if kw in _CSV_READER_PARAMS or kw == 'encoding'}
+        fieldnames = self.get_csv_fieldnames(**header_kwargs)
+        usecols = full_kwargs.get('usecols')
+        if usecols is not None:
+            fieldnames = [col for col in fieldnames if col in set(usecols)]
+        return fieldnames
+
+    def _pop_arrow_engine(self, full_kwargs: Dict, supported: bool = True) -> bool:
+        # Remove engine='pyarrow' from the read_csv kwargs and return
+        # whether the file can be parsed with arrow_csv instead. The
+        # pandas pyarrow engine is not used, as its results differ
+        # from the other engines (e.g. dates and missing values).
+        if full_kwargs.get('engine') != 'pyarrow':
+            return False
+        del full_kwargs['engine']
+        if not arrow_csv.is_available():
+            logger.warning(f'pyarrow is not installed, parsing {self._path.name} '
+                           f'with the default engine')
+            return False
+        unsupported = sorted(kw for kw, value in full_kwargs.items()
+                             if value is not None and kw != 'compression'
+                             and kw not in arrow_csv.READ_CSV_PARAMS)
+        if isinstance(full_kwargs.get('na_values'), dict):
+            unsupported.append('na_values per column')
+        if not supported or unsupported:
+            reason = f' because of {", ".join(unsupported)}' if unsupported else ''
+            logger.info(f'Cannot parse {self._path.name} with the pyarrow engine{reason}, '
+                        f'using the default engine')
+            return False
+        return True
+
+    def _read_csv_arrow(self, full_kwargs: Dict, parse_kwargs: Dict
+                        ) -> Optional[pd.DataFrame]:
+        # Returns None if pyarrow cannot parse the file, e.g. if rows
+        # have fewer values than the header, which read_csv allows
+        dtype = parse_kwargs['dtype']
+        if isinstance(dtype, str):
+            dtype = {col: dtype for col in self._get_csv_columns(full_kwargs)}
+        missing = set(full_kwargs.get('usecols') or []).difference(dtype)
+        if missing:
+            raise ValueError(f'Columns not found in {self._path.name}: '
+                             f'{", ".join(sorted(missing))}')
+        arrow_kwargs = {kw: value for kw, value in full_kwargs.items()
+                        if kw in arrow_csv.READ_CSV_PARAMS and kw not in ('sep', 'usecols')}
+        if full_kwargs.get('sep') is not None:
+            arrow_kwargs.setdefault('delimiter', full_kwargs['sep'])
+        try:
+            with self._open_source(dict(full_kwargs)) as source:
+                df = arrow_csv.read_csv(source, dtype, **arrow_kwargs)
+        except arrow_csv.ArrowInvalid as e:
+            logger.info(f'Could not parse {self._path.name} with the pyarrow engine, '
+                        f'using the default engine: {e}')
+            return None
+        # E.g. from the nullable Int64 pyarrow returns to Int8
+        return cast_dtypes(df, {col: col_dtype for col, col_dtype in dtype.items()
+                                if col_dtype != 'object' and df[col].dtype != col_dtype})
+
+    def _get_sas_cast(self, apply_dtypes: bool) -> Cast:
+        if apply_dtypes and self._has_dtypes():
+            return self._cast_dtypes
+        return None
+
+    @contextmanager
+    def _open_source(self, full_kwargs: Dict) -> ContextManager[Union[Path, IO]]:
+        # Provide the file to the pandas readers, which are given a
+        # decompressed stream of compressed files. The compression
+        # kwarg is consumed here, so pandas doesn't decompress again.
+        compression = full_kwargs.pop('compression', self._params.get('compression', 'infer'))
+        compression = get_compression(self._path, compression)
+        if compression is None:
+            yield self._path
+            return
+        with open_file(self._path, compression=compression) as f:
+            yield f
+
+    def _get_read_csv_kwargs(self, kwargs: Dict, columns: Optional[List[str]] = None) -> Dict:
+        # Combine config params and call kwargs for pandas.read_csv
         config_kwargs = {kw: self._params.get(kw) for kw in self._params
                          if kw in _READ_CSV_PARAMS}
         full_kwargs = {**config_kwargs, **kwargs}
+        if columns is not None:
+            full_kwargs['usecols'] = columns
         self._check_missing_params(params=full_kwargs, required=['delimiter', 'encoding'])
-        df = pd.read_csv(self._path, dtype='object', **full_kwargs)
-        if apply_dtypes:
-            df = self._apply_dtypes(df)
-        return df
+        return full_kwargs
 
-    def _read_sas_as_df(self, apply_dtypes: bool, **kwargs) -> pd.DataFrame:
+    def _get_read_sas_kwargs(self, kwargs: Dict) -> Dict:
+        # Combine config params and call kwargs for pandas.read_sas
         config_kwargs = {kw: self._params.get(kw) for kw in self._params
                          if kw in _READ_SAS_PARAMS}
         full_kwargs = {**config_kwargs, **kwargs}
         self._check_missing_params(params=full_kwargs, required=['encoding'])
-        df = pd.read_sas(self._path, **full_kwargs)
-        if apply_dtypes:
-            df = self._apply_dtypes(df)
-        return df
+        if full_kwargs.get('format') is None and self.compression is not None:
+            # read_sas can only infer the format from the file name of
+            # uncompressed files
+            full_kwargs['format'] = _SAS_FORMATS.get(Path(self._path.stem).suffix.lower())
+        return full_kwargs
 
     def _check_missing_params(self, params: Dict, required: List[str]) -> None:
         missing = [kw for kw in required if params.get(kw) is None]
@@ -242,22 +866,63 @@ class SourceFile:
 
     def _apply_dtypes(self, df: pd.DataFrame, **kwargs) -> pd.DataFrame:
         # Apply source_config dtypes to the columns in the DataFrame.
-        if not self.dtypes:
-            logger.warning(f'No dtypes were found in source config for {self._path}')
+        if not self._has_dtypes():
             return df
         logger.info('Applying dtypes')
-        # The object dtype cannot be directly converted to Int64, so we
-        # first convert to float64
-        int_cols = [col for col, dtype in self.dtypes.items() if dtype.startswith('Int')]
-        df[int_cols] = df[int_cols].astype('float64')
-        return df.astype(self.dtypes, **kwargs)
+        return self._cast_dtypes(df, **kwargs)
+
+    def _has_dtypes(self) -> bool:
+        if not self._params.get('dtypes'):
+            logger.warning(f'No dtypes were found in source config for {self._path}')
+            return False
+        return True
+
+    def _cast_dtypes(self, df: pd.DataFrame, **kwargs) -> pd.DataFrame:
+        return cast_dtypes(df, self.dtypes, self.date_formats, **kwargs)
+
+    def profile_dtypes(self, sample_rows: int = DEFAULT_SAMPLE_ROWS) -> DtypeProfile:
+        """
+        Propose compact dtypes for the columns of a delimited text file.
+
+        The proposal is based on the first sample_rows rows of the
+        file. Applying the dtypes may fail for later rows, e.g. if an
+        integer column contains a decimal value further on. Integers
+        are only proposed as a smaller dtype than 'Int64' if the
+        sample holds the whole file.
+
+        Parameters
+        ----------
+        sample_rows : int, default 100000
+            Number of rows to read from the file.
+
+        Returns
+        -------
+        DtypeProfile
+            The proposed dtypes and the memory usage of the sample with
+            and without them.
+        """
+        logger.info(f'Profiling dtypes of {self._path.name}')
+        sample, complete = self._read_dtype_sample(sample_rows)
+        dtypes = propose_dtypes(sample, complete)
+        profiled = cast_dtypes(sample.copy(), dtypes)
+        return DtypeProfile(source_name=self._path.name, dtypes=dtypes,
+                            n_sample_rows=len(sample), complete=complete,
+                            object_bytes=get_size(sample), profiled_bytes=get_size(profiled))
+
+    def _read_dtype_sample(self, sample_rows: int) -> Tuple[pd.DataFrame, bool]:
+        # The first sample_rows rows as strings, and whether these are
+        # all rows. One extra row tells whether the file has more rows.
+        sample = self._read_csv_as_df(apply_dtypes=False, nrows=sample_rows + 1)
+        return sample.iloc[:sample_rows], len(sample) <= sample_rows
 
     def get_line_count(self) -> Optional[int]:
         """
         Get the line count of the file (excluding header).
 
         Only if the file is explicitly specified as not binary in the
-        source_config, will the line count be calculated.
+        source_config, will the line count be calculated. If
+        quoted_newlines is set to True in the source_config, newlines
+        within quoted values are not counted.
 
         Returns
         -------
@@ -267,7 +932,12 @@ class SourceFile:
         if is_binary is False:
             try:
                 logger.debug(f'Reading value separated file {self.path.name}')
-                n_rows = get_file_line_count(self.path)
+                n_rows = get_file_line_count(
+                    self.path,
+                    quoted_newlines=self._params.get('quoted_newlines', False),
+                    quotechar=self._params.get('quotechar') or '"',
+                    compression=self.compression,
+                )
             except Exception as e:
                 logger.error(f'Could not read contents of source file: {self.path.name}')
                 logger.error(e)
@@ -279,7 +949,115 @@ class SourceFile:
                            f'in the source config. Skipping line count calculation.')
         return None
 
-    def get_csv_as_generator_of_dicts(self, **kwargs) -> Generator[OrderedDict, None, None]:
+    def build_index(self, key_columns: Union[str, List[str]], rebuild: bool = False
+                    ) -> FileIndex:
+        """
+        Index the records of the file by key, for lookups via lookup.
+
+        The byte offsets of the records are stored per key in a hidden
+        side file in the disk cache dir (if configured) or next to the
+        source file. An existing index is reused, unless the file has
+        changed since it was built. Compressed files cannot be indexed.
+
+        Parameters
+        ----------
+        key_columns : str or list of str
+            Name(s) of the column(s) that together form the key.
+        rebuild : bool, default False
+            If True, always rebuild the index.
+
+        Returns
+        -------
+        FileIndex
+        """
+        if self.compression is not None:
+            raise ValueError(f'Cannot index compressed file {self._path.name}')
+        if isinstance(key_columns, str):
+            key_columns = [key_columns]
+        self._check_missing_params(params=self._params, required=['delimiter', 'encoding'])
+        dialect_params = {kw: value for kw, value in self._params.items()
+                          if kw in _CSV_READER_PARAMS}
+        index_dir = self._disk_cache.cache_dir if self._disk_cache else self._path.parent
+
+        if self._index is not None:
+            self._index.close()
+        self._index = FileIndex(self._path, get_index_path(index_dir, self._path, key_columns),
+                                key_columns, self._params['encoding'],
+                                self._params.get('fieldnames'), self._params.get('restkey'),
+                                self._params.get('restval'), **dialect_params)
+        if rebuild or not self._index.is_current():
+            self._index.build()
+        else:
+            logger.info(f'Using existing index of {self._path.name}')
+        return self._index
+
+    def delta_reader(self, name: str) -> DeltaReader:
+        """
+        Get a reader of the rows appended since the last run of name.
+
+        For append-only files, e.g. daily growing logs, so incremental
+        loads only process the new rows. The progress per name is
+        stored in a hidden state file in the cache_dir, or else next to
+        the source file. The reader must be used as a context manager,
+        and the progress is only updated when the with block exits
+        without an exception.
+
+        Parameters
+        ----------
+        name : str
+            Name of the process reading the file, e.g. the name of the
+            transformation.
+
+        Returns
+        -------
+        DeltaReader
+        """
+        state_dir = self._disk_cache.cache_dir if self._disk_cache else self._path.parent
+        return DeltaReader(self, name, get_delta_state_path(state_dir, self._path))
+
+    def lookup(self, key: Key) -> List[Dict[str, str]]:
+        """
+        Get all records matching a key from the file index.
+
+        Requires the index to be built first via build_index.
+
+        Parameters
+        ----------
+        key : str or tuple of str
+            The key value, or a tuple of values in case of multiple key
+            columns. Values are compared as they appear in the file.
+
+        Returns
+        -------
+        list of dict
+            The matching records in file order, as returned by
+            get_csv_as_generator_of_dicts.
+        """
+        if self._index is None:
+            raise ValueError(f'No index was built for {self._path.name}')
+        return self._index.lookup(key)
+
+    def get_checksum(self, algorithm: str = 'md5') -> str:
+        """
+        Get the checksum of the (decompressed) file contents.
+
+        Parameters
+        ----------
+        algorithm : str, default 'md5'
+            Any hashlib algorithm, e.g. the faster 'blake2b'.
+
+        Returns
+        -------
+        str
+        """
+        return get_file_checksum(self.path, compression=self.compression, algorithm=algorithm)
+
+    def get_csv_as_generator_of_dicts(self,
+                                      columns: Optional[List[str]] = None,
+                                      row_filter: Optional[RecordFilter] = None,
+                                      prefetch: int = 0,
+                                      **kwargs
+                                      ) -> Generator[OrderedDict, None, None]:
         """
         Return delimited text file as a generator of OrderedDicts.
 
@@ -288,6 +1066,14 @@ class SourceFile:
 
         Parameters
         ----------
+        columns : list of str, optional
+            Names of the columns to include in the records.
+        row_filter : callable, optional
+            Function that takes a record (with the selected columns)
+            and returns True if it should be kept.
+        prefetch : int, default 0
+            Number of records to read ahead in a background thread,
+            while the current records are processed.
         **kwargs
             Additional keyword arguments are passed on directly to the
             csv module's DictReader.
@@ -297,20 +1083,200 @@ class SourceFile:
         OrderedDict generator
         """
         logger.info(f'Reading {self._path.name} as csv records')
+        records = self._read_csv_records(columns, row_filter, **kwargs)
+        yield from helper.prefetch(records, prefetch, PREFETCH_BATCH_SIZE)
+
+    def _read_csv_records(self,
+                          columns: Optional[List[str]] = None,
+                          row_filter: Optional[RecordFilter] = None,
+                          byte_range: Optional[Tuple[int, int]] = None,
+                          **kwargs
+                          ) -> Generator[OrderedDict, None, None]:
+        # A byte range (of complete rows) is read without the header
         full_kwargs = {**self._params, **kwargs}
         self._check_missing_params(params=full_kwargs, required=['delimiter', 'encoding'])
         dict_reader_params = {kw: full_kwargs.get(kw) for kw in full_kwargs
                               if kw in _FULL_CSV_PARAMS}
 
-        with self.path.open('r', encoding=full_kwargs['encoding']) as f:
+        if byte_range is None:
+            f = open_file(self.path, 'r', self.compression, encoding=full_kwargs['encoding'])
+        else:
+            dict_reader_params['fieldnames'] = self.get_csv_fieldnames(**kwargs)
+            f = io.TextIOWrapper(open_byte_range(self._path, *byte_range),
+                                 encoding=full_kwargs['encoding'], newline='')
+        with f:
             reader = csv.DictReader(f, **dict_reader_params)
-            for row in reader:
+            if columns is not None:
+                columns = self._get_column_selection(reader.fieldnames or [], columns)
+            yield from self._select_records(reader, columns, row_filter)
+
+    @staticmethod
+    def _select_records(records: Iterable[OrderedDict],
+                        columns: Optional[List[str]],
+                        row_filter: Optional[RecordFilter],
+                        ) -> Generator[OrderedDict, None, None]:
+        for row in records:
+            if columns is not None:
+                row = {col: row[col] for col in columns}
+            if row_filter is None or row_filter(row):
                 yield row
 
+    def get_csv_fieldnames(self, **kwargs) -> List[str]:
+        """
+        Return the column names of a delimited text file.
+
+        Parameters
+        ----------
+        **kwargs
+            Additional keyword arguments are passed on directly to the
+            csv module's reader.
+
+        Returns
+        -------
+        list of str
+            The header row, or the fieldnames from the source_config or
+            kwargs if provided.
+        """
+        full_kwargs = {**self._params, **kwargs}
+        if full_kwargs.get('fieldnames'):
+            return list(full_kwargs['fieldnames'])
+        self._check_missing_params(params=full_kwargs, required=['delimiter', 'encoding'])
+        reader_params = {kw: full_kwargs.get(kw) for kw in full_kwargs
+                         if kw in _CSV_READER_PARAMS}
+        with open_file(self.path, 'r', self.compression, encoding=full_kwargs['encoding'],
+                       newline='') as f:
+            return next(csv.reader(f, **reader_params), [])
+
+    def get_csv_as_generator_of_tuples(self,
+                                       named: bool = False,
+                                       batch_size: Optional[int] = None,
+                                       columns: Optional[List[str]] = None,
+                                       row_filter: Optional[TupleFilter] = None,
+                                       prefetch: int = 0,
+                                       **kwargs
+                                       ) -> Generator[Union[Tuple, List[Tuple]], None, None]:
+        """
+        Return delimited text file as a generator of tuples.
+
+        Creating a tuple per row is considerably faster than creating a
+        dictionary, making this the preferred reader for streaming
+        large files when values can be accessed by position.
+
+        Parameters
+        ----------
+        named : bool, default False
+            If True, return namedtuples with the column names as field
+            names. Invalid names (e.g. Python keywords) are replaced by
+            positional names.
+        batch_size : int, optional
+            If provided, yield lists of up to batch_size rows instead
+            of individual rows.
+        columns : list of str, optional
+            Names of the columns to include in the tuples. The columns
+            keep the order of the file.
+        row_filter : callable, optional
+            Function that takes a row tuple (with the selected columns)
+            and returns True if it should be kept.
+        prefetch : int, default 0
+            Number of rows (or batches, if batch_size is provided) to
+            read ahead in a background thread, while the current rows
+            are processed.
+        **kwargs
+            Additional keyword arguments are passed on directly to the
+            csv module's reader. If fieldnames is provided, the first
+            row of the file is not used as header. Like in the csv
+            module's DictReader, rows with fewer values than the header
+            are filled with restval (default None). If restkey is
+            provided, the values beyond the header are added as a list
+            in an extra column with that name, otherwise they are
+            dropped.
+
+        Returns
+        -------
+        tuple or list of tuples generator
+        """
+        logger.info(f'Reading {self._path.name} as csv tuples')
+        rows = self._read_csv_tuples(named, batch_size, columns, row_filter, **kwargs)
+        yield from helper.prefetch(rows, prefetch,
+                                   PREFETCH_BATCH_SIZE if batch_size is None else 1)
+
+    def _read_csv_tuples(self,
+                         named: bool = False,
+                         batch_size: Optional[int] = None,
+                         columns: Optional[List[str]] = None,
+                         row_filter: Optional[TupleFilter] = None,
+                         **kwargs
+                         ) -> Generator[Union[Tuple, List[Tuple]], None, None]:
+        full_kwargs = {**self._params, **kwargs}
+        self._check_missing_params(params=full_kwargs, required=['delimiter', 'encoding'])
+        reader_params = {kw: full_kwargs.get(kw) for kw in full_kwargs
+                         if kw in _CSV_READER_PARAMS}
+
+        with open_file(self.path, 'r', self.compression, encoding=full_kwargs['encoding'],
+                       newline='') as f:
+            reader = csv.reader(f, **reader_params)
+            header = list(full_kwargs.get('fieldnames') or next(reader, []))
+            # Like DictReader, skip empty rows
+            rows = filter(None, reader)
+            restkey = full_kwargs.get('restkey')
+            rows = self._fit_rows(rows, len(header), restkey, full_kwargs.get('restval'))
+            if restkey is not None:
+                header.append(restkey)
+
+            if columns is not None:
+                columns = self._get_column_selection(header, columns)
+                rows = map(self._get_row_getter([header.index(col) for col in columns]), rows)
+                header = columns
+            if named:
+                rows = map(namedtuple('Row', header, rename=True)._make, rows)
+            else:
+                rows = map(tuple, rows)
+            if row_filter is not None:
+                rows = filter(row_filter, rows)
+
+            if batch_size is None:
+                yield from rows
+            else:
+                batch = list(islice(rows, batch_size))
+                while batch:
+                    yield batch
+                    batch = list(islice(rows, batch_size))
+
+    def _fit_rows(self, rows: Iterable[List[str]], width: int, restkey: Optional[str],
+                  restval: Optional[str]) -> Generator[List, None, None]:
+        # Give all rows the width of the header, with the missing and
+        # extra values handled like DictReader does
+        warned = False
+        for row in rows:
+            if len(row) < width:
+                row += [restval] * (width - len(row))
+            if restkey is not None:
+                row[width:] = [row[width:]]
+            elif len(row) > width:
+                if not warned:
+                    logger.warning(f'Dropping values beyond the header in {self._path.name}, '
+                                   f'provide restkey to keep them')
+                    warned = True
+                del row[width:]
+            yield row
+
+    @staticmethod
+    def _get_row_getter(indexes: List[int]) -> Callable[[List], Tuple]:
+        # itemgetter returns a bare value rather than a tuple for a
+        # single index
+        if len(indexes) == 1:
+            index = indexes[0]
+            return lambda row: (row[index],)
+        return itemgetter(*indexes)
+
     def get_csv_as_list_of_dicts(self,
                                  cache: bool = False,
+                                 columns: Optional[List[str]] = None,
+                                 row_filter: Optional[RecordFilter] = None,
+                                 copy: bool = False,
+                                 compact: Optional[bool] = None,
                                  **kwargs
-                                 ) -> List[OrderedDict]:
+                                 ) -> Union[List[OrderedDict], ColumnarRecords]:
         """
         Return a delimited text file as a list of OrderedDicts.
 
@@ -321,31 +1287,130 @@ class SourceFile:
         ----------
         cache : bool, default False
             If True, keep the full list of dictionaries in memory for
-            future use.
+            future use. Cannot be combined with columns or row_filter.
+        columns : list of str, optional
+            Names of the columns to include in the records.
+        row_filter : callable, optional
+            Function that takes a record (with the selected columns)
+            and returns True if it should be kept.
+        copy : bool, default False
+            If True, return copies of the records. The cached records
+            are shared with the returned list, so use this if you
+            intend to modify the records while they are cached.
+        compact : bool, optional
+            If True, return the records as ColumnarRecords: read-only
+            mappings backed by column lists that share equal strings,
+            which take far less memory when cached. Defaults to the
+            compact_records option of the source_config.
         **kwargs
             Additional keyword arguments are passed on directly to the
             csv module's DictReader.
 
         Returns
         -------
-        list of OrderedDict or dict
+        list of OrderedDict or dict, or ColumnarRecords
         """
-        if self._csv:
-            csv_records = self._retrieve_cached_csv()
+        if compact is None:
+            compact = bool(self._params.get('compact_records', False))
+        if cache and (columns is not None or row_filter is not None):
+            raise ValueError('Cannot cache csv records that were read with columns or row_filter')
+        csv_records = self._retrieve_cached_csv()
+        if csv_records is not None:
+            if columns is not None and csv_records:
+                columns = self._get_column_selection(csv_records[0].keys(), columns)
+            if columns is not None or row_filter is not None:
+                csv_records = list(self._select_records(csv_records, columns, row_filter))
         else:
             logger.info(f'Reading {self._path.name} as csv records')
-            full_kwargs = {**self._params, **kwargs}
-            self._check_missing_params(params=full_kwargs, required=['delimiter', 'encoding'])
-            dict_reader_params = {kw: full_kwargs.get(kw) for kw in full_kwargs
-                                  if kw in _FULL_CSV_PARAMS}
+            csv_records = self._read_csv_records(columns, row_filter, **kwargs)
+            if not compact:
+                csv_records = list(csv_records)
 
-            with self.path.open('r', encoding=full_kwargs['encoding']) as f:
-                reader = csv.DictReader(f, **dict_reader_params)
-                csv_records = list(reader)
+        if compact and not isinstance(csv_records, ColumnarRecords):
+            try:
+                csv_records = ColumnarRecords.from_records(csv_records)
+            except ValueError as e:
+                raise ValueError(f'Cannot store the records of {self._path.name} '
+                                 f'compactly: {e}') from e
+        elif not compact and isinstance(csv_records, ColumnarRecords):
+            csv_records = csv_records.to_list()
 
         if cache:
-            self._cache_csv_copy(csv_records)
+            self._store_cached_csv(csv_records)
         else:
             self._remove_cached_csv()
 
+        if copy:
+            return [row.copy() for row in csv_records]
         return csv_records
+
+
+def concat_chunks(chunks: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenate DataFrame chunks, keeping categorical columns.
+
+    Categorical columns would become object columns if the categories
+    differ between the chunks, so their categories are combined.
+
+    Parameters
+    ----------
+    chunks : iterable of pandas.DataFrame
+        Chunks with the same columns.
+
+    Returns
+    -------
+    pandas.DataFrame
+        With a new index, unless there is only a single chunk.
+    """
+    chunks = list(chunks)
+    if len(chunks) == 1:
+        return chunks[0]
+    df = pd.concat(chunks, ignore_index=True)
+    for col in chunks[0].columns:
+        if (isinstance(chunks[0][col].dtype, pd.CategoricalDtype)
+                and not isinstance(df[col].dtype, pd.CategoricalDtype)):
+            df[col] = union_categoricals([chunk[col] for chunk in chunks],
+                                         sort_categories=True)
+    return df
+
+
+def cast_dtypes(df: pd.DataFrame,
+                dtypes: Dict[str, str],
+                date_formats: Optional[Dict[str, str]] = None,
+                **kwargs
+                ) -> pd.DataFrame:
+    """
+    Cast the columns of a DataFrame to source config dtypes.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+    dtypes : dict of {str : str}
+        dtype by column name. Columns not present in the DataFrame
+        are skipped.
+    date_formats : dict of {str : str}, optional
+        strftime format by column name, used to parse the values of
+        columns with a datetime dtype.
+    **kwargs
+        Additional keyword arguments are passed on directly to
+        pandas.DataFrame.astype.
+
+    Returns
+    -------
+    pandas.DataFrame
+    """
+    dtypes = {col: dtype for col, dtype in dtypes.items() if col in df.columns}
+    for col, date_format in (date_formats or {}).items():
+        if col in dtypes and _is_datetime(dtypes[col]):
+            errors = 'ignore' if kwargs.get('errors') == 'ignore' else 'raise'
+            df[col] = pd.to_datetime(df[col], format=date_format, errors=errors)
+    # The object dtype cannot be directly converted to Int64, so we
+    # first convert to float64
+    int_cols = [col for col, dtype in dtypes.items()
+                if dtype.startswith('Int') and df[col].dtype == object]
+    df[int_cols] = df[int_cols].astype('float64')
+    return df.astype(dtypes, **kwargs)
+
+
+def _is_datetime(dtype: str) -> bool:
+    return str(dtype).startswith('datetime64')
@@ -0,0 +1,303 @@
+"""Source table module."""
+
+import logging
+from collections import namedtuple
+from copy import deepcopy
+from typing import Dict, Optional, List, Generator, Tuple, Union
+
+import pandas as pd
+from sqlalchemy import Table, MetaData, select, func
+from sqlalchemy.engine import Engine
+
+from .source_file import (cast_dtypes, concat_chunks, DfFilter, RecordFilter, TupleFilter,
+                          PREFETCH_BATCH_SIZE)
+from ...util import helper
+
+logger = logging.getLogger(__name__)
+
+
+_DEFAULT_FETCH_SIZE = 10000
+
+
+class SourceTable:
+    """
+    Source database table handler.
+
+    Offers the same ways of reading data as SourceFile. Rows are
+    streamed from the database via a server-side cursor (if supported
+    by the database driver), so only fetch_size rows are kept in
+    memory at a time by the streaming readers.
+
+    Parameters
+    ----------
+    name : str
+        Name of the table, optionally prefixed by its schema, e.g.
+        'staging.patients'.
+    engine : sqlalchemy.engine.Engine
+        Engine of the database containing the table.
+    params : dict
+        Config options describing the source table properties, e.g.
+        fetch_size and dtypes.
+    """
+
+    def __init__(self, name: str, engine: Engine, params: Dict):
+        self._name = name
+        self._engine = engine
+        self._params = params
+        self._table: Optional[Table] = None
+
+    def __repr__(self):
+        """Name and table parameters."""
+        return f'name={self.name}\n' + 'parameters=' + str(self._params)
+
+    @property
+    def name(self) -> str:
+        """Read-only source table name."""
+        return self._name
+
+    @property
+    def config(self) -> Dict:
+        """Read-only copy of config parameters."""
+        return deepcopy(self._params)
+
+    @property
+    def dtypes(self) -> Dict:
+        """Read-only copy of specified dtypes."""
+        return deepcopy(self._params.get('dtypes', {}))
+
+    @property
+    def fetch_size(self) -> int:
+        """Number of rows fetched from the database at once."""
+        return self._params.get('fetch_size') or _DEFAULT_FETCH_SIZE
+
+    @property
+    def table(self) -> Table:
+        """Table as reflected from the database."""
+        if self._table is None:
+            schema, _, table_name = self._name.rpartition('.')
+            self._table = Table(table_name, MetaData(), schema=schema or None,
+                                autoload=True, autoload_with=self._engine)
+        return self._table
+
+    def get_table_as_df(self,
+                        apply_dtypes: bool,
+                        columns: Optional[List[str]] = None,
+                        row_filter: Optional[DfFilter] = None,
+                        ) -> pd.DataFrame:
+        """
+        Return the table as a pandas.DataFrame.
+
+        Parameters
+        ----------
+        apply_dtypes : bool
+            Apply source_config dtypes to the columns in the DataFrame.
+            If False, dtypes are inferred from the values.
+        columns : list of str, optional
+            Names of the columns to read, other columns are skipped.
+        row_filter : callable, optional
+            Function that takes a DataFrame and returns a boolean Series
+            of the rows to keep. Applied per fetched chunk (after
+            applying dtypes).
+
+        Returns
+        -------
+        pandas.DataFrame
+        """
+        logger.info(f'Reading {self._name} as DataFrame')
+        return concat_chunks(self._iter_chunks(apply_dtypes, self.fetch_size, columns,
+                                               row_filter))
+
+    def iter_table_as_df(self,
+                         apply_dtypes: bool,
+                         chunksize: Optional[int] = None,
+                         columns: Optional[List[str]] = None,
+                         row_filter: Optional[DfFilter] = None,
+                         prefetch: int = 0,
+                         ) -> Generator[pd.DataFrame, None, None]:
+        """
+        Return the table as a generator of DataFrame chunks.
+
+        Parameters
+        ----------
+        apply_dtypes : bool
+            Apply source_config dtypes to the columns of each chunk.
+            If False, dtypes are inferred from the values.
+        chunksize : int, optional
+            Maximum number of rows per chunk. Defaults to the
+            fetch_size.
+        columns : list of str, optional
+            Names of the columns to read, other columns are skipped.
+        row_filter : callable, optional
+            Function that takes a DataFrame chunk and returns a boolean
+            Series of the rows to keep. Applied after dtypes.
+        prefetch : int, default 0
+            Number of chunks to fetch ahead in a background thread,
+            while the current chunk is processed.
+
+        Yields
+        ------
+        pandas.DataFrame
+        """
+        logger.info(f'Reading {self._name} as DataFrame chunks')
+        chunks = self._iter_chunks(apply_dtypes, chunksize or self.fetch_size, columns,
+                                   row_filter)
+        yield from helper.prefetch(chunks, prefetch)
+
+    def _iter_chunks(self,
+                     apply_dtypes: bool,
+                     chunksize: int,
+                     columns: Optional[List[str]],
+                     row_filter: Optional[DfFilter],
+                     ) -> Generator[pd.DataFrame, None, None]:
+        if apply_dtypes and not self.dtypes:
+            logger.warning(f'No dtypes were found in source config for {self._name}')
+            apply_dtypes = False
+        column_names = columns if columns is not None else [c.name for c in self.table.columns]
+        is_empty = True
+        for rows in self._fetch(columns, chunksize):
+            is_empty = False
+            chunk = pd.DataFrame.from_records(rows, columns=column_names)
+            if apply_dtypes:
+                chunk = cast_dtypes(chunk, self.dtypes)
+            if row_filter is not None:
+                chunk = chunk[row_filter(chunk)]
+            yield chunk
+        if is_empty:
+            yield pd.DataFrame(columns=column_names)
+
+    def get_table_as_generator_of_dicts(self,
+                                        columns: Optional[List[str]] = None,
+                                        row_filter: Optional[RecordFilter] = None,
+                                        prefetch: int = 0,
+                                        ) -> Generator[Dict, None, None]:
+        """
+        Return the table as a generator of dictionaries.
+
+        Parameters
+        ----------
+        columns : list of str, optional
+            Names of the columns to include in the records.
+        row_filter : callable, optional
+            Function that takes a record and returns True if it should
+            be kept.
+        prefetch : int, default 0
+            Number of records to fetch ahead in a background thread,
+            while the current records are processed.
+
+        Returns
+        -------
+        dict generator
+        """
+        logger.info(f'Reading {self._name} as records')
+        records = self._read_records(columns, row_filter)
+        yield from helper.prefetch(records, prefetch, PREFETCH_BATCH_SIZE)
+
+    def _read_records(self,
+                      columns: Optional[List[str]],
+                      row_filter: Optional[RecordFilter],
+                      ) -> Generator[Dict, None, None]:
+        column_names = columns if columns is not None else [c.name for c in self.table.columns]
+        for rows in self._fetch(columns):
+            records = (dict(zip(column_names, row)) for row in rows)
+            yield from filter(row_filter, records) if row_filter else records
+
+    def get_table_as_generator_of_tuples(self,
+                                         named: bool = False,
+                                         batch_size: Optional[int] = None,
+                                         columns: Optional[List[str]] = None,
+                                         row_filter: Optional[TupleFilter] = None,
+                                         prefetch: int = 0,
+                                         ) -> Generator[Union[Tuple, List[Tuple]], None, None]:
+        """
+        Return the table as a generator of tuples.
+
+        Parameters
+        ----------
+        named : bool, default False
+            If True, return namedtuples with the column names as field
+            names. Invalid names (e.g. Python keywords) are replaced by
+            positional names.
+        batch_size : int, optional
+            If provided, yield lists of up to batch_size rows instead
+            of individual rows.
+        columns : list of str, optional
+            Names of the columns to include in the tuples.
+        row_filter : callable, optional
+            Function that takes a row tuple and returns True if it
+            should be kept.
+        prefetch : int, default 0
+            Number of rows (or batches, if batch_size is provided) to
+            fetch ahead in a background thread, while the current rows
+            are processed.
+
+        Returns
+        -------
+        tuple or list of tuples generator
+        """
+        logger.info(f'Reading {self._name} as tuples')
+        rows = self._read_tuples(named, batch_size, columns, row_filter)
+        yield from helper.prefetch(rows, prefetch,
+                                   PREFETCH_BATCH_SIZE if batch_size is None else 1)
+
+    def _read_tuples(self,
+                     named: bool,
+                     batch_size: Optional[int],
+                     columns: Optional[List[str]],
+                     row_filter: Optional[TupleFilter],
+                     ) -> Generator[Union[Tuple, List[Tuple]], None, None]:
+        column_names = columns if columns is not None else [c.name for c in self.table.columns]
+        make_row = namedtuple('Row', column_names, rename=True)._make if named else tuple
+        batch = []
+        for rows in self._fetch(columns, batch_size):
+            rows = map(make_row, rows)
+            if row_filter is not None:
+                rows = filter(row_filter, rows)
+            if batch_size is None:
+                yield from rows
+                continue
+            batch.extend(rows)
+            if len(batch) >= batch_size:
+                yield batch[:batch_size]
+                batch = batch[batch_size:]
+        if batch:
+            yield batch
+
+    def _fetch(self, columns: Optional[List[str]], fetch_size: Optional[int] = None
+               ) -> Generator[List, None, None]:
+        if columns is not None:
+            missing = set(columns).difference(self.table.columns.keys())
+            if missing:
+                raise ValueError(f'Columns not found in {self._name}: '
+                                 f'{", ".join(sorted(missing))}')
+            statement = select([self.table.columns[col] for col in columns])
+        else:
+            statement = select([self.table])
+        fetch_size = fetch_size or self.fetch_size
+        with self._engine.connect() as conn:
+            result = conn.execution_options(stream_results=True).execute(statement)
+            try:
+                rows = result.fetchmany(fetch_size)
+                while rows:
+                    yield rows
+                    rows = result.fetchmany(fetch_size)
+            finally:
+                result.close()
+
+    def get_row_count(self) -> Optional[int]:
+        """
+        Get the number of rows in the table.
+
+        Returns
+        -------
+        int or None
+            None if the table could not be read.
+        """
+        try:
+            with self._engine.connect() as conn:
+                n_rows = conn.execute(select([func.count()]).select_from(self.table)).scalar()
+        except Exception as e:
+            logger.error(f'Could not count the rows of source table: {self._name}')
+            logger.error(e)
+            return None
+        logger.info(f'{n_rows} data rows were counted in {self._name}')
+        return n_rows
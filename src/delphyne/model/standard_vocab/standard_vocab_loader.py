@@ -118,7 +118,7 @@ class StandardVocabLoader:
                 statement = f"COPY {table} FROM STDIN WITH DELIMITER E'\t' CSV HEADER QUOTE E'\b';"
                 with vocab_file.open('rb') as f:
                     cursor.copy_expert(sql=statement, file=f)
-                transformation_metadata.insertion_counts += Counter({table: cursor.rowcount})
+                transformation_metadata.add_counts(insertions=Counter({table: cursor.rowcount}))
                 cursor.close()
                 connection.commit()
             finally:
@@ -147,7 +147,7 @@ class StandardVocabLoader:
             try:
                 cursor = connection.cursor()
                 cursor.execute(statement)
-                transformation_metadata.insertion_counts += Counter({table: cursor.rowcount})
+                transformation_metadata.add_counts(insertions=Counter({table: cursor.rowcount}))
                 cursor.close()
                 connection.commit()
             finally:
@@ -0,0 +1,139 @@
+"""Source file fingerprinting module."""
+
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from .io import get_file_checksum
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_ALGORITHM = 'blake2b'
+
+
+class FingerprintStore:
+    """
+    Checksums of files, memoized by path, size and modification time.
+
+    Files are only hashed if they are new or their size or
+    modification time (in ns) changed since they were last hashed, so
+    fingerprinting unchanged files is instant. Multiple files are
+    hashed in parallel threads, as hashlib releases the GIL while
+    hashing.
+
+    Parameters
+    ----------
+    memo_path : pathlib.Path, optional
+        JSON file to keep the checksums in between runs. If not
+        provided, they are only kept in memory.
+    algorithm : str, default 'blake2b'
+        hashlib algorithm of the checksums.
+    """
+
+    def __init__(self, memo_path: Optional[Path] = None, algorithm: str = DEFAULT_ALGORITHM):
+        self._memo_path = memo_path
+        self._algorithm = algorithm
+        self._lock = threading.Lock()
+        self._memo: Dict[str, Dict] = self._load()
+
+    @property
+    def memo_path(self) -> Optional[Path]:
+        """Read-only memo file path."""
+        return self._memo_path
+
+    @property
+    def algorithm(self) -> str:
+        """Read-only hash algorithm."""
+        return self._algorithm
+
+    def _load(self) -> Dict[str, Dict]:
+        if self._memo_path is None or not self._memo_path.exists():
+            return {}
+        try:
+            with self._memo_path.open('r', encoding='utf-8') as f:
+                return json.load(f)
+        except (ValueError, OSError) as e:
+            logger.warning(f'Ignoring unreadable fingerprint memo {self._memo_path}: {e}')
+            return {}
+
+    def save(self) -> None:
+        """
+        Write the memoized checksums to the memo file, if any.
+
+        Returns
+        -------
+        None
+        """
+        if self._memo_path is None:
+            return
+        with self._lock:
+            memo = dict(self._memo)
+        self._memo_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._memo_path.with_name(self._memo_path.name + '.tmp')
+        with tmp_path.open('w', encoding='utf-8') as f:
+            json.dump(memo, f, indent=2, sort_keys=True)
+        os.replace(str(tmp_path), str(self._memo_path))
+
+    def get_fingerprint(self, path: Path) -> str:
+        """
+        Get the checksum of a file, hashing it only if it changed.
+
+        Parameters
+        ----------
+        path : pathlib.Path
+            The file to fingerprint. Compressed files are hashed as
+            stored.
+
+        Returns
+        -------
+        str
+            Hexadecimal checksum.
+        """
+        key = str(path.resolve())
+        stat = path.stat()
+        with self._lock:
+            entry = self._memo.get(key)
+        if (entry is not None and entry['size'] == stat.st_size
+                and entry['mtime_ns'] == stat.st_mtime_ns
+                and entry['algorithm'] == self._algorithm):
+            return entry['checksum']
+
+        logger.info(f'Calculating {self._algorithm} checksum of {path.name}')
+        checksum = get_file_checksum(path, algorithm=self._algorithm)
+        with self._lock:
+            self._memo[key] = {
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+                'algorithm': self._algorithm,
+                'checksum': checksum,
+            }
+        return checksum
+
+    def get_fingerprints(self, paths: Iterable[Path], max_workers: int = 4) -> Dict[Path, str]:
+        """
+        Get the checksums of multiple files, hashed in parallel.
+
+        The memo file is updated afterwards.
+
+        Parameters
+        ----------
+        paths : iterable of pathlib.Path
+            The files to fingerprint.
+        max_workers : int, default 4
+            Maximum number of files to hash at the same time.
+
+        Returns
+        -------
+        dict of {pathlib.Path : str}
+            Checksum by path, in the order of the paths.
+        """
+        paths = list(paths)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            checksums = list(executor.map(self.get_fingerprint, paths))
+        self.save()
+        return dict(zip(paths, checksums))
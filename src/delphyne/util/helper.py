@@ -1,9 +1,23 @@
 """General utility module."""
 
-from typing import Dict, Any
+import queue
+import threading
+from itertools import islice
+from typing import Dict, Any, Iterable, Generator, TypeVar
 
 import pandas as pd
 
+T = TypeVar('T')
+
+# Marks the end of the prefetched items
+_END = object()
+
+
+class _PrefetchError:
+    # Exception raised while prefetching, to be raised by the consumer
+    def __init__(self, error: BaseException):
+        self.error = error
+
 
 def is_null_or_falsy(value: Any) -> bool:
     """
@@ -47,3 +61,77 @@ def replace_substrings(string: str, mapping: Dict[str, str]) -> str:
     for old, new in mapping.items():
         string = string.replace(old, new)
     return string
+
+
+def prefetch(iterable: Iterable[T], n_items: int, batch_size: int = 1
+             ) -> Generator[T, None, None]:
+    """
+    Iterate over an iterable while a background thread reads ahead.
+
+    Up to n_items items are read ahead into a bounded queue, so that
+    e.g. reading and parsing a file overlaps with processing the items
+    that were already read. Exceptions raised while reading are
+    re-raised by the returned generator. When the generator is closed
+    early, the background thread stops and closes the iterable.
+
+    Parameters
+    ----------
+    iterable : iterable
+        The items to prefetch.
+    n_items : int
+        Maximum number of items to read ahead. If smaller than 1,
+        items are not prefetched.
+    batch_size : int, default 1
+        Number of items passed to the consumer at once. Batching
+        reduces the overhead per item when prefetching many small
+        items, e.g. rows.
+
+    Yields
+    ------
+    object
+        The items of the iterable, in order.
+    """
+    if n_items < 1:
+        yield from iterable
+        return
+    batch_size = max(1, min(batch_size, n_items))
+    batches: queue.Queue = queue.Queue(maxsize=max(1, n_items // batch_size))
+    stop = threading.Event()
+    iterator = iter(iterable)
+
+    def put(item: Any) -> bool:
+        # Give up as soon as the consumer has stopped
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            batch = list(islice(iterator, batch_size))
+            while batch and put(batch):
+                batch = list(islice(iterator, batch_size))
+            put(_END)
+        except BaseException as e:
+            put(_PrefetchError(e))
+        finally:
+            close = getattr(iterator, 'close', None)
+            if close is not None:
+                close()
+
+    thread = threading.Thread(target=produce, name='prefetch', daemon=True)
+    thread.start()
+    try:
+        while True:
+            batch = batches.get()
+            if batch is _END:
+                return
+            if isinstance(batch, _PrefetchError):
+                raise batch.error
+            yield from batch
+    finally:
+        stop.set()
+        thread.join()
@@ -1,11 +1,33 @@
 """I/O utility module."""
 
+import bz2
+import gzip
 import hashlib
+import io
+import lzma
 from pathlib import Path
-from typing import List, Set, Dict, Optional, Union
+from typing import List, Set, Dict, Optional, Union, Tuple, IO, BinaryIO, Generator
 
 import yaml
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Number of bytes to read at once when scanning entire files
+_READ_BLOCK_SIZE = 1 << 24
+
+# Number of bytes to read at once when searching backwards for a line
+_LINE_SEARCH_BLOCK_SIZE = 1 << 16
+
+COMPRESSION_SUFFIXES = {
+    '.gz': 'gzip',
+    '.bz2': 'bz2',
+    '.xz': 'xz',
+    '.zst': 'zstd',
+}
+
 
 def read_yaml_file(path: Path) -> Dict:
     """
@@ -155,16 +177,34 @@ def file_has_valid_prefix(path: Path, suffix: str,
     return False
 
 
-def get_file_line_count(file_path: Path, skip_header: bool = True) -> int:
+def get_file_line_count(file_path: Path,
+                        skip_header: bool = True,
+                        quoted_newlines: bool = False,
+                        quotechar: str = '"',
+                        compression: Optional[str] = 'infer',
+                        ) -> int:
     """
     Get the line count of a text (non-binary) file.
 
+    The file is read in large blocks, in which the newline characters
+    are counted.
+
     Parameters
     ----------
     file_path : pahlib.Path
         File to get the line count of.
     skip_header : bool, default True
         If True, the first line is not added to the line count.
+    quoted_newlines : bool, default False
+        If True, newlines enclosed in quotechar are not counted, so
+        the result is the number of records of a delimited file with
+        multiline values. Quotes within values must be escaped by
+        doubling them.
+    quotechar : str, default '"'
+        Character used to quote values. Only used if quoted_newlines
+        is True.
+    compression : str, optional, default 'infer'
+        Compression of the file, see open_file.
 
     Returns
     -------
@@ -174,30 +214,400 @@ def get_file_line_count(file_path: Path, skip_header: bool = True) -> int:
     if file_path.stat().st_size == 0:  # Empty file
         return 0
     n_rows = 0
-    with file_path.open('rb') as f:
-        if skip_header:
-            next(f)
-        for _ in f:
-            n_rows += 1
+    quote = quotechar.encode()
+    in_quotes = False
+    last_byte = b''
+    with open_file(file_path, compression=compression) as f:
+        for block in iter(lambda: f.read(_READ_BLOCK_SIZE), b''):
+            if quoted_newlines:
+                n_rows, in_quotes = _count_unquoted_newlines(block, quote, n_rows, in_quotes)
+            else:
+                n_rows += block.count(b'\n')
+            last_byte = block[-1:]
+    if not last_byte:  # Empty after decompression
+        return 0
+    # Last line without a trailing newline
+    if last_byte != b'\n':
+        n_rows += 1
+    if skip_header:
+        n_rows -= 1
+    return n_rows
+
+
+def _count_unquoted_newlines(block: bytes, quote: bytes, n_rows: int, in_quotes: bool
+                             ) -> Tuple[int, bool]:
+    # Every quote toggles the quoted state, so the parts between
+    # quotes are alternately unquoted and quoted
+    parts = block.split(quote)
+    for part in parts[int(in_quotes)::2]:
+        n_rows += part.count(b'\n')
+    in_quotes = (in_quotes + len(parts) - 1) % 2 == 1
+    return n_rows, in_quotes
+
+
+def iter_records(f: BinaryIO, quotechar: str = '"') -> Generator[Tuple[int, bytes], None, None]:
+    """
+    Iterate over the records of a delimited file with their offsets.
+
+    A record spans multiple lines if newlines are enclosed in
+    quotechar. Quotes within values must be escaped by doubling them.
+
+    Parameters
+    ----------
+    f : binary file object
+        File to read the records from, starting at its current
+        position.
+    quotechar : str, default '"'
+        Character used to quote values.
+
+    Yields
+    ------
+    tuple of (int, bytes)
+        Byte offset in the file and contents (including the line
+        terminator) of each record.
+    """
+    quote = quotechar.encode()
+    offset = f.tell()
+    lines = []
+    in_quotes = False
+    for line in f:
+        lines.append(line)
+        if line.count(quote) % 2 == 1:
+            in_quotes = not in_quotes
+        if not in_quotes:
+            record = b''.join(lines)
+            yield offset, record
+            offset += len(record)
+            lines = []
+    if lines:
+        yield offset, b''.join(lines)
+
+
+def get_record_ranges(path: Path,
+                      start: int,
+                      range_size: int,
+                      quoted_newlines: bool = False,
+                      quotechar: str = '"',
+                      ) -> List[Tuple[int, int]]:
+    """
+    Split an uncompressed delimited file into byte ranges of records.
+
+    Each range ends directly after a newline that terminates a record,
+    so the ranges can be parsed independently.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        File to split.
+    start : int
+        Byte offset of the first record, e.g. directly after the
+        header.
+    range_size : int
+        Approximate size of the ranges in bytes. Ranges are extended
+        up to the end of the record at this size.
+    quoted_newlines : bool, default False
+        If True, newlines enclosed in quotechar don't end a record.
+        The file is then scanned from start to track the quotes.
+        Quotes within values must be escaped by doubling them.
+    quotechar : str, default '"'
+        Character used to quote values. Only used if quoted_newlines
+        is True.
+
+    Returns
+    -------
+    list of tuple of (int, int)
+        Start and end offsets of the ranges, covering the file from
+        start to its end.
+    """
+    size = path.stat().st_size
+    if start >= size:
+        return []
+    with path.open('rb') as f:
+        if quoted_newlines:
+            boundaries = _find_unquoted_boundaries(f, start, size, range_size,
+                                                   quotechar.encode())
+        else:
+            boundaries = _find_line_boundaries(f, start, size, range_size)
+    boundaries = [start] + boundaries + [size]
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def _find_line_boundaries(f: BinaryIO, start: int, size: int, range_size: int
+                          ) -> List[int]:
+    boundaries = []
+    target = start + range_size
+    while target < size:
+        # Reading from the byte before the target finds the first
+        # line end at or after the target
+        f.seek(target - 1)
+        f.readline()
+        boundary = f.tell()
+        if boundary >= size:
+            break
+        boundaries.append(boundary)
+        target = boundary + range_size
+    return boundaries
+
+
+def _find_unquoted_boundaries(f: BinaryIO, start: int, size: int, range_size: int,
+                              quote: bytes) -> List[int]:
+    boundaries = []
+    target = start + range_size
+    in_quotes = False
+    offset = start
+    f.seek(start)
+    for block in iter(lambda: f.read(_READ_BLOCK_SIZE), b''):
+        # The quoted state is known up to position i of the block
+        i = 0
+        while target < size:
+            search_from = max(target - 1 - offset, i)
+            if search_from >= len(block):
+                break
+            in_quotes ^= block.count(quote, i, search_from) % 2 == 1
+            i = search_from
+            newline = block.find(b'\n', i)
+            while newline != -1:
+                in_quotes ^= block.count(quote, i, newline) % 2 == 1
+                i = newline + 1
+                if not in_quotes:
+                    break
+                newline = block.find(b'\n', i)
+            if newline == -1:
+                break
+            boundary = offset + newline + 1
+            if boundary >= size:
+                break
+            boundaries.append(boundary)
+            target = boundary + range_size
+        if target >= size:
+            break
+        in_quotes ^= block.count(quote, i) % 2 == 1
+        offset += len(block)
+    return boundaries
+
+
+def open_byte_range(path: Path, start: int, end: int) -> BinaryIO:
+    """
+    Open a byte range of an uncompressed file for reading.
+
+    The returned file object behaves like a file that contains only
+    the bytes of the range.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        The file to open.
+    start : int
+        Offset of the first byte of the range.
+    end : int
+        Offset directly after the last byte of the range.
+
+    Returns
+    -------
+    binary file object
+    """
+    f = path.open('rb')
+    f.seek(start)
+    return io.BufferedReader(_ByteRangeReader(f, end - start))
+
+
+class _ByteRangeReader(io.RawIOBase):
+    # Raw reader that stops after a number of bytes
+
+    def __init__(self, f: BinaryIO, size: int):
+        self._f = f
+        self._remaining = max(size, 0)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        n_bytes = min(len(b), self._remaining)
+        if n_bytes == 0:
+            return 0
+        n_bytes = self._f.readinto(memoryview(b)[:n_bytes])
+        self._remaining -= n_bytes
+        return n_bytes
+
+    def close(self) -> None:
+        self._f.close()
+        super().close()
+
+
+def get_range_line_count(path: Path,
+                         start: int,
+                         end: int,
+                         quoted_newlines: bool = False,
+                         quotechar: str = '"',
+                         ) -> int:
+    """
+    Get the number of lines that end within a byte range of a file.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        The (uncompressed) file.
+    start : int
+        Offset of the first byte of the range, at the start of a line.
+    end : int
+        Offset directly after the last byte of the range.
+    quoted_newlines : bool, default False
+        If True, newlines enclosed in quotechar are not counted, see
+        get_file_line_count.
+    quotechar : str, default '"'
+        Character used to quote values. Only used if quoted_newlines
+        is True.
+
+    Returns
+    -------
+    int
+    """
+    n_rows = 0
+    quote = quotechar.encode()
+    in_quotes = False
+    with open_byte_range(path, start, end) as f:
+        for block in iter(lambda: f.read(_READ_BLOCK_SIZE), b''):
+            if quoted_newlines:
+                n_rows, in_quotes = _count_unquoted_newlines(block, quote, n_rows, in_quotes)
+            else:
+                n_rows += block.count(b'\n')
     return n_rows
 
 
-def get_file_checksum(path: Path) -> str:
+def find_last_line_end(path: Path, start: int, end: int) -> int:
+    """
+    Find the end of the last complete line within a byte range.
+
+    Useful for files that are being appended to, which may end in a
+    partially written line.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        The (uncompressed) file.
+    start : int
+        Offset of the first byte of the range.
+    end : int
+        Offset directly after the last byte of the range.
+
+    Returns
+    -------
+    int
+        Offset directly after the last newline in the range, or start
+        if the range contains no newline.
+    """
+    with path.open('rb') as f:
+        block_end = end
+        while block_end > start:
+            block_start = max(start, block_end - _LINE_SEARCH_BLOCK_SIZE)
+            f.seek(block_start)
+            position = f.read(block_end - block_start).rfind(b'\n')
+            if position != -1:
+                return block_start + position + 1
+            block_end = block_start
+    return start
+
+
+def get_file_checksum(path: Path,
+                      compression: Optional[str] = None,
+                      algorithm: str = 'md5',
+                      ) -> str:
     """
-    Get MD5 checksum of a file.
+    Get the checksum of a file.
+
+    The file is read in large blocks into a single reused buffer.
 
     Parameters
     ----------
     path : pathlib.Path
         File to get checksum of.
+    compression : str, optional
+        If provided, get the checksum of the decompressed contents,
+        see open_file.
+    algorithm : str, default 'md5'
+        Any hashlib algorithm. 'blake2b' is considerably faster on
+        64-bit platforms.
 
     Returns
     -------
     str
         Resulting checksum.
     """
-    hash_md5 = hashlib.md5()
-    with path.open("rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            hash_md5.update(chunk)
-    return hash_md5.hexdigest()
+    checksum = hashlib.new(algorithm)
+    buffer = bytearray(_READ_BLOCK_SIZE)
+    view = memoryview(buffer)
+    with open_file(path, compression=compression) as f:
+        n_bytes = f.readinto(buffer)
+        while n_bytes:
+            checksum.update(view[:n_bytes])
+            n_bytes = f.readinto(buffer)
+    return checksum.hexdigest()
+
+
+def get_compression(path: Path, compression: Optional[str] = 'infer') -> Optional[str]:
+    """
+    Get the compression method of a file.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        The file to get the compression method of.
+    compression : str, optional, default 'infer'
+        If 'infer', derive the compression method from the file
+        suffix. Otherwise the provided method is validated and
+        returned.
+
+    Returns
+    -------
+    str or None
+        One of 'gzip', 'bz2', 'xz' or 'zstd', or None if the file is
+        not compressed.
+    """
+    if compression == 'infer':
+        return COMPRESSION_SUFFIXES.get(path.suffix.lower())
+    if compression is not None and compression not in COMPRESSION_SUFFIXES.values():
+        raise ValueError(f'Unsupported compression for {path.name}: {compression}')
+    return compression
+
+
+def open_file(path: Path,
+              mode: str = 'rb',
+              compression: Optional[str] = 'infer',
+              **kwargs
+              ) -> IO:
+    """
+    Open a file for reading, decompressing it while it's read.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        The file to open.
+    mode : {'rb', 'r'}
+        Open in binary or text mode.
+    compression : str, optional, default 'infer'
+        Compression method, see get_compression. zstd requires the
+        zstandard package to be installed.
+    **kwargs
+        Additional keyword arguments for text mode, e.g. encoding and
+        newline.
+
+    Returns
+    -------
+    file object
+    """
+    if mode not in ('rb', 'r'):
+        raise ValueError(f'Invalid mode for opening a file: {mode}')
+    compression = get_compression(path, compression)
+    if compression is None:
+        return path.open(mode, **kwargs)
+    if compression == 'zstd':
+        if zstandard is None:
+            raise ImportError(f'zstandard is required for reading {path.name}. '
+                              f'Install it with: pip install delphyne[ZSTD]')
+        stream = zstandard.ZstdDecompressor().stream_reader(path.open('rb'), closefd=True)
+    else:
+        open_func = {'gzip': gzip.open, 'bz2': bz2.open, 'xz': lzma.open}[compression]
+        stream = open_func(path, 'rb')
+    if mode == 'rb':
+        return stream
+    return io.TextIOWrapper(stream, **kwargs)
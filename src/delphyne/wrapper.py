@@ -1,25 +1,29 @@
 """Wrapper module."""
 
 import logging
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, List
+from typing import Optional, List, Dict
 
 import sys
-from sqlalchemy import Table, inspect
-from sqlalchemy.schema import CreateSchema
+from sqlalchemy import Table, Index, inspect
+from sqlalchemy.schema import CreateSchema, sort_tables
 
 from ._paths import SOURCE_DATA_CONFIG_PATH
 from .cdm import vocabularies as cdm
 from .cdm.schema_placeholders import VOCAB_SCHEMA
 from .config.models import MainConfig
 from .database import Database
-from .model.etl_stats import EtlStatsReporter, etl_stats
+from .database.ddl import TruncateTables, Analyze, Cluster
+from .model.etl_stats import EtlStatsReporter, etl_stats, open_transformation
 from .model.mapping import CodeMapper
 from .model.orm_wrapper import OrmWrapper
 from .model.raw_sql_wrapper import RawSqlWrapper
 from .model.source_data import SourceData
 from .model.vocab_manager import VocabManager
 from .util.io import read_yaml_file
+from .util.table import get_full_table_name
 
 logger = logging.getLogger(__name__)
 
@@ -56,6 +60,9 @@ class Wrapper(OrmWrapper, RawSqlWrapper):
         self.vocab_manager = VocabManager(self.db, cdm_, config)
         self.code_mapper = CodeMapper(self.db, cdm_)
 
+        # Insertion counts at the time of the last table optimization
+        self._optimized_insertions = Counter()
+
     def _set_source_data(self):
         source_data_path = self._config.source_data_folder
         if source_data_path is None:
@@ -68,7 +75,7 @@ class Wrapper(OrmWrapper, RawSqlWrapper):
             return None
         source_config = read_yaml_file(SOURCE_DATA_CONFIG_PATH)
         source_config['source_data_folder'] = source_data_path
-        return SourceData(source_config)
+        return SourceData(source_config, engine=self.db.engine)
 
     def stem_table_to_domains(self) -> None:
         """
@@ -84,6 +91,7 @@ class Wrapper(OrmWrapper, RawSqlWrapper):
         None
         """
         logger.info('Starting stem table to domain queries')
+        self._run_post_load_optimization()
         post_processing_path = _HERE / 'post_processing'
         self.execute_sql_file(post_processing_path / 'stem_table_to_measurement.sql')
         self.execute_sql_file(post_processing_path / 'stem_table_to_condition_occurrence.sql')
@@ -92,6 +100,112 @@ class Wrapper(OrmWrapper, RawSqlWrapper):
         self.execute_sql_file(post_processing_path / 'stem_table_to_observation.sql')
         self.execute_sql_file(post_processing_path / 'stem_table_to_procedure_occurrence.sql')
         self.execute_sql_file(post_processing_path / 'stem_table_to_specimen.sql')
+        self._run_post_load_optimization()
+
+    def _run_post_load_optimization(self) -> None:
+        # Optimize tables in between load phases, if enabled in config
+        options = self._config.post_load_optimization
+        if options is None:
+            return
+        self.optimize_loaded_tables(analyze=options.analyze, vacuum=options.vacuum,
+                                    cluster_on=options.cluster_on,
+                                    max_workers=options.max_workers)
+
+    def optimize_loaded_tables(self,
+                               analyze: bool = True,
+                               vacuum: bool = False,
+                               cluster_on: Optional[str] = None,
+                               max_workers: int = 4,
+                               ) -> None:
+        """
+        Update the physical state of tables that received new records.
+
+        After large loads, planner statistics are outdated, which can
+        lead to slow queries in subsequent steps, such as the stem table
+        queries or adding FKs. The tables that had insertions since the
+        last call are taken from the ETL statistics and are processed in
+        parallel. Only supported for PostgreSQL.
+
+        If **post_load_optimization** is set in the main config file,
+        this is run automatically before and after the stem table
+        queries of :meth:`stem_table_to_domains`.
+
+        Parameters
+        ----------
+        analyze : bool, default True
+            If True, collect planner statistics for the tables.
+        vacuum : bool, default False
+            If True, also reclaim storage occupied by dead rows.
+        cluster_on : str, optional
+            Column name (e.g. person_id) to physically order the tables
+            by. Only tables with an active index on just that column are
+            clustered.
+        max_workers : int, default 4
+            Maximum number of tables that are processed concurrently.
+
+        Returns
+        -------
+        None
+        """
+        if self.db.engine.name != 'postgresql':
+            logger.warning(f'Post-load optimization is not supported for '
+                           f'the {self.db.engine.name} dialect')
+            return
+
+        total_insertions = etl_stats.total_insertions
+        loaded_tables = [table_name for table_name, count in total_insertions.items()
+                         if count > self._optimized_insertions[table_name]]
+        table_lookup = self._get_full_table_name_lookup()
+        tables = [table_lookup[t] for t in loaded_tables if t in table_lookup]
+        if not tables:
+            return
+
+        logger.info(f'Optimizing {len(tables)} loaded tables')
+        with open_transformation(name='post_load_optimization'):
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [executor.submit(self._optimize_table, table, analyze,
+                                           vacuum, cluster_on)
+                           for table in tables]
+            for future in futures:
+                future.result()
+        self._optimized_insertions = total_insertions
+
+    def _optimize_table(self,
+                        table: Table,
+                        analyze: bool,
+                        vacuum: bool,
+                        cluster_on: Optional[str],
+                        ) -> None:
+        cluster_index = None
+        if cluster_on is not None:
+            cluster_index = self._get_active_index(table, cluster_on)
+        # VACUUM cannot be executed inside a transaction block
+        with self.db.engine.connect() as conn:
+            conn = conn.execution_options(isolation_level='AUTOCOMMIT')
+            if cluster_index is not None:
+                logger.info(f'Clustering {table.name} on {cluster_index.name}')
+                conn.execute(Cluster(table, cluster_index))
+            if analyze or vacuum:
+                logger.info(f'{"Vacuuming and analyzing" if vacuum else "Analyzing"} '
+                            f'{table.name}')
+                conn.execute(Analyze(table, vacuum=vacuum))
+
+    def _get_active_index(self, table: Table, column_name: str) -> Optional[Index]:
+        # Return the model index on only the given column, if currently
+        # present in the database
+        for index in table.indexes:
+            if [c.name for c in index.columns] != [column_name]:
+                continue
+            active_indexes = inspect(self.db.engine).get_indexes(
+                table.name, schema=self.db.schema_translate_map.get(table.schema))
+            if index.name in {i['name'] for i in active_indexes}:
+                return index
+        return None
+
+    def _get_full_table_name_lookup(self) -> Dict[str, Table]:
+        # Map the full table names as used in etl_stats to the tables
+        return {get_full_table_name(t.name, t.schema, self.db.schema_translate_map): t
+                for t in self.db.base.metadata.tables.values()}
 
     def _get_cdm_tables_to_drop(self):
         tables_to_drop = []
@@ -123,6 +237,65 @@ class Wrapper(OrmWrapper, RawSqlWrapper):
         with self.db.engine.connect() as conn:
             self.db.base.metadata.drop_all(bind=conn, tables=tables_to_drop)
 
+    def reset_cdm(self,
+                  tables: Optional[List[Table]] = None,
+                  drop_indexes: bool = False,
+                  ) -> None:
+        """
+        Remove all records from the non-vocabulary tables in the ORM.
+
+        Unlike dropping and recreating the tables, the table definitions
+        remain in place. On PostgreSQL, all tables are emptied with a
+        single TRUNCATE statement, which also resets their sequences.
+        For other dialects, the records are deleted table by table.
+        Tables that do not exist are ignored.
+
+        Parameters
+        ----------
+        tables : list of sqlalchemy.Table, optional
+            List of SQLAlchemy table definitions that should be
+            emptied. If not provided, all tables that by default are not
+            part of the CDM vocabulary tables will be emptied. Any FKs
+            from tables outside this list referring to these tables
+            will prevent the reset.
+        drop_indexes : bool, default False
+            If True, also drop the indexes of these tables, so they
+            don't slow down the subsequent reload. They can be restored
+            with the constraint_manager add methods.
+
+        Returns
+        -------
+        None
+        """
+        logger.info('Resetting OMOP CDM (non-vocabulary) tables')
+        if tables is None:
+            tables = self._get_cdm_tables_to_drop()
+        tables = self._get_existing_tables(tables)
+        if not tables:
+            return
+
+        with self.db.engine.connect() as conn:
+            if self.db.engine.name == 'postgresql':
+                conn.execute(TruncateTables(tables, restart_identity=True))
+            else:
+                # Delete referring records before the referred records
+                for table in reversed(sort_tables(tables)):
+                    conn.execute(table.delete())
+
+        if drop_indexes:
+            for table in tables:
+                self.db.constraint_manager.drop_table_constraints(
+                    table.name, drop_constraint=False, drop_pk=False, drop_index=True)
+
+    def _get_existing_tables(self, tables: List[Table]) -> List[Table]:
+        inspector = inspect(self.db.engine)
+        existing_tables = set()
+        for schema in self.db.schemas:
+            existing_tables.update((schema, t) for t in inspector.get_table_names(schema))
+        return [t for t in tables
+                if (self.db.schema_translate_map.get(t.schema, t.schema), t.name)
+                in existing_tables]
+
     def create_cdm(self) -> None:
         """
         Create all OMOP CDM tables as defined in base.metadata.
@@ -154,6 +327,33 @@ class Wrapper(OrmWrapper, RawSqlWrapper):
                     logger.info(f'Creating schema: {schema_name}')
                     conn.execute(CreateSchema(schema_name))
 
+    def profile_source_dtypes(self, sample_rows: int = 100000, overwrite: bool = False
+                              ) -> None:
+        """
+        Write compact dtypes for the source files to the source config.
+
+        Samples all delimited text source files without dtypes in the
+        source config, and adds the proposed dtypes to the config file.
+        The expected memory savings are logged per file.
+
+        Parameters
+        ----------
+        sample_rows : int, default 100000
+            Number of rows to sample per file.
+        overwrite : bool, default False
+            If True, also replace dtypes already in the source config.
+
+        Returns
+        -------
+        None
+        """
+        if self.source_data is None:
+            logger.warning('No source data available for profiling dtypes')
+            return
+        self.source_data.profile_dtypes(sample_rows=sample_rows,
+                                        config_path=SOURCE_DATA_CONFIG_PATH,
+                                        overwrite=overwrite)
+
     def summarize(self) -> None:
         """
         Summarize the results of the transformations.
@@ -167,6 +367,8 @@ class Wrapper(OrmWrapper, RawSqlWrapper):
         -------
         None
         """
+        if self.source_data is not None:
+            self.source_data.wait_for_line_counts()
         etl_stats_logger = EtlStatsReporter(etl_stats)
         if self._config.run_options.write_reports:
             etl_stats_logger.write_summary_files()
@@ -72,3 +72,12 @@ def test_mapping_value_can_be_same_as_key_within_same_pair(default_main_config:
     sql_parameters = {'key1': 'key1'}
     default_main_config['sql_parameters'] = sql_parameters
     MainConfig(**default_main_config)
+
+
+def test_post_load_optimization_defaults(default_main_config: Dict):
+    assert MainConfig(**default_main_config).post_load_optimization is None
+    default_main_config['post_load_optimization'] = {'cluster_on': 'person_id'}
+    options = MainConfig(**default_main_config).post_load_optimization
+    assert options.analyze
+    assert not options.vacuum
+    assert options.cluster_on == 'person_id'
@@ -6,6 +6,7 @@ from sqlalchemy import Table, Index, Constraint, MetaData
 from sqlalchemy.exc import InternalError, ProgrammingError
 from src.delphyne import Wrapper
 
+from tests.python.cdm import cdm600
 from tests.python.conftest import docker_not_available
 from tests.python.database.constraints import constraint_sets as expected_sets
 
@@ -202,3 +203,48 @@ def test_drop_and_add_all_constraints(cdm600_wrapper_with_tables_created: Wrappe
     wrapper.db.constraint_manager.add_all_constraints()
     all_db_objects = get_all_db_table_object_names(wrapper.db.reflected_metadata)
     assert all_db_objects == expected_sets.db_table_objects_full
+
+
+def test_add_cdm_constraints_with_deferred_fk_validation(
+        cdm600_wrapper_with_tables_created: Wrapper):
+    wrapper = cdm600_wrapper_with_tables_created
+    wrapper.db.constraint_manager.drop_cdm_constraints()
+
+    wrapper.db.constraint_manager.add_cdm_constraints(defer_fk_validation=True, max_workers=2)
+    all_db_objects = get_all_db_table_object_names(wrapper.db.reflected_metadata)
+    assert all_db_objects == expected_sets.db_table_objects_full
+
+    # All FKs have been validated after being added as NOT VALID
+    validated = wrapper.db.constraint_manager.fk_validation_durations
+    assert 'fk_specimen_person_id_person' in validated
+    with wrapper.db.engine.connect() as conn:
+        n_not_valid = conn.execute(
+            "SELECT COUNT(*) FROM pg_constraint WHERE NOT convalidated").scalar()
+    assert n_not_valid == 0
+
+
+def test_suspended_constraints_are_restored(cdm600_wrapper_with_tables_created: Wrapper):
+    wrapper = cdm600_wrapper_with_tables_created
+    full_table_name = 'cdm.specimen'
+
+    with wrapper.db.constraint_manager.suspended(tables=['specimen']):
+        table = reflect_table(wrapper, full_table_name)
+        assert get_single_table_object_names(table) == {'pk_specimen'}
+
+    table = reflect_table(wrapper, full_table_name)
+    assert get_single_table_object_names(table) == expected_sets.all_specimen_objects
+
+
+def test_suspended_constraints_are_restored_on_error(
+        cdm600_wrapper_with_tables_created: Wrapper):
+    wrapper = cdm600_wrapper_with_tables_created
+
+    with pytest.raises(ValueError):
+        with wrapper.db.constraint_manager.suspended(tables=[cdm600.Specimen],
+                                                     keep_pk=False):
+            table = reflect_table(wrapper, 'cdm.specimen')
+            assert get_single_table_object_names(table) == {None}
+            raise ValueError('Load failed')
+
+    all_db_objects = get_all_db_table_object_names(wrapper.db.reflected_metadata)
+    assert all_db_objects == expected_sets.db_table_objects_full
@@ -1,4 +1,6 @@
+import pickle
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
 import pytest
@@ -89,3 +91,37 @@ def test_total_insertions(etl_stats: EtlStats):
 
 def test_total_duration(etl_stats: EtlStats):
     assert etl_stats.get_total_duration(etl_stats.transformations) == timedelta(hours=4)
+
+
+def test_concurrent_additions_are_all_stored():
+    stats = EtlStats()
+    transformation = get_etltransformation(name='shared')
+
+    def add_records(i: int):
+        transformation.add_counts(insertions=Counter({'table1': 1}))
+        stats.add_transformation(get_etltransformation(name=f'T{i}'))
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(add_records, range(1000)))
+    assert stats.n_queries_executed == 1000
+    assert transformation.insertion_counts == Counter({'table1': 1000})
+
+
+def test_merge_pickled_etl_stats(etl_stats: EtlStats):
+    child_stats = pickle.loads(pickle.dumps(etl_stats))
+    stats = EtlStats()
+    stats.merge(child_stats)
+    stats.merge(child_stats)
+    assert stats.n_queries_executed == 6
+    assert len(stats.sources) == 2
+    assert stats.total_insertions == Counter({'table2': 2000, 'table1': 50})
+
+
+def test_transformations_have_their_own_counts_lock():
+    transformation = get_etltransformation(name='T1')
+    other = get_etltransformation(name='T2')
+    assert transformation._counts_lock is not other._counts_lock
+    copied = pickle.loads(pickle.dumps(transformation))
+    copied.add_counts(insertions=Counter({'table1': 1}))
+    assert copied.insertion_counts == transformation.insertion_counts + Counter({'table1': 1})
+    assert '_counts_lock' not in transformation.to_dict()
@@ -0,0 +1,59 @@
+from collections import OrderedDict
+
+import pytest
+from src.delphyne.model.source_data import ColumnarRecords
+from src.delphyne.model.source_data.memory_cache import get_size
+
+
+@pytest.fixture
+def records():
+    return [OrderedDict([('id', str(i)), ('code', 'abc' if i % 2 else 'def'), ('value', None)])
+            for i in range(100)]
+
+
+def test_rows_are_mappings(records):
+    compact = ColumnarRecords.from_records(iter(records))
+    assert len(compact) == 100
+    assert compact.columns == ['id', 'code', 'value']
+    assert compact[1] == records[1]
+    assert compact[-1]['id'] == '99'
+    assert list(compact[2].items()) == list(records[2].items())
+    assert list(compact) == records
+    assert [row['id'] for row in compact[1:3]] == ['1', '2']
+    assert 'code' in compact[0] and 'other' not in compact[0]
+    with pytest.raises(KeyError):
+        compact[0]['other']
+    with pytest.raises(IndexError):
+        compact[100]
+
+
+def test_rows_are_read_only(records):
+    compact = ColumnarRecords.from_records(records)
+    with pytest.raises(TypeError):
+        compact[0]['id'] = 'modified'
+    row = compact[0].copy()
+    row['id'] = 'modified'
+    assert compact[0]['id'] == '0'
+    assert compact.to_list() == records
+
+
+def test_equal_strings_are_shared(records):
+    compact = ColumnarRecords.from_records(records)
+    assert compact[1]['code'] is compact[3]['code']
+    assert compact.nbytes < get_size(records)
+    assert get_size(compact) == compact.nbytes
+
+
+def test_records_with_different_keys_raise_error(records):
+    records[5] = {'id': '5', 'code': 'abc', 'other': None}
+    with pytest.raises(ValueError, match='Record 5 has no column'):
+        ColumnarRecords.from_records(records)
+    records[5] = {'id': '5'}
+    with pytest.raises(ValueError, match='Record 5 has 1 values'):
+        ColumnarRecords.from_records(records)
+
+
+def test_empty_records():
+    compact = ColumnarRecords.from_records([])
+    assert len(compact) == 0
+    assert compact.to_list() == []
@@ -0,0 +1,81 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from src.delphyne.model.source_data import SourceFile
+
+_PARAMS = {
+    'delimiter': ',',
+    'encoding': 'utf-8',
+    'quotechar': '"',
+    'dtypes': {'id': 'Int64'},
+}
+
+
+@pytest.fixture
+def log_file(tmp_path: Path) -> SourceFile:
+    file_path = tmp_path / 'log.csv'
+    file_path.write_text('id,event\n1,a\n2,b\n')
+    return SourceFile(file_path, dict(_PARAMS))
+
+
+def append(source_file: SourceFile, text: str) -> None:
+    with source_file.path.open('a') as f:
+        f.write(text)
+
+
+def test_only_appended_rows_are_read(log_file: SourceFile):
+    with log_file.delta_reader('events') as delta:
+        df = delta.get_csv_as_df(apply_dtypes=True)
+    assert df['id'].tolist() == [1, 2]
+    assert delta.state_path.name == '.log.csv.delta.json'
+
+    append(log_file, '3,c\n4,d\n5,e')
+    with log_file.delta_reader('events') as delta:
+        assert delta.start_line == 2
+        df = delta.get_csv_as_df(apply_dtypes=True, row_filter=lambda df: df['id'] > 3)
+        # The last row is not complete yet
+        assert delta.n_rows == 2
+    assert df['id'].tolist() == [4]
+    assert df.index.tolist() == [3]
+
+    append(log_file, '\n')
+    with log_file.delta_reader('events') as delta:
+        records = list(delta.get_csv_as_generator_of_dicts(columns=['event']))
+    assert records == [{'event': 'e'}]
+
+    with log_file.delta_reader('events') as delta:
+        assert delta.get_csv_as_df(apply_dtypes=True).empty
+        assert delta.n_rows == 0
+
+
+def test_progress_is_kept_per_name(log_file: SourceFile):
+    with log_file.delta_reader('events') as delta:
+        delta.get_csv_as_df(apply_dtypes=False)
+    with log_file.delta_reader('other') as delta:
+        assert len(delta.get_csv_as_df(apply_dtypes=False)) == 2
+
+
+def test_progress_not_stored_on_error(log_file: SourceFile):
+    with pytest.raises(RuntimeError):
+        with log_file.delta_reader('events') as delta:
+            delta.get_csv_as_df(apply_dtypes=False)
+            raise RuntimeError
+    with log_file.delta_reader('events') as delta:
+        chunks = list(delta.iter_csv_as_df(apply_dtypes=False, chunksize=1))
+    assert [chunk.index[0] for chunk in chunks] == [0, 1]
+
+
+def test_replaced_file_is_read_from_start(log_file: SourceFile):
+    with log_file.delta_reader('events') as delta:
+        delta.get_csv_as_df(apply_dtypes=False)
+    log_file.path.write_text('id,event\n9,z\n')
+    with log_file.delta_reader('events') as delta:
+        df = delta.get_csv_as_df(apply_dtypes=True)
+    assert df['id'].tolist() == [9]
+
+
+def test_delta_reader_requires_context_manager(log_file: SourceFile):
+    delta = log_file.delta_reader('events')
+    with pytest.raises(ValueError):
+        list(delta.iter_csv_as_df(apply_dtypes=False))
@@ -0,0 +1,81 @@
+import shutil
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pandas as pd
+import pytest
+from src.delphyne.model.source_data import SourceFile
+from src.delphyne.model.source_data.disk_cache import DiskCache
+
+from tests.python.model.source_data.test_source_file import get_file_params
+
+pytest.importorskip('pyarrow')
+
+
+@pytest.fixture
+def source_file2_copy(source_data_test_dir: Path, tmp_path: Path) -> Path:
+    """Copy of source_file2.tsv that can be modified."""
+    file_path = tmp_path / 'source_file2.tsv'
+    shutil.copy(source_data_test_dir / 'test_dir1' / 'source_file2.tsv', file_path)
+    return file_path
+
+
+@pytest.fixture
+def disk_cache(tmp_path: Path) -> DiskCache:
+    return DiskCache(tmp_path / 'cache')
+
+
+def get_source_file(path: Path, disk_cache: DiskCache) -> SourceFile:
+    dtypes = {'column_b': 'Int64', 'column_c': 'datetime64[ns]'}
+    return SourceFile(path, get_file_params(dtypes=dtypes), disk_cache=disk_cache)
+
+
+def test_df_is_read_from_disk_cache(source_file2_copy: Path, disk_cache: DiskCache):
+    expected = get_source_file(source_file2_copy, disk_cache).get_csv_as_df(apply_dtypes=True)
+    assert len(list(disk_cache.cache_dir.glob('*.arrow'))) == 1
+
+    # A new instance, as used in a later run, doesn't parse the file
+    source_file = get_source_file(source_file2_copy, disk_cache)
+    source_file._read_csv_as_df = MagicMock()
+    source_file._read_csv_as_df.__name__ = '_read_csv_as_df'
+    df = source_file.get_csv_as_df(apply_dtypes=True)
+    source_file._read_csv_as_df.assert_not_called()
+    pd.testing.assert_frame_equal(df, expected)
+
+
+def test_read_params_are_part_of_cache_key(source_file2_copy: Path, disk_cache: DiskCache):
+    source_file = get_source_file(source_file2_copy, disk_cache)
+    df_typed = source_file.get_csv_as_df(apply_dtypes=True)
+    df_untyped = source_file.get_csv_as_df(apply_dtypes=False)
+    assert df_typed.dtypes['column_b'] == pd.Int64Dtype()
+    assert df_untyped.dtypes['column_b'] == object
+    assert len(list(disk_cache.cache_dir.glob('*.arrow'))) == 2
+
+
+def test_modified_file_invalidates_disk_cache(source_file2_copy: Path, disk_cache: DiskCache):
+    get_source_file(source_file2_copy, disk_cache).get_csv_as_df(apply_dtypes=True)
+    with source_file2_copy.open('a') as f:
+        f.write('Extra row\t1\t2020-01-01\t1.0\n')
+
+    df = get_source_file(source_file2_copy, disk_cache).get_csv_as_df(apply_dtypes=True)
+    assert len(df) == 5
+    # The outdated cache file was removed
+    assert len(list(disk_cache.cache_dir.glob('*.arrow'))) == 1
+
+
+def test_persisted_df(source_file2_copy: Path, disk_cache: DiskCache):
+    source_file = get_source_file(source_file2_copy, disk_cache)
+    assert source_file.get_persisted_df() is None
+    df = source_file.get_csv_as_df(apply_dtypes=True)
+    df = df[df['column_b'].notna()]
+    source_file.cache_df(df, persist=True)
+
+    persisted_df = get_source_file(source_file2_copy, disk_cache).get_persisted_df()
+    pd.testing.assert_frame_equal(persisted_df, df)
+
+
+def test_persist_requires_disk_cache(source_file2_copy: Path):
+    source_file = SourceFile(source_file2_copy, get_file_params())
+    df = source_file.get_csv_as_df(apply_dtypes=False)
+    with pytest.raises(ValueError):
+        source_file.cache_df(df, persist=True)
@@ -0,0 +1,82 @@
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+import pytest
+from src.delphyne.model.source_data import SourceData
+from src.delphyne.model.source_data.dtype_profiler import propose_dtype
+from src.delphyne.util.io import read_yaml_file, write_yaml_file
+
+
+@pytest.mark.parametrize('values,expected', [
+    (['True', 'false', np.nan], 'boolean'),
+    (['1', '-5', np.nan], 'Int8'),
+    (['1.0', '300'], 'Int16'),
+    (['1', '100000'], 'Int32'),
+    (['1', '1e10'], 'Int64'),
+    (['1.5', '2'], 'float64'),
+    (['007', '008', '007', '007'], 'category'),
+    (['2020-01-31', '1999-12-01'], 'datetime64[ns]'),
+    (['a', 'b', 'a', 'a'], 'category'),
+    (['a', 'b', 'c', 'd'], 'object'),
+    ([np.nan, np.nan], 'object'),
+])
+def test_propose_dtype(values, expected):
+    assert propose_dtype(pd.Series(values, dtype='object')) == expected
+
+
+def test_propose_dtype_of_partial_sample():
+    values = pd.Series(['1', '-5', np.nan], dtype='object')
+    assert propose_dtype(values, complete=False) == 'Int64'
+    values = pd.Series(['1.5', '2'], dtype='object')
+    assert propose_dtype(values, complete=False) == 'float64'
+
+
+def test_profile_dtypes_writes_source_config(source_config: Dict, tmp_path: Path):
+    config_path = tmp_path / 'source_config.yml'
+    write_yaml_file({'source_files': {'source_file1.csv': {'delimiter': ','}}}, config_path)
+    source_data = SourceData(source_config)
+
+    profiles = source_data.profile_dtypes(config_path=config_path)
+    # source_file2.tsv already has dtypes, beer.sas7bdat is binary
+    assert [p.source_name for p in profiles] == ['source_file1.csv']
+    profile = profiles[0]
+    assert profile.n_sample_rows == 3
+    assert profile.dtypes == {'A': 'object', 'B': 'Int8', 'C': 'float64'}
+    assert profile.profiled_bytes < profile.object_bytes
+    assert 0 < profile.savings < 1
+
+    config_files = read_yaml_file(config_path)['source_files']
+    assert config_files['source_file1.csv'] == {'delimiter': ',', 'dtypes': profile.dtypes}
+
+
+def test_profile_dtypes_overwrite(source_config: Dict):
+    source_data = SourceData(source_config)
+    profiles = source_data.profile_dtypes(file_names=['source_file2.tsv'])
+    assert profiles == []
+    profiles = source_data.profile_dtypes(file_names=['source_file2.tsv'], overwrite=True)
+    assert profiles[0].dtypes['column_b'] == 'Int8'
+
+
+def test_profile_dtypes_of_sample_fit_later_rows(source_config: Dict, tmp_path: Path):
+    source_dir = tmp_path / 'source_data'
+    source_dir.mkdir()
+    (source_dir / 'counts.csv').write_text('id,count\n' + ''.join(
+        f'{i},{300 if i == 8 else i}\n' for i in range(10)))
+    source_config['source_data_folder'] = source_dir
+    source_config['file_defaults']['delimiter'] = ','
+    source_config['source_files'] = None
+    source_data = SourceData(source_config)
+    config_path = tmp_path / 'source_config.yml'
+    write_yaml_file({}, config_path)
+
+    profile = source_data.profile_dtypes(sample_rows=5, config_path=config_path)[0]
+    assert not profile.complete
+    assert profile.dtypes == {'id': 'Int64', 'count': 'Int64'}
+    source_config['source_files'] = read_yaml_file(config_path)['source_files']
+    df = SourceData(source_config).get_source_file('counts.csv').get_csv_as_df(True)
+    assert df['count'].max() == 300
+    profile = source_data.profile_dtypes(sample_rows=10, overwrite=True)[0]
+    assert profile.complete
+    assert profile.dtypes['count'] == 'Int16'
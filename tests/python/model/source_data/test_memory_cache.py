@@ -0,0 +1,62 @@
+import pandas as pd
+import pytest
+from src.delphyne.model.etl_stats import etl_stats, EtlStats
+from src.delphyne.model.source_data.memory_cache import MemoryCache, get_size
+
+
+@pytest.fixture
+def stats() -> EtlStats:
+    """Return empty EtlStats."""
+    etl_stats.reset()
+    yield etl_stats
+
+
+def get_df(n_rows: int) -> pd.DataFrame:
+    return pd.DataFrame({'a': ['value'] * n_rows})
+
+
+def test_get_size_includes_object_values():
+    df = get_df(100)
+    assert get_size(df) > df.memory_usage(deep=False).sum()
+    records = df.to_dict('records')
+    assert get_size(records) > get_size(records[:10])
+
+
+def test_least_recently_used_is_evicted(stats: EtlStats):
+    df_size = get_size(get_df(100))
+    cache = MemoryCache(max_bytes=2 * df_size)
+    cache.put('df1', get_df(100))
+    cache.put('df2', get_df(100))
+    cache.get('df1')
+    cache.put('df3', get_df(100))
+    assert 'df1' in cache
+    assert 'df2' not in cache
+    assert 'df3' in cache
+    assert cache.n_bytes == 2 * df_size
+    assert stats.cache_counts['evictions'] == 1
+
+
+def test_object_exceeding_budget_is_not_cached():
+    cache = MemoryCache(max_bytes=10)
+    cache.put('df1', get_df(100))
+    assert len(cache) == 0
+    assert cache.n_bytes == 0
+
+
+def test_replacing_object_updates_size():
+    cache = MemoryCache()
+    cache.put('df1', get_df(100))
+    cache.put('df1', get_df(10))
+    assert cache.n_bytes == get_size(get_df(10))
+    cache.remove('df1')
+    assert cache.n_bytes == 0
+
+
+def test_hits_and_misses_are_counted(stats: EtlStats):
+    cache = MemoryCache()
+    cache.get('df1')
+    cache.put('df1', get_df(10))
+    cache.get('df1')
+    cache.peek('df1')
+    assert stats.cache_counts['hits'] == 1
+    assert stats.cache_counts['misses'] == 1
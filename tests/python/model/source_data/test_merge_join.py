@@ -0,0 +1,72 @@
+from pathlib import Path
+from typing import Dict
+
+import pandas as pd
+import pytest
+from src.delphyne.model.source_data import SourceData
+from src.delphyne.model.source_data.merge_join import external_sort, merge_join
+
+
+def test_external_sort_spills_runs(tmp_path: Path):
+    rows = [(str(i % 7), i) for i in range(50)]
+    sorted_rows = list(external_sort(rows, key=lambda row: row[0], max_rows_in_memory=8,
+                                     tmp_dir=tmp_path))
+    assert sorted_rows == sorted(rows, key=lambda row: row[0])
+    # Spill files are removed after use
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.parametrize('how,expected', [
+    ('inner', [('b', 1, 'b', 10), ('b', 2, 'b', 10)]),
+    ('left', [('a', 0, None, None), ('b', 1, 'b', 10), ('b', 2, 'b', 10)]),
+    ('right', [('b', 1, 'b', 10), ('b', 2, 'b', 10), (None, None, 'c', 20)]),
+    ('outer', [('a', 0, None, None), ('b', 1, 'b', 10), ('b', 2, 'b', 10),
+               (None, None, 'c', 20)]),
+])
+def test_merge_join(how: str, expected):
+    left = [('a', 0), ('b', 1), ('b', 2)]
+    right = [('b', 10), ('c', 20)]
+    pairs = merge_join(left, right, lambda row: row[0], lambda row: row[0], how)
+    joined = [(l_row or (None, None)) + (r_row or (None, None)) for l_row, r_row in pairs]
+    assert joined == expected
+
+
+@pytest.fixture
+def join_source_data(source_config: Dict, tmp_path: Path) -> SourceData:
+    source_dir = tmp_path / 'source_data'
+    source_dir.mkdir()
+    (source_dir / 'admissions.csv').write_text(
+        'admission_id,person_id,value\n3,p2,x\n1,p1,y\n2,p3,z\n')
+    (source_dir / 'diagnoses.csv').write_text(
+        'admission_id,code,value\n1,I10,d1\n3,E11,d2\n1,J45,d3\n4,K21,d4\n')
+    (source_dir / 'short_rows.csv').write_text('admission_id,a,b\n1,x,y\n2,z\n')
+    source_config['source_data_folder'] = source_dir
+    source_config['file_defaults']['delimiter'] = ','
+    source_config['source_files'] = None
+    return SourceData(source_config)
+
+
+def test_merge_join_source_files(join_source_data: SourceData, tmp_path: Path):
+    rows = list(join_source_data.merge_join('admissions.csv', 'diagnoses.csv',
+                                            on='admission_id', max_rows_in_memory=2,
+                                            tmp_dir=tmp_path))
+    assert [(row['admission_id'], row['code']) for row in rows] == [
+        ('1', 'I10'), ('1', 'J45'), ('3', 'E11')]
+    assert list(rows[0].keys()) == ['admission_id', 'person_id', 'value_x', 'code', 'value_y']
+
+
+def test_merge_join_source_files_in_chunks(join_source_data: SourceData):
+    chunks = list(join_source_data.merge_join('admissions.csv', 'diagnoses.csv',
+                                              on='admission_id', how='outer', chunksize=3))
+    assert [len(chunk) for chunk in chunks] == [3, 2]
+    df = pd.concat(chunks, ignore_index=True)
+    assert df['code'].isna().sum() == 1
+    assert df['person_id'].isna().sum() == 1
+
+
+@pytest.mark.parametrize('how', ['inner', 'outer'])
+def test_merge_join_source_files_with_short_row(join_source_data: SourceData, how: str):
+    rows = list(join_source_data.merge_join('short_rows.csv', 'admissions.csv',
+                                            on='admission_id', how=how))
+    row = next(row for row in rows if row['admission_id'] == '2')
+    assert (row['a'], row['b'], row['person_id']) == ('z', None, 'p3')
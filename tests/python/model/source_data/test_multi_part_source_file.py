@@ -0,0 +1,98 @@
+from pathlib import Path
+from typing import Dict
+
+import pandas as pd
+import pytest
+from src.delphyne.model.etl_stats import etl_stats
+from src.delphyne.model.source_data import SourceData, MultiPartSourceFile
+from src.delphyne.util.io import read_yaml_file, write_yaml_file
+
+
+@pytest.fixture
+def source_dataset(source_config: Dict, tmp_path: Path) -> SourceData:
+    """Return SourceData with a dataset of three labs parts."""
+    for i, rows in enumerate([['1,a,x', '2,b,y'], ['3,c,x'], ['4,d,z', '5,e,y']], start=1):
+        lines = ['id,value,code'] + rows
+        (tmp_path / f'labs_part_{i:04}.csv').write_text('\n'.join(lines) + '\n')
+    (tmp_path / 'other.csv').write_text('a,b\n1,2\n')
+    source_config['source_data_folder'] = tmp_path
+    source_config['source_files'] = {}
+    source_config['source_datasets'] = {
+        'labs': {'pattern': 'labs_part_*.csv', 'delimiter': ',', 'max_workers': 2,
+                 'dtypes': {'id': 'Int64', 'code': 'category'}},
+    }
+    return SourceData(source_config)
+
+
+def test_parts_are_a_single_source(source_dataset: SourceData):
+    labs = source_dataset.get_source_file('labs')
+    assert isinstance(labs, MultiPartSourceFile)
+    assert [part.path.name for part in labs.parts] == [
+        'labs_part_0001.csv', 'labs_part_0002.csv', 'labs_part_0003.csv']
+    with pytest.raises(FileNotFoundError):
+        source_dataset.get_source_file('labs_part_0001.csv')
+    assert source_dataset.get_source_file('other.csv').path.name == 'other.csv'
+
+
+def test_read_dataset_as_df(source_dataset: SourceData):
+    labs = source_dataset.get_source_file('labs')
+    df = labs.get_csv_as_df(apply_dtypes=True, cache=True)
+    assert df['id'].tolist() == [1, 2, 3, 4, 5]
+    assert df.index.tolist() == [0, 1, 2, 3, 4]
+    assert isinstance(df['code'].dtype, pd.CategoricalDtype)
+    assert df['code'].tolist() == ['x', 'y', 'x', 'z', 'y']
+    assert len(source_dataset.memory_cache) == 1
+
+    df = labs.get_csv_as_df(apply_dtypes=False, columns=['value'],
+                            row_filter=lambda df: df['value'] > 'b')
+    assert df['value'].tolist() == ['c', 'd', 'e']
+
+
+def test_stream_dataset(source_dataset: SourceData):
+    labs = source_dataset.get_source_file('labs')
+    assert [row['id'] for row in labs.get_csv_as_generator_of_dicts()] == list('12345')
+    assert len(labs.get_csv_as_list_of_dicts()) == 5
+    assert list(labs.get_csv_as_generator_of_tuples(columns=['id'])) == [
+        ('1',), ('2',), ('3',), ('4',), ('5',)]
+    chunks = list(labs.iter_csv_as_df(apply_dtypes=False, chunksize=2))
+    assert [len(chunk) for chunk in chunks] == [2, 1, 2]
+    assert labs.get_csv_fieldnames() == ['id', 'value', 'code']
+
+
+def test_dataset_rows_are_counted_once(source_config: Dict, source_dataset: SourceData):
+    etl_stats.reset()
+    source_config['count_source_rows'] = True
+    SourceData(source_config)
+    counts = {source.source_name: source.n_rows for source in etl_stats.sources}
+    assert counts == {'labs': 5, 'other.csv': 1}
+
+
+def test_profile_dataset_dtypes(source_config: Dict, source_dataset: SourceData,
+                                tmp_path: Path):
+    config_path = tmp_path / 'source_config.yml'
+    write_yaml_file({'source_datasets': {'labs': {'pattern': 'labs_part_*.csv'}}}, config_path)
+    profile, = source_dataset.profile_dtypes(file_names=['labs'], sample_rows=3,
+                                             config_path=config_path, overwrite=True)
+    # One row of each part was sampled
+    assert profile.n_sample_rows == 3
+    assert not profile.complete
+    assert profile.dtypes['id'] == 'Int64'
+
+    config = read_yaml_file(config_path)
+    assert 'source_files' not in config
+    assert config['source_datasets']['labs'] == {'pattern': 'labs_part_*.csv',
+                                                 'dtypes': profile.dtypes}
+    source_config['source_datasets'] = {'labs': {**source_config['source_datasets']['labs'],
+                                                 **config['source_datasets']['labs']}}
+    labs = SourceData(source_config).get_source_file('labs')
+    assert labs.dtypes == profile.dtypes
+
+    profile, = source_dataset.profile_dtypes(file_names=['labs'], overwrite=True)
+    assert profile.n_sample_rows == 5
+    assert profile.complete
+
+
+def test_dataset_requires_pattern(source_config: Dict):
+    source_config['source_datasets'] = {'labs': {'delimiter': ','}}
+    with pytest.raises(ValueError):
+        SourceData(source_config)
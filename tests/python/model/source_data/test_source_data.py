@@ -1,3 +1,4 @@
+from pathlib import Path
 from typing import Dict
 
 import pytest
@@ -38,3 +39,37 @@ def test_source_dir_property(source_data1: SourceData):
     assert source_data1.source_dir.is_dir()
     assert source_data1.source_dir.exists()
     assert source_data1.source_dir.name == 'test_dir1'
+
+
+def test_source_files_share_memory_cache(source_config: Dict, stats: EtlStats):
+    source_config['cache_memory_limit'] = '1MB'
+    source_data = SourceData(source_config)
+    file1 = source_data.get_source_file('source_file1.csv')
+    file2 = source_data.get_source_file('source_file2.tsv')
+    file1.get_csv_as_df(apply_dtypes=False, cache=True)
+    file2.get_csv_as_list_of_dicts(cache=True)
+    file1.get_csv_as_df(apply_dtypes=False)
+    assert source_data.memory_cache.max_bytes == 1000000
+    assert len(source_data.memory_cache) == 1
+    assert stats.cache_counts['hits'] == 1
+
+
+def test_source_data_counts_are_collected_in_background(source_config: Dict,
+                                                        stats: EtlStats):
+    source_config['count_source_rows'] = True
+    source_config['count_source_rows_in_background'] = True
+    source_data = SourceData(source_config)
+    source_data.wait_for_line_counts()
+    assert len(stats.sources) == 3
+    n_rows = {source.source_name: source.n_rows for source in stats.sources}
+    assert n_rows['source_file2.tsv'] == 4
+
+
+def test_source_file_fingerprints(source_config: Dict, tmp_path: Path):
+    source_config['cache_dir'] = tmp_path
+    source_data = SourceData(source_config)
+    fingerprints = source_data.get_fingerprints(['source_file1.csv', 'beer.sas7bdat'])
+    assert list(fingerprints) == ['source_file1.csv', 'beer.sas7bdat']
+    assert fingerprints['source_file1.csv'] == source_data.get_source_file(
+        'source_file1.csv').get_checksum(algorithm='blake2b')
+    assert (tmp_path / '.fingerprints.json').exists()
@@ -1,12 +1,16 @@
+import bz2
+import gzip
 import logging
+import lzma
 from pathlib import Path
 from typing import Dict
 from unittest.mock import MagicMock
 
+import numpy as np
 import pandas as pd
 import pytest
 from numpy import nan, dtype
-from src.delphyne.model.source_data import SourceFile
+from src.delphyne.model.source_data import SourceFile, ColumnarRecords
 
 
 def get_file_params(**kwargs) -> Dict:
@@ -138,9 +142,9 @@ def test_get_csv_as_df_requires_encoding(source_file2: SourceFile):
 
 
 def test_cache_method_is_called(source_file2: SourceFile):
-    source_file2._cache_df_copy = MagicMock()
+    source_file2._store_cached_df = MagicMock()
     source_file2.get_csv_as_df(apply_dtypes=False, cache=True)
-    source_file2._cache_df_copy.assert_called_once()
+    source_file2._store_cached_df.assert_called_once()
 
 
 def test_get_csv_with_a_cache_does_not_reload_file(source_file2: SourceFile):
@@ -169,6 +173,43 @@ def test_modifying_returned_df_does_not_affect_cached_df(source_file2: SourceFil
     assert 'column_a' in df.columns
 
 
+def test_cached_df_shares_data_with_returned_df(source_file2: SourceFile):
+    df = source_file2.get_csv_as_df(apply_dtypes=False, cache=True)
+    cached_df = source_file2._df
+    assert cached_df is not df
+    assert np.shares_memory(cached_df['column_a'].values, df['column_a'].values)
+
+
+def test_copy_isolates_returned_df_from_cache(source_file2: SourceFile):
+    df = source_file2.get_csv_as_df(apply_dtypes=False, cache=True, copy=True)
+    df.loc[0, 'column_a'] = 'modified'
+    df = source_file2.get_csv_as_df(apply_dtypes=False, cache=True, copy=True)
+    assert df.loc[0, 'column_a'] != 'modified'
+
+
+def test_copy_isolates_returned_csv_records_from_cache(source_file2: SourceFile):
+    records = source_file2.get_csv_as_list_of_dicts(cache=True, copy=True)
+    records[0]['column_a'] = 'modified'
+    records.pop()
+    cached_records = source_file2.get_csv_as_list_of_dicts(cache=True)
+    assert cached_records[0]['column_a'] != 'modified'
+    assert len(cached_records) == len(records) + 1
+
+
+def test_compact_csv_records(source_file2: SourceFile):
+    records = source_file2.get_csv_as_list_of_dicts()
+    compact = source_file2.get_csv_as_list_of_dicts(cache=True, compact=True)
+    assert isinstance(compact, ColumnarRecords)
+    assert list(compact) == records
+    assert source_file2.get_csv_as_list_of_dicts(cache=True, compact=True) is compact
+    assert source_file2.get_csv_as_list_of_dicts(columns=['column_b'], compact=True
+                                                 ).to_list() == [
+        {'column_b': row['column_b']} for row in records]
+    assert source_file2.get_csv_as_list_of_dicts(cache=True) == records
+    copies = source_file2.get_csv_as_list_of_dicts(compact=True, copy=True)
+    assert copies == records and type(copies[0]) is dict
+
+
 def test_setting_cached_df_manually(source_file2: SourceFile):
     df = source_file2.get_csv_as_df(apply_dtypes=False, cache=False)
     df.drop(labels='column_a', axis=1, inplace=True)
@@ -249,3 +290,374 @@ def test_read_csv_values_accessible_via_column_names(source_file2: SourceFile):
 
 def test_read_csv_additional_kwargs(source_file2: SourceFile):
     assert source_file2.get_csv_as_list_of_dicts(strict=True)[0]
+
+
+def test_iter_csv_as_df_chunks(source_file2: SourceFile):
+    chunks = list(source_file2.iter_csv_as_df(apply_dtypes=True, chunksize=3))
+    assert [len(chunk) for chunk in chunks] == [3, 1]
+    for chunk in chunks:
+        assert chunk.dtypes['column_b'] == pd.Int64Dtype()
+        assert chunk.dtypes['column_c'] == dtype('<M8[ns]')
+    df = pd.concat(chunks)
+    pd.testing.assert_frame_equal(df, source_file2.get_csv_as_df(apply_dtypes=True))
+
+
+def test_iter_sas_as_df_chunks(sas_source_file: SourceFile):
+    chunks = list(sas_source_file.iter_sas_as_df(apply_dtypes=False, chunksize=20,
+                                                 encoding='iso8859'))
+    assert [chunk.shape for chunk in chunks] == [(20, 5), (10, 5)]
+
+
+def test_get_csv_as_df_with_columns_and_row_filter(source_file2: SourceFile):
+    df = source_file2.get_csv_as_df(apply_dtypes=True, columns=['column_d', 'column_b'],
+                                    row_filter=lambda chunk: chunk['column_b'] == 34)
+    assert list(df.columns) == ['column_b', 'column_d']
+    assert df['column_b'].dtype == pd.Int64Dtype()
+    assert df['column_d'].tolist() == [1.19, 3.1]
+
+
+def test_get_sas_as_df_with_columns_and_row_filter(sas_source_file: SourceFile):
+    df = sas_source_file.get_sas_as_df(apply_dtypes=False, encoding='iso8859',
+                                       columns=['Q', 'I'],
+                                       row_filter=lambda chunk: chunk['Q'] > 80)
+    assert list(df.columns) == ['Q', 'I']
+    assert (df['Q'] > 80).all()
+
+
+def test_cached_df_is_projected(source_file2: SourceFile):
+    source_file2.get_csv_as_df(apply_dtypes=False, cache=True)
+    source_file2._read_csv_as_df = MagicMock()
+    df = source_file2.get_csv_as_df(apply_dtypes=False, columns=['column_a'])
+    source_file2._read_csv_as_df.assert_not_called()
+    assert list(df.columns) == ['column_a']
+
+
+def test_partial_df_cannot_be_cached(source_file2: SourceFile):
+    with pytest.raises(ValueError):
+        source_file2.get_csv_as_df(apply_dtypes=False, cache=True, columns=['column_a'])
+
+
+def test_csv_records_with_columns_and_row_filter(source_file2: SourceFile):
+    records = source_file2.get_csv_as_list_of_dicts(
+        columns=['column_b', 'column_a'], row_filter=lambda row: row['column_b'] == '34')
+    assert records == [
+        {'column_a': 'Poncing off to Barnsley', 'column_b': '34'},
+        {'column_a': '', 'column_b': '34'},
+    ]
+
+
+def test_csv_records_unknown_column_raises_error(source_file2: SourceFile):
+    with pytest.raises(ValueError) as excinfo:
+        list(source_file2.get_csv_as_generator_of_dicts(columns=['column_x']))
+    assert 'column_x' in str(excinfo.value)
+
+
+def test_csv_as_generator_of_tuples(source_file2: SourceFile):
+    rows = list(source_file2.get_csv_as_generator_of_tuples())
+    assert len(rows) == 4
+    assert rows[2] == ('Poncing off to Barnsley', '34', '', '1.19')
+
+
+def test_csv_as_generator_of_named_tuples(source_file2: SourceFile):
+    rows = source_file2.get_csv_as_generator_of_tuples(
+        named=True, columns=['column_b', 'column_a'], row_filter=lambda row: row.column_b == '34')
+    assert [row.column_a for row in rows] == ['Poncing off to Barnsley', '']
+
+
+def test_csv_as_generator_of_tuple_batches(source_file2: SourceFile):
+    batches = list(source_file2.get_csv_as_generator_of_tuples(batch_size=3,
+                                                               columns=['column_b']))
+    assert batches == [[('',), ('45',), ('34',)], [('34',)]]
+
+
+def test_csv_tuples_of_ragged_rows_match_dicts(source_file2: SourceFile, tmp_path: Path):
+    # A row of source_file2.tsv has fewer values than the header
+    dicts = list(source_file2.get_csv_as_generator_of_dicts())
+    rows = list(source_file2.get_csv_as_generator_of_tuples(named=True))
+    assert [row._asdict() for row in rows] == [dict(record) for record in dicts]
+    rows = source_file2.get_csv_as_generator_of_tuples(columns=['column_d'])
+    assert [row for row, in rows] == [record['column_d'] for record in dicts]
+
+    file_path = tmp_path / 'ragged.csv'
+    file_path.write_text('id,a\n1,x,y,z\n2\n')
+    ragged_file = SourceFile(file_path, get_file_params(delimiter=','))
+    assert list(ragged_file.get_csv_as_generator_of_tuples()) == [('1', 'x'), ('2', None)]
+    rows = ragged_file.get_csv_as_generator_of_tuples(named=True, restkey='rest', restval='')
+    assert [row._asdict() for row in rows] == [
+        {'id': '1', 'a': 'x', 'rest': ['y', 'z']},
+        {'id': '2', 'a': '', 'rest': []},
+    ]
+
+
+@pytest.fixture
+def typed_file(tmp_path: Path) -> SourceFile:
+    """Get SourceFile instance of a csv file with various dtypes."""
+    file_path = tmp_path / 'typed.csv'
+    file_path.write_text('id,flag,code,date,date_nl\n'
+                         '1,True,x,2020-01-31,31-01-2020\n'
+                         ',False,y,,\n'
+                         '3,,x,2020-03-01,01-03-2020\n')
+    dtypes = {
+        'id': 'Int64',
+        'flag': 'boolean',
+        'code': 'category',
+        'date': 'datetime64[ns]',
+        'date_nl': 'datetime64[ns]',
+    }
+    params = get_file_params(delimiter=',', dtypes=dtypes,
+                             date_formats={'date_nl': '%d-%m-%Y'})
+    return SourceFile(file_path, params)
+
+
+def test_csv_parsed_with_dtypes(typed_file: SourceFile):
+    df = typed_file.get_csv_as_df(apply_dtypes=True)
+    assert df.dtypes.astype(str).to_dict() == typed_file.dtypes
+    assert df['id'].tolist() == [1, pd.NA, 3]
+    assert df['flag'].tolist() == [True, False, pd.NA]
+    assert df['code'].cat.categories.tolist() == ['x', 'y']
+    pd.testing.assert_series_equal(df['date'], df['date_nl'], check_names=False)
+    assert df['date'][0] == pd.Timestamp(2020, 1, 31)
+
+
+@pytest.mark.parametrize('kwargs', [{'skiprows': 1}, {'skiprows': [0], 'usecols': [0, 1]}])
+def test_csv_dtypes_applied_when_header_is_not_first_line(tmp_path: Path, kwargs: Dict):
+    file_path = tmp_path / 'junk.csv'
+    file_path.write_text('junk line\nid,val\n1,2\n3,\n')
+    params = get_file_params(delimiter=',', dtypes={'id': 'Int64', 'val': 'Int64'})
+    df = SourceFile(file_path, params).get_csv_as_df(apply_dtypes=True, **kwargs)
+    assert df.dtypes.astype(str).to_dict() == {'id': 'Int64', 'val': 'Int64'}
+    assert df['val'].tolist() == [2, pd.NA]
+
+
+def test_csv_chunks_parsed_with_dtypes(typed_file: SourceFile):
+    chunks = list(typed_file.iter_csv_as_df(apply_dtypes=True, chunksize=2,
+                                            columns=['id', 'date_nl']))
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    assert chunks[1].dtypes.astype(str).to_dict() == {'id': 'Int64',
+                                                      'date_nl': 'datetime64[ns]'}
+    assert chunks[1]['date_nl'][2] == pd.Timestamp(2020, 3, 1)
+
+
+def test_unparseable_date_raises_error(typed_file: SourceFile):
+    with typed_file.path.open('a') as f:
+        f.write('4,True,x,not a date,01-04-2020\n')
+    with pytest.raises((ValueError, TypeError)):
+        typed_file.get_csv_as_df(apply_dtypes=True)
+
+
+def test_csv_dtypes_applied_after_reading_as_fallback(caplog, typed_file: SourceFile):
+    with typed_file.path.open('a') as f:
+        f.write('4.5,True,x,2020-04-01,01-04-2020\n')
+    with caplog.at_level(logging.WARNING), pytest.raises((ValueError, TypeError)):
+        typed_file.get_csv_as_df(apply_dtypes=True)
+    assert 'applying them after reading instead' in caplog.text
+
+
+def test_csv_parsed_in_parallel(typed_file: SourceFile):
+    with typed_file.path.open('a') as f:
+        for i in range(4, 100):
+            f.write(f'{i},True,"multi\nline",2020-04-01,01-04-2020\n')
+    sequential = typed_file.get_csv_as_df(apply_dtypes=True)
+    params = {**typed_file.config, 'parse_workers': 2, 'parse_range_size': 100,
+              'quoted_newlines': True}
+    parallel_file = SourceFile(typed_file.path, params)
+
+    df = parallel_file.get_csv_as_df(apply_dtypes=True)
+    pd.testing.assert_frame_equal(df, sequential, check_categorical=False)
+    chunks = list(parallel_file.iter_csv_as_df(apply_dtypes=True, chunksize=40,
+                                               columns=['id', 'code']))
+    assert [len(chunk) for chunk in chunks] == [40, 40, 19]
+    assert chunks[1].index[0] == 40
+    assert chunks[0]['code'].tolist()[:4] == ['x', 'y', 'x', 'multi\nline']
+
+
+@pytest.mark.parametrize('header, kwargs', [
+    ('', {'header': None}),
+    ('# generated\nid,code\n', {'comment': '#'}),
+])
+def test_csv_parsed_sequentially_if_header_is_not_first_line(tmp_path: Path, header: str,
+                                                             kwargs: Dict):
+    file_path = tmp_path / 'rows.csv'
+    file_path.write_text(header + ''.join(f'{i},x{i}\n' for i in range(200)))
+    params = get_file_params(delimiter=',')
+    sequential = SourceFile(file_path, params).get_csv_as_df(apply_dtypes=False, **kwargs)
+    parallel_file = SourceFile(file_path, {**params, 'parse_workers': 2,
+                                           'parse_range_size': 100})
+    df = parallel_file.get_csv_as_df(apply_dtypes=False, **kwargs)
+    pd.testing.assert_frame_equal(df, sequential)
+
+
+@pytest.mark.parametrize('apply_dtypes', [True, False])
+def test_csv_parsed_with_pyarrow_engine(typed_file: SourceFile, apply_dtypes: bool):
+    pytest.importorskip('pyarrow')
+    expected = typed_file.get_csv_as_df(apply_dtypes)
+    df = typed_file.get_csv_as_df(apply_dtypes, engine='pyarrow')
+    pd.testing.assert_frame_equal(df, expected)
+
+    columns = ['flag', 'date_nl']
+    df = typed_file.get_csv_as_df(apply_dtypes, columns=columns, engine='pyarrow')
+    pd.testing.assert_frame_equal(df, expected[columns])
+
+
+def test_pyarrow_engine_reads_ragged_rows(source_file2: SourceFile):
+    # A row of source_file2.tsv has fewer values than the header
+    pytest.importorskip('pyarrow')
+    expected = source_file2.get_csv_as_df(apply_dtypes=True)
+    df = source_file2.get_csv_as_df(apply_dtypes=True, engine='pyarrow')
+    pd.testing.assert_frame_equal(df, expected)
+    assert pd.isna(df['column_d'][1])
+
+
+@pytest.mark.parametrize('kwargs', [{}, {'na_values': ['x']}, {'keep_default_na': False}])
+def test_pyarrow_engine_matches_missing_values_and_categories(tmp_path: Path, kwargs: Dict):
+    pytest.importorskip('pyarrow')
+    file_path = tmp_path / 'categories.csv'
+    file_path.write_text('code,value\nb,<NA>\na,x\nc,\nb,NULL\n')
+    params = get_file_params(delimiter=',', dtypes={'code': 'category'})
+    source_file = SourceFile(file_path, params)
+    expected = source_file.get_csv_as_df(apply_dtypes=True, **kwargs)
+    df = source_file.get_csv_as_df(apply_dtypes=True, engine='pyarrow', **kwargs)
+    pd.testing.assert_frame_equal(df, expected)
+    assert df['code'].cat.categories.tolist() == ['a', 'b', 'c']
+
+
+def test_pyarrow_engine_from_source_config(caplog, typed_file: SourceFile):
+    pytest.importorskip('pyarrow')
+    arrow_file = SourceFile(typed_file.path, {**typed_file.config, 'engine': 'pyarrow'})
+    with arrow_file.path.open('a') as f:
+        f.write('4.5,True,x,2020-04-01,01-04-2020\n')
+    with caplog.at_level(logging.WARNING), pytest.raises((ValueError, TypeError)):
+        arrow_file.get_csv_as_df(apply_dtypes=True)
+    assert 'applying them after reading instead' in caplog.text
+
+    # Reads pyarrow doesn't support use the default engine
+    chunks = list(arrow_file.iter_csv_as_df(apply_dtypes=False, chunksize=2))
+    assert [len(chunk) for chunk in chunks] == [2, 2]
+    df = arrow_file.get_csv_as_df(apply_dtypes=False, nrows=1)
+    assert df['id'].tolist() == ['1']
+
+
+def test_prefetched_streams_are_equal(source_file2: SourceFile):
+    assert (list(source_file2.get_csv_as_generator_of_dicts(prefetch=2))
+            == list(source_file2.get_csv_as_generator_of_dicts()))
+    assert (list(source_file2.get_csv_as_generator_of_tuples(batch_size=3, prefetch=1))
+            == list(source_file2.get_csv_as_generator_of_tuples(batch_size=3)))
+    chunks = list(source_file2.iter_csv_as_df(apply_dtypes=True, chunksize=3, prefetch=1))
+    assert [len(chunk) for chunk in chunks] == [3, 1]
+
+
+def compress_file(file_path: Path, out_dir: Path, compression: str) -> Path:
+    if compression == 'zstd':
+        zstandard = pytest.importorskip('zstandard')
+        out_path = out_dir / (file_path.name + '.zst')
+        out_path.write_bytes(zstandard.ZstdCompressor().compress(file_path.read_bytes()))
+        return out_path
+    suffix, compress = {
+        'gzip': ('.gz', gzip.compress),
+        'bz2': ('.bz2', bz2.compress),
+        'xz': ('.xz', lzma.compress),
+    }[compression]
+    out_path = out_dir / (file_path.name + suffix)
+    out_path.write_bytes(compress(file_path.read_bytes()))
+    return out_path
+
+
+@pytest.mark.parametrize('compression', ['gzip', 'bz2', 'xz', 'zstd'])
+def test_compressed_source_file(source_file2: SourceFile, tmp_path: Path, compression: str):
+    file_path = compress_file(source_file2.path, tmp_path, compression)
+    compressed_file = SourceFile(file_path, source_file2.config)
+    assert compressed_file.compression == compression
+    assert compressed_file.get_line_count() == 4
+    assert compressed_file.get_checksum() == source_file2.get_checksum()
+    pd.testing.assert_frame_equal(compressed_file.get_csv_as_df(apply_dtypes=True),
+                                  source_file2.get_csv_as_df(apply_dtypes=True))
+    assert (compressed_file.get_csv_as_list_of_dicts()
+            == source_file2.get_csv_as_list_of_dicts())
+    assert (list(compressed_file.get_csv_as_generator_of_tuples())
+            == list(source_file2.get_csv_as_generator_of_tuples()))
+
+
+def test_compressed_sas_file(sas_source_file: SourceFile, tmp_path: Path):
+    file_path = compress_file(sas_source_file.path, tmp_path, 'gzip')
+    compressed_file = SourceFile(file_path, sas_source_file.config)
+    df = compressed_file.get_sas_as_df(apply_dtypes=False, encoding='iso8859')
+    assert df.shape == (30, 5)
+    chunks = list(compressed_file.iter_sas_as_df(apply_dtypes=False, chunksize=10,
+                                                 encoding='iso8859'))
+    assert len(chunks) == 3
+
+
+def test_compression_from_source_config(source_file2: SourceFile, tmp_path: Path):
+    file_path = compress_file(source_file2.path, tmp_path, 'gzip')
+    file_path = file_path.rename(tmp_path / 'source_file2.data')
+    compressed_file = SourceFile(file_path, {**source_file2.config, 'compression': 'gzip'})
+    assert compressed_file.get_line_count() == 4
+    assert len(compressed_file.get_csv_as_df(apply_dtypes=False)) == 4
+
+
+@pytest.fixture
+def indexed_file(tmp_path: Path) -> SourceFile:
+    """SourceFile with a multiline value and duplicate keys."""
+    file_path = tmp_path / 'visits.csv'
+    file_path.write_text('person_id,visit,note\n'
+                         '1,a,"first\nvisit"\n'
+                         '2,b,x\n'
+                         '\n'
+                         '1,c,"said ""hi"""\n'
+                         '3,d,y')
+    return SourceFile(file_path, get_file_params(delimiter=','))
+
+
+def test_lookup_records_via_index(indexed_file: SourceFile):
+    index = indexed_file.build_index('person_id')
+    assert index.index_path.name.startswith('.visits.csv')
+    records = indexed_file.lookup('1')
+    assert records == [
+        {'person_id': '1', 'visit': 'a', 'note': 'first\nvisit'},
+        {'person_id': '1', 'visit': 'c', 'note': 'said "hi"'},
+    ]
+    assert indexed_file.lookup('3') == [{'person_id': '3', 'visit': 'd', 'note': 'y'}]
+    assert indexed_file.lookup('4') == []
+
+
+def test_lookup_with_composite_key(indexed_file: SourceFile):
+    indexed_file.build_index(['person_id', 'visit'])
+    assert len(indexed_file.lookup(('1', 'c'))) == 1
+    with pytest.raises(ValueError):
+        indexed_file.lookup('1')
+
+
+def test_index_is_rebuilt_when_file_changes(indexed_file: SourceFile):
+    index = indexed_file.build_index('person_id')
+    assert index.is_current()
+    index.close()
+    with indexed_file.path.open('a') as f:
+        f.write('\n4,e,z\n')
+    assert not index.is_current()
+    indexed_file.build_index('person_id')
+    assert indexed_file.lookup('4')[0]['visit'] == 'e'
+
+
+def test_lookup_of_ragged_rows_matches_dict_reader(tmp_path: Path):
+    file_path = tmp_path / 'ragged.csv'
+    file_path.write_text('id,a,b\n1,x\n2,y,z,extra\n')
+    source_file = SourceFile(file_path, get_file_params(delimiter=','))
+    source_file.build_index('id')
+    expected = list(source_file.get_csv_as_generator_of_dicts())
+    assert source_file.lookup('1') == [expected[0]]
+    assert source_file.lookup('2') == [{'id': '2', 'a': 'y', 'b': 'z', None: ['extra']}]
+    assert source_file.lookup('2') == [expected[1]]
+
+
+def test_lookup_after_file_changes_raises_error(indexed_file: SourceFile):
+    indexed_file.build_index('person_id')
+    assert len(indexed_file.lookup('1')) == 2
+    with indexed_file.path.open('a') as f:
+        f.write('\n1,e,z\n')
+    with pytest.raises(ValueError):
+        indexed_file.lookup('1')
+
+
+def test_lookup_without_index_raises_error(indexed_file: SourceFile):
+    with pytest.raises(ValueError):
+        indexed_file.lookup('1')
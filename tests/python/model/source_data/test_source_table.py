@@ -0,0 +1,93 @@
+from pathlib import Path
+from typing import Dict
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, Table, MetaData, Column, Integer, String
+from sqlalchemy.engine import Engine
+from src.delphyne.model.etl_stats import etl_stats
+from src.delphyne.model.source_data import SourceTable, SourceData
+
+
+@pytest.fixture
+def engine(tmp_path: Path) -> Engine:
+    """Return engine of an SQLite database with a single table."""
+    engine = create_engine(f'sqlite:///{tmp_path / "source.db"}')
+    persons = Table('persons', MetaData(),
+                    Column('person_id', Integer, primary_key=True),
+                    Column('gender', String),
+                    Column('year', String))
+    persons.create(engine)
+    genders = ['F', 'M', 'F', None, 'M']
+    years = ['1970', '1980', '1990', '2000', '2010']
+    engine.execute(persons.insert(), [
+        {'person_id': i + 1, 'gender': gender, 'year': year}
+        for i, (gender, year) in enumerate(zip(genders, years))
+    ])
+    return engine
+
+
+@pytest.fixture
+def source_table(engine: Engine) -> SourceTable:
+    params = {'fetch_size': 2, 'dtypes': {'year': 'Int64'}}
+    return SourceTable('persons', engine, params)
+
+
+def test_get_table_as_df(source_table: SourceTable):
+    df = source_table.get_table_as_df(apply_dtypes=True)
+    assert df.shape == (5, 3)
+    assert df['year'].dtype == pd.Int64Dtype()
+
+
+def test_categories_of_chunks_are_combined(engine: Engine):
+    # The fetched chunks have different genders
+    source_table = SourceTable('persons', engine,
+                               {'fetch_size': 2, 'dtypes': {'gender': 'category'}})
+    df = source_table.get_table_as_df(apply_dtypes=True)
+    assert isinstance(df['gender'].dtype, pd.CategoricalDtype)
+    assert df['gender'].cat.categories.tolist() == ['F', 'M']
+    assert df['gender'].tolist()[:3] == ['F', 'M', 'F']
+
+
+def test_iter_table_as_df_with_columns_and_row_filter(source_table: SourceTable):
+    chunks = list(source_table.iter_table_as_df(
+        apply_dtypes=False, columns=['person_id', 'gender'],
+        row_filter=lambda chunk: chunk['gender'] == 'F'))
+    assert len(chunks) == 3
+    df = pd.concat(chunks)
+    assert list(df.columns) == ['person_id', 'gender']
+    assert df['person_id'].tolist() == [1, 3]
+
+
+def test_get_table_as_generator_of_dicts(source_table: SourceTable):
+    records = list(source_table.get_table_as_generator_of_dicts(
+        columns=['person_id'], row_filter=lambda row: row['person_id'] > 3))
+    assert records == [{'person_id': 4}, {'person_id': 5}]
+
+
+def test_get_table_as_generator_of_tuples(source_table: SourceTable):
+    batches = list(source_table.get_table_as_generator_of_tuples(named=True, batch_size=3))
+    assert [len(batch) for batch in batches] == [3, 2]
+    assert batches[1][0].gender is None
+
+
+def test_prefetched_rows_are_equal(source_table: SourceTable):
+    assert (list(source_table.get_table_as_generator_of_tuples(prefetch=2))
+            == list(source_table.get_table_as_generator_of_tuples()))
+    chunks = list(source_table.iter_table_as_df(apply_dtypes=True, prefetch=1))
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+
+
+def test_unknown_column_raises_error(source_table: SourceTable):
+    with pytest.raises(ValueError):
+        source_table.get_table_as_df(apply_dtypes=False, columns=['x'])
+
+
+def test_source_table_counts_are_collected(source_config: Dict, engine: Engine):
+    etl_stats.reset()
+    source_config['count_source_rows'] = True
+    source_config['source_tables'] = {'persons': None}
+    source_data = SourceData(source_config, engine=engine)
+    assert source_data.get_source_table('persons').get_row_count() == 5
+    n_rows = {source.source_name: source.n_rows for source in etl_stats.sources}
+    assert n_rows['persons'] == 5
@@ -0,0 +1,48 @@
+import hashlib
+from pathlib import Path
+
+import pytest
+from src.delphyne.util import fingerprint
+from src.delphyne.util.fingerprint import FingerprintStore
+
+
+@pytest.fixture
+def files(tmp_path: Path):
+    paths = []
+    for i in range(3):
+        path = tmp_path / f'file{i}.csv'
+        path.write_bytes(f'a,b\n{i},x\n'.encode())
+        paths.append(path)
+    return paths
+
+
+def test_fingerprints_are_blake2_checksums(files):
+    store = FingerprintStore()
+    checksums = store.get_fingerprints(files, max_workers=2)
+    assert list(checksums) == files
+    assert checksums[files[1]] == hashlib.blake2b(files[1].read_bytes()).hexdigest()
+
+
+def test_unchanged_files_are_not_hashed_again(files, tmp_path: Path, monkeypatch):
+    memo_path = tmp_path / 'memo' / 'fingerprints.json'
+    checksums = FingerprintStore(memo_path).get_fingerprints(files)
+    assert memo_path.exists()
+
+    hashed = []
+    get_file_checksum = fingerprint.get_file_checksum
+
+    def record_hash(path, **kwargs):
+        hashed.append(path)
+        return get_file_checksum(path, **kwargs)
+
+    monkeypatch.setattr(fingerprint, 'get_file_checksum', record_hash)
+    files[0].write_bytes(b'a,b\nchanged\n')
+    store = FingerprintStore(memo_path)
+    new_checksums = store.get_fingerprints(files)
+    assert hashed == [files[0]]
+    assert new_checksums[files[0]] != checksums[files[0]]
+    assert new_checksums[files[2]] == checksums[files[2]]
+
+    # Another algorithm invalidates the memoized checksums
+    md5 = FingerprintStore(memo_path, algorithm='md5').get_fingerprint(files[2])
+    assert md5 == hashlib.md5(files[2].read_bytes()).hexdigest()
@@ -1,3 +1,7 @@
+from typing import Iterator, List
+
+import pytest
+from src.delphyne.util.helper import prefetch
 from src.delphyne.util.table import get_full_table_name
 
 
@@ -15,3 +19,34 @@ def test_get_full_table_name_with_schema_map():
     name = get_full_table_name(table='table1', schema='schema1',
                                schema_map={'schema1': 'schema2'})
     assert name == 'schema2.table1'
+
+
+def numbers(n: int, closed: List[bool]) -> Iterator[int]:
+    try:
+        yield from range(n)
+    finally:
+        closed.append(True)
+
+
+@pytest.mark.parametrize('n_items,batch_size', [(0, 1), (1, 1), (3, 2), (100, 1000)])
+def test_prefetch_keeps_order(n_items: int, batch_size: int):
+    assert list(prefetch(range(25), n_items, batch_size)) == list(range(25))
+
+
+def test_prefetch_stops_when_closed_early():
+    closed = []
+    items = prefetch(numbers(1000, closed), n_items=10)
+    assert next(items) == 0
+    items.close()
+    assert closed == [True]
+
+
+def test_prefetch_raises_errors_of_iterable():
+    def failing():
+        yield 1
+        raise KeyError('failed')
+
+    items = prefetch(failing(), n_items=1)
+    assert next(items) == 1
+    with pytest.raises(KeyError):
+        next(items)
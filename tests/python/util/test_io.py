@@ -0,0 +1,73 @@
+from pathlib import Path
+
+import pytest
+from src.delphyne.util import io
+from src.delphyne.util.io import get_file_line_count
+
+
+@pytest.fixture
+def multiline_file(tmp_path: Path) -> Path:
+    file_path = tmp_path / 'multiline.csv'
+    file_path.write_bytes(b'a,b\n1,"x\ny"\n2,"""quoted""\nvalue"\n3,z')
+    return file_path
+
+
+def test_line_count_without_trailing_newline(multiline_file: Path):
+    assert get_file_line_count(multiline_file) == 5
+    assert get_file_line_count(multiline_file, skip_header=False) == 6
+
+
+def test_line_count_ignores_quoted_newlines(multiline_file: Path):
+    assert get_file_line_count(multiline_file, quoted_newlines=True) == 3
+
+
+def test_quoted_newlines_across_blocks(multiline_file: Path, monkeypatch):
+    monkeypatch.setattr(io, '_READ_BLOCK_SIZE', 3)
+    assert get_file_line_count(multiline_file, quoted_newlines=True) == 3
+    assert get_file_line_count(multiline_file) == 5
+
+
+def test_line_count_empty_file(tmp_path: Path):
+    file_path = tmp_path / 'empty.csv'
+    file_path.touch()
+    assert get_file_line_count(file_path) == 0
+
+
+@pytest.mark.parametrize('block_size', [1, 4, 1 << 24])
+def test_record_ranges_respect_quoted_newlines(multiline_file: Path, monkeypatch,
+                                               block_size: int):
+    monkeypatch.setattr(io, '_READ_BLOCK_SIZE', block_size)
+    ranges = io.get_record_ranges(multiline_file, start=4, range_size=1,
+                                  quoted_newlines=True)
+    contents = multiline_file.read_bytes()
+    assert [contents[start:end] for start, end in ranges] == [
+        b'1,"x\ny"\n', b'2,"""quoted""\nvalue"\n', b'3,z']
+
+
+def test_record_ranges_by_line(multiline_file: Path):
+    ranges = io.get_record_ranges(multiline_file, start=4, range_size=10)
+    assert ranges == [(4, 26), (26, 36)]
+    assert io.get_record_ranges(multiline_file, start=36, range_size=10) == []
+
+
+def test_open_byte_range(multiline_file: Path):
+    with io.open_byte_range(multiline_file, 4, 12) as f:
+        assert f.read() == b'1,"x\ny"\n'
+    with io.open_byte_range(multiline_file, 36, 40) as f:
+        assert f.read() == b''
+
+
+@pytest.mark.parametrize('block_size', [1, 1 << 24])
+def test_range_line_count(multiline_file: Path, monkeypatch, block_size: int):
+    monkeypatch.setattr(io, '_READ_BLOCK_SIZE', block_size)
+    assert io.get_range_line_count(multiline_file, 4, 33) == 4
+    assert io.get_range_line_count(multiline_file, 4, 33, quoted_newlines=True) == 2
+
+
+@pytest.mark.parametrize('block_size', [1, 1 << 16])
+def test_find_last_line_end(multiline_file: Path, monkeypatch, block_size: int):
+    monkeypatch.setattr(io, '_LINE_SEARCH_BLOCK_SIZE', block_size)
+    size = multiline_file.stat().st_size
+    assert io.find_last_line_end(multiline_file, 0, size) == 33
+    assert io.find_last_line_end(multiline_file, 33, size) == 33
+    assert io.find_last_line_end(multiline_file, 0, 4) == 4
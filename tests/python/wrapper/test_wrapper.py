@@ -65,3 +65,33 @@ def test_create_tables_cdm600(wrapper_cdm600: Wrapper):
         'measurement', 'observation', 'stem_table', 'condition_occurrence',
         'device_exposure', 'drug_exposure', 'procedure_occurrence', 'survey_conduct',
         'note_nlp'}
+
+
+def test_reset_cdm(cdm600_wrapper_with_tables_created: Wrapper):
+    wrapper = cdm600_wrapper_with_tables_created
+    with wrapper.db.engine.connect() as conn:
+        conn.execute("INSERT INTO cdm.location (location_id) VALUES (1)")
+
+    wrapper.reset_cdm(drop_indexes=True)
+
+    inspector = inspect(wrapper.db.engine)
+    assert 'location' in inspector.get_table_names('cdm')
+    assert inspector.get_indexes('person', schema='cdm') == []
+    with wrapper.db.engine.connect() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM cdm.location").scalar() == 0
+    # Vocabulary table indexes are left untouched
+    assert inspector.get_indexes('concept', schema='vocab') != []
+
+
+def test_optimize_loaded_tables(cdm600_wrapper_with_tables_created: Wrapper):
+    wrapper = cdm600_wrapper_with_tables_created
+    wrapper.execute_sql_query("INSERT INTO cdm.location (location_id) VALUES (1)",
+                              query_name='insert_location')
+
+    wrapper.optimize_loaded_tables(vacuum=True)
+
+    # Planner statistics are updated by ANALYZE
+    with wrapper.db.engine.connect() as conn:
+        n_rows_estimate = conn.execute(
+            "SELECT reltuples FROM pg_class WHERE oid = 'cdm.location'::regclass").scalar()
+    assert n_rows_estimate == 1